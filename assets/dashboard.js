@@ -0,0 +1,155 @@
+// Clientside callbacks for dashboard.py: charts and stat cards are drawn from the
+// pre-aggregated tables kept in the 'dashboard-data' store.
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    dashboard: {
+        // Ask the server for the tables only when the stored copy is missing or outdated
+        check_version: function(version, stored) {
+            if (stored && stored.version === version) {
+                return window.dash_clientside.no_update;
+            }
+            return version;
+        },
+
+        render: function(dataType, barClicks, lineClicks, pieClicks, mapClicks, payload, vizOptions) {
+            const noUpdate = window.dash_clientside.no_update;
+            if (!payload || !payload.views[dataType]) {
+                return [noUpdate, noUpdate, noUpdate, noUpdate, noUpdate, noUpdate];
+            }
+            const view = payload.views[dataType];
+            const labels = view.labels;
+            const values = view.values;
+            vizOptions = vizOptions || [];
+
+            // 빈 표: 안내 문구만 그리고 카드는 비워 둔다 (겹쳐 그릴 요소도 없다)
+            if (values.length === 0) {
+                const empty = Object.assign({}, payload.layout, {
+                    title: {text: view.titles.bar},
+                    xaxis: {visible: false},
+                    yaxis: {visible: false},
+                    annotations: [{text: '표시할 데이터가 없습니다', xref: 'paper', yref: 'paper',
+                                   x: 0.5, y: 0.5, showarrow: false, font: {size: 16}}]
+                });
+                return [{data: [], layout: empty}, '0건', '-', '-', view.max_label.replace('{}', '-'), null];
+            }
+
+            // 데이터만 바뀐 경우나 지원하지 않는 차트는 막대 그래프로 표시
+            const triggered = window.dash_clientside.callback_context.triggered
+                .map(t => t.prop_id.split('.')[0]);
+            let chartType = triggered.length && triggered[0].endsWith('-btn')
+                ? triggered[0].replace('-btn', '') : 'bar';
+            if (!view.charts.includes(chartType)) {
+                chartType = 'bar';
+            }
+
+            const layout = Object.assign({}, payload.layout, {
+                title: {text: view.titles[chartType]}
+            });
+            let data;
+            let positions = null;
+            if (chartType === 'pie') {
+                data = [{type: 'pie', labels: labels, values: values}];
+                positions = addComparison(data, layout, labels, view, vizOptions, chartType);
+            } else if (chartType === 'map') {
+                // 지명 사전의 시도 경계에 칠한다 (사전에 없는 지역은 뺀다)
+                const shown = labels.map((label, i) => i).filter(i => payload.map.locations[i]);
+                data = [{
+                    type: 'choropleth',
+                    geojson: payload.map.geojson,
+                    locations: shown.map(i => payload.map.locations[i]),
+                    z: shown.map(i => values[i]),
+                    text: shown.map(i => labels[i]),
+                    hovertemplate: '%{text}: %{z:,}<extra></extra>',
+                    colorscale: 'Viridis',
+                    marker: {line: {color: 'white', width: 0.5}},
+                    colorbar: {title: {text: '사고 건수'}}
+                }];
+                positions = addComparison(data, layout, labels, view, vizOptions, chartType);
+                layout.geo = {fitbounds: 'locations', visible: false};
+            } else {
+                data = [chartType === 'line'
+                    ? {type: 'scatter', mode: 'lines', x: labels, y: values, name: '사고 건수'}
+                    : {type: 'bar', x: labels, y: values, name: '사고 건수'}];
+                layout.xaxis = {title: {text: view.axis_title}};
+                layout.yaxis = {title: {text: '사고 건수'}};
+                positions = addOverlays(data, layout, labels, values, vizOptions);
+                Object.assign(positions, addComparison(data, layout, labels, view, vizOptions, chartType));
+            }
+
+            const total = values.reduce((a, b) => a + b, 0);
+            const mean = total / values.length;
+            const maxIndex = values.indexOf(Math.max(...values));
+            return [
+                {data: data, layout: layout},
+                `${total.toLocaleString()}건`,
+                `${mean.toFixed(1)}건`,
+                `${values[maxIndex].toLocaleString()}건`,
+                view.max_label.replace('{}', labels[maxIndex]),
+                positions
+            ];
+        }
+    }
+});
+
+// Overlays are always drawn with visibility from the options; the returned positions are what
+// components/graphs/overlays.py's patch_overlays flips when the options change.
+function addOverlays(data, layout, x, y, vizOptions) {
+    const positions = {};
+    const n = y.length;
+    if (n >= 2) {
+        const meanX = (n - 1) / 2;
+        const meanY = y.reduce((a, b) => a + b, 0) / n;
+        let sxy = 0;
+        let sxx = 0;
+        y.forEach((v, i) => {
+            sxy += (i - meanX) * (v - meanY);
+            sxx += (i - meanX) * (i - meanX);
+        });
+        const slope = sxy / sxx;
+        data.push({
+            type: 'scatter',
+            x: x,
+            y: y.map((v, i) => meanY + slope * (i - meanX)),
+            mode: 'lines',
+            name: '추세선',
+            line: {dash: 'dash', color: 'red'},
+            visible: vizOptions.includes('trend')
+        });
+        positions.trend = {data: [data.length - 1]};
+    }
+    if (n) {
+        const mean = y.reduce((a, b) => a + b, 0) / n;
+        const visible = vizOptions.includes('mean');
+        layout.shapes = [{
+            type: 'line', xref: 'x domain', x0: 0, x1: 1, yref: 'y', y0: mean, y1: mean,
+            line: {dash: 'dash', color: 'green'}, visible: visible
+        }];
+        layout.annotations = [{
+            text: '평균', xref: 'x domain', x: 1, xanchor: 'left', yref: 'y', y: mean,
+            showarrow: false, visible: visible
+        }];
+        positions.mean = {shapes: [0], annotations: [0]};
+    }
+    return positions;
+}
+
+// 비교 분석: 같은 표에서 구한 기준 기간 값을 겹쳐 그린다. 기준 기간이 없는 표(단일 연도 자료)는
+// 안내 문구만 표시한다. 어느 쪽이든 'compare' 옵션으로 보이기만 바꾼다.
+function addComparison(data, layout, labels, view, vizOptions, chartType) {
+    const visible = vizOptions.includes('compare');
+    if (view.baseline && (chartType === 'bar' || chartType === 'line')) {
+        data.push(chartType === 'line'
+            ? {type: 'scatter', mode: 'lines', x: labels, y: view.baseline, name: view.compare_label,
+               line: {dash: 'dot', color: 'gray'}, visible: visible}
+            : {type: 'bar', x: labels, y: view.baseline, name: view.compare_label,
+               marker: {color: 'gray'}, opacity: 0.6, visible: visible});
+        if (chartType === 'bar') {
+            layout.barmode = 'group';
+        }
+        return {compare: {data: [data.length - 1]}};
+    }
+    layout.annotations = (layout.annotations || []).concat([{
+        text: '비교할 이전 기간 자료가 없습니다', xref: 'paper', yref: 'paper', x: 0.5, y: 1.08,
+        showarrow: false, font: {color: 'gray'}, visible: visible
+    }]);
+    return {compare: {annotations: [layout.annotations.length - 1]}};
+}
@@ -1,12 +1,25 @@
 import dash
-from dash import html, dcc, Input, Output, State
+from dash import html, dcc, Input, Output, State, ClientsideFunction
 import dash_bootstrap_components as dbc
 import plotly.graph_objects as go
 import plotly.express as px
+import plotly.io as pio
 import networkx as nx
 import pandas as pd
 import numpy as np
+import hashlib
+import json
 import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+from utils.query import register_dataset, run_query, get_data_version, refresh_dataset
+from utils.reload import source_watcher
+from utils.schema import TOTAL_LABELS
+from utils.gazetteer import region_boundaries, region_codes
+from components.graphs.overlays import patch_overlays
+from utils.transport import enable_compression
+from utils.memory import memory_layer, register_memory_diagnostics
 
 # Initialize the Dash app with a modern theme
 app = dash.Dash(
@@ -17,6 +30,12 @@ app = dash.Dash(
     ]
 )
 
+# Gzip layout and callback responses (the dashboard-data tables) for clients that accept it
+enable_compression(app.server)
+
+# Cache sizes and callback allocation traces at /diagnostics/memory (local requests only)
+register_memory_diagnostics(app.server)
+
 # Custom CSS
 app.index_string = '''
 <!DOCTYPE html>
@@ -95,349 +114,314 @@ app.index_string = '''
 '''
 
 # Data loading functions
+DATA_DIR = "화물차 사고 데이터 시각화"
+DATA_FILES = {
+    'yearly': "2018-2020 화물차 연도별 교통사고.xls",
+    'regional': "2020년 화물차 지자체별 교통사고.xls",
+    'accident_type': "2020년 화물차 사고유형별 교통사고.xls",
+    'weather': "2020년 화물차 기상상태별 교통사고.xls",
+}
+
 def load_cargo_data():
-    data_dir = "화물차 사고 데이터 시각화"
-    data = {}
-    
-    # Load yearly data
-    yearly_file = os.path.join(data_dir, "2018-2020 화물차 연도별 교통사고.xls")
-    data['yearly'] = pd.read_excel(yearly_file)
-    
-    # Load regional data
-    regional_file = os.path.join(data_dir, "2020년 화물차 지자체별 교통사고.xls")
-    data['regional'] = pd.read_excel(regional_file)
-    
-    # Load accident type data
-    accident_file = os.path.join(data_dir, "2020년 화물차 사고유형별 교통사고.xls")
-    data['accident_type'] = pd.read_excel(accident_file)
-    
-    # Load weather data
-    weather_file = os.path.join(data_dir, "2020년 화물차 기상상태별 교통사고.xls")
-    data['weather'] = pd.read_excel(weather_file)
-    
-    return data
+    return {name: pd.read_excel(os.path.join(DATA_DIR, file)) for name, file in DATA_FILES.items()}
 
 # Load data
 data = load_cargo_data()
 
-# Define the layout
-app.layout = dbc.Container([
-    # Header
-    dbc.Row([
-        dbc.Col([
-            html.Div([
-                html.H1("화물차 사고 데이터 분석 대시보드", 
-                       className="text-center mb-4",
-                       style={'color': '#2c3e50', 'fontWeight': 'bold'}),
-                html.P("화물차 교통사고 데이터를 다양한 관점에서 분석하고 시각화합니다.",
-                      className="text-center text-muted mb-4")
-            ], className="mb-5")
-        ])
-    ]),
-    
-    # Main Content
-    dbc.Row([
-        # Control Panel
-        dbc.Col([
-            dbc.Card([
-                dbc.CardHeader([
-                    html.H4("분석 컨트롤", className="mb-0"),
-                    html.Small("데이터와 시각화 옵션을 선택하세요", className="text-muted")
-                ]),
-                dbc.CardBody([
-                    html.Div([
-                        html.H5("데이터 선택", className="mb-3"),
-                        dcc.Dropdown(
-                            id='data-selector',
-                            options=[
-                                {'label': '연도별 분석', 'value': 'yearly'},
-                                {'label': '지역별 분석', 'value': 'regional'},
-                                {'label': '사고유형별 분석', 'value': 'accident_type'},
-                                {'label': '기상상태별 분석', 'value': 'weather'}
-                            ],
-                            value='yearly',
-                            className="mb-4"
-                        ),
-                        
-                        html.H5("시각화 유형", className="mb-3"),
-                        dbc.ButtonGroup([
-                            dbc.Button([
-                                html.I(className="fas fa-chart-bar mr-2"),
-                                "막대 그래프"
-                            ], id="bar-btn", color="primary", className="mr-2"),
-                            dbc.Button([
-                                html.I(className="fas fa-chart-line mr-2"),
-                                "선 그래프"
-                            ], id="line-btn", color="primary", className="mr-2"),
-                            dbc.Button([
-                                html.I(className="fas fa-chart-pie mr-2"),
-                                "파이 차트"
-                            ], id="pie-btn", color="primary", className="mr-2"),
-                            dbc.Button([
-                                html.I(className="fas fa-map-marker-alt mr-2"),
-                                "지도"
-                            ], id="map-btn", color="primary")
-                        ], className="mb-4"),
-                        
-                        html.H5("추가 옵션", className="mb-3"),
-                        dbc.Checklist(
-                            id='visualization-options',
-                            options=[
-                                {'label': '트렌드 라인', 'value': 'trend'},
-                                {'label': '평균값 표시', 'value': 'mean'},
-                                {'label': '비교 분석', 'value': 'compare'}
-                            ],
-                            value=['trend'],
-                            switch=True,
-                            className="mb-3"
-                        )
+def reload_cargo_data():
+    """Re-read the workbooks and swap them in; requests already running keep the old tables."""
+    global data
+    data = load_cargo_data()
+    for name in DASHBOARD_VIEWS:
+        refresh_dataset(f'cargo_{name}')
+
+# 대시보드 표를 공용 쿼리 계층에 등록 (지자체별 파일의 지역 값은 '시도' 컬럼에 있음)
+# 각 표의 차원, 지원하는 차트와 문구는 브라우저로 함께 보낸다
+DASHBOARD_VIEWS = {
+    'yearly': {
+        'dimension': '연도',
+        'charts': ['bar', 'line'],
+        'titles': {'bar': '연도별 화물차 교통사고 현황', 'line': '연도별 화물차 교통사고 추이'},
+        'axis_title': '연도',
+        'max_label': '최대 사고 건수 ({}년)',
+        # 비교 분석: 같은 표의 직전 연도 값을 겹쳐 그린다
+        'compare_label': '전년',
+    },
+    'regional': {
+        'dimension': '시도',
+        'charts': ['bar', 'map'],
+        'titles': {'bar': '지자체별 화물차 교통사고 현황', 'map': '지역별 화물차 교통사고 현황'},
+        'axis_title': '지역',
+        'max_label': '최다 사고 지역 ({})',
+    },
+    'accident_type': {
+        'dimension': '사고유형',
+        'charts': ['bar', 'pie'],
+        'titles': {'bar': '사고유형별 화물차 교통사고 현황', 'pie': '사고유형별 화물차 교통사고 비율'},
+        'axis_title': '사고 유형',
+        'max_label': '최다 발생 유형 ({})',
+    },
+    'weather': {
+        'dimension': '기상상태',
+        'charts': ['bar', 'pie'],
+        'titles': {'bar': '기상상태별 화물차 교통사고 현황', 'pie': '기상상태별 화물차 교통사고 비율'},
+        'axis_title': '기상 상태',
+        'max_label': '최다 발생 기상 ({})',
+    },
+}
+for name, view in DASHBOARD_VIEWS.items():
+    register_dataset(f'cargo_{name}', lambda name=name: data[name], dimensions=[view['dimension']],
+                     measures=['accident_count', 'fatal_count', 'fatal_rate'])
+
+# 원본 엑셀이 바뀌면 재시작 없이 표를 다시 읽는다
+source_watcher.watch('dashboard', lambda: [os.path.join(DATA_DIR, file) for file in DATA_FILES.values()],
+                     reload_cargo_data)
+source_watcher.start()
+
+def region_map_payload(labels):
+    """Bundled 시도 boundaries and the boundary id of each regional label (None outside the gazetteer)."""
+    return {'geojson': region_boundaries(),
+            'locations': [str(code) if code else None for code in region_codes(labels)]}
+
+# 모든 차트에 공통으로 적용하는 레이아웃
+BASE_LAYOUT = dict(
+    template=pio.templates['plotly_white'].to_plotly_json(),
+    showlegend=True,
+    legend=dict(
+        orientation="h",
+        yanchor="bottom",
+        y=1.02,
+        xanchor="right",
+        x=1
+    ),
+    plot_bgcolor='rgba(0,0,0,0)',
+    paper_bgcolor='rgba(0,0,0,0)',
+    font=dict(
+        family="Arial, sans-serif",
+        size=12,
+        color="#2c3e50"
+    ),
+    margin=dict(t=50, l=50, r=50, b=50)
+)
+
+_payload_cache = {}
+
+@memory_layer('dashboard')
+def dashboard_memory_entries():
+    # 엑셀에서 읽은 표와 브라우저로 보내는 집계 payload
+    entries = {f'data/{name}': df for name, df in data.items()}
+    entries.update({f'payload v{versions}': payload for versions, payload in _payload_cache.items()})
+    return entries
+
+def previous_year_values(labels, values):
+    """Align each year's value with the previous year's from the same grouped table (None if absent)."""
+    by_year = {}
+    for label, value in zip(labels, values):
+        try:
+            by_year[int(float(label))] = value
+        except (TypeError, ValueError):
+            continue
+    baseline = []
+    for label in labels:
+        try:
+            baseline.append(by_year.get(int(float(label)) - 1))
+        except (TypeError, ValueError):
+            baseline.append(None)
+    return baseline
+
+def get_dashboard_payload():
+    """Build the pre-aggregated tables shipped to the browser, tagged with a content hash.
+
+    Rebuilt only when one of the dashboard datasets changes version.
+    """
+    versions = tuple(get_data_version(f'cargo_{name}') for name in DASHBOARD_VIEWS)
+    if versions not in _payload_cache:
+        views = {}
+        for name, view in DASHBOARD_VIEWS.items():
+            df = run_query(f'cargo_{name}', group_by=[view['dimension']], measures=['accident_count'])
+            df = df[~df[view['dimension']].astype(str).isin(TOTAL_LABELS)]
+            labels, values = df[view['dimension']].tolist(), df['accident_count'].tolist()
+            views[name] = dict(view, labels=labels, values=values,
+                               baseline=previous_year_values(labels, values) if 'compare_label' in view else None)
+        payload = {'views': views, 'map': region_map_payload(views['regional']['labels']), 'layout': BASE_LAYOUT}
+        digest = hashlib.sha1(json.dumps(payload, sort_keys=True, ensure_ascii=False,
+                                         default=str).encode('utf-8')).hexdigest()[:12]
+        _payload_cache.clear()
+        _payload_cache[versions] = dict(payload, version=digest)
+    return _payload_cache[versions]
+
+def create_stat_card(value_id, label_id, label):
+    return dbc.Col([
+        html.Div([
+            html.H3(id=value_id, className="mb-2"),
+            html.P(label, id=label_id, className="text-muted mb-0")
+        ], className="stat-card")
+    ], width=4)
+
+# Define the layout (a function, so every page load gets the current data version)
+def serve_layout():
+    return dbc.Container([
+        # Pre-aggregated tables cached in the browser; refreshed only when the version changes
+        dcc.Store(id='dashboard-data', storage_type='local'),
+        dcc.Store(id='dashboard-data-version', data=get_dashboard_payload()['version']),
+        dcc.Store(id='dashboard-data-stale'),
+
+        # Header
+        dbc.Row([
+            dbc.Col([
+                html.Div([
+                    html.H1("화물차 사고 데이터 분석 대시보드", 
+                           className="text-center mb-4",
+                           style={'color': '#2c3e50', 'fontWeight': 'bold'}),
+                    html.P("화물차 교통사고 데이터를 다양한 관점에서 분석하고 시각화합니다.",
+                          className="text-center text-muted mb-4")
+                ], className="mb-5")
+            ])
+        ]),
+
+        # Main Content
+        dbc.Row([
+            # Control Panel
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardHeader([
+                        html.H4("분석 컨트롤", className="mb-0"),
+                        html.Small("데이터와 시각화 옵션을 선택하세요", className="text-muted")
+                    ]),
+                    dbc.CardBody([
+                        html.Div([
+                            html.H5("데이터 선택", className="mb-3"),
+                            dcc.Dropdown(
+                                id='data-selector',
+                                options=[
+                                    {'label': '연도별 분석', 'value': 'yearly'},
+                                    {'label': '지역별 분석', 'value': 'regional'},
+                                    {'label': '사고유형별 분석', 'value': 'accident_type'},
+                                    {'label': '기상상태별 분석', 'value': 'weather'}
+                                ],
+                                value='yearly',
+                                className="mb-4"
+                            ),
+
+                            html.H5("시각화 유형", className="mb-3"),
+                            dbc.ButtonGroup([
+                                dbc.Button([
+                                    html.I(className="fas fa-chart-bar mr-2"),
+                                    "막대 그래프"
+                                ], id="bar-btn", color="primary", className="mr-2"),
+                                dbc.Button([
+                                    html.I(className="fas fa-chart-line mr-2"),
+                                    "선 그래프"
+                                ], id="line-btn", color="primary", className="mr-2"),
+                                dbc.Button([
+                                    html.I(className="fas fa-chart-pie mr-2"),
+                                    "파이 차트"
+                                ], id="pie-btn", color="primary", className="mr-2"),
+                                dbc.Button([
+                                    html.I(className="fas fa-map-marker-alt mr-2"),
+                                    "지도"
+                                ], id="map-btn", color="primary")
+                            ], className="mb-4"),
+
+                            html.H5("추가 옵션", className="mb-3"),
+                            dbc.Checklist(
+                                id='visualization-options',
+                                options=[
+                                    {'label': '트렌드 라인', 'value': 'trend'},
+                                    {'label': '평균값 표시', 'value': 'mean'},
+                                    {'label': '비교 분석', 'value': 'compare'}
+                                ],
+                                value=['trend'],
+                                switch=True,
+                                className="mb-3"
+                            )
+                        ])
+                    ])
+                ], className="mb-4")
+            ], width=4),
+
+            # Main Visualization Area
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardHeader([
+                        html.H4("데이터 시각화", className="mb-0"),
+                        html.Small("선택한 데이터의 시각화 결과를 확인하세요", className="text-muted")
+                    ]),
+                    dbc.CardBody([
+                        dcc.Graph(id='main-graph', style={'height': '600px'}),
+                        dcc.Store(id='overlay-positions')
                     ])
                 ])
-            ], className="mb-4")
-        ], width=4),
-        
-        # Main Visualization Area
-        dbc.Col([
-            dbc.Card([
-                dbc.CardHeader([
-                    html.H4("데이터 시각화", className="mb-0"),
-                    html.Small("선택한 데이터의 시각화 결과를 확인하세요", className="text-muted")
-                ]),
-                dbc.CardBody([
-                    dcc.Graph(id='main-graph', style={'height': '600px'})
-                ])
-            ])
-        ], width=8)
-    ]),
-    
-    # Statistics Summary
-    dbc.Row([
-        dbc.Col([
-            dbc.Card([
-                dbc.CardHeader([
-                    html.H4("통계 요약", className="mb-0"),
-                    html.Small("주요 통계 지표를 확인하세요", className="text-muted")
-                ]),
-                dbc.CardBody([
-                    html.Div(id='stats-summary', className="row")
+            ], width=8)
+        ]),
+
+        # Statistics Summary
+        dbc.Row([
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardHeader([
+                        html.H4("통계 요약", className="mb-0"),
+                        html.Small("주요 통계 지표를 확인하세요", className="text-muted")
+                    ]),
+                    dbc.CardBody([
+                        html.Div([
+                            create_stat_card('stat-total', 'stat-total-label', "총 사고 건수"),
+                            create_stat_card('stat-mean', 'stat-mean-label', "평균 사고 건수"),
+                            create_stat_card('stat-max', 'stat-max-label', "최대 사고 건수")
+                        ], id='stats-summary', className="row")
+                    ])
                 ])
-            ])
-        ], width=12)
-    ], className="mt-4")
-], fluid=True, className="dashboard-container")
+            ], width=12)
+        ], className="mt-4")
+    ], fluid=True, className="dashboard-container")
+
+app.layout = serve_layout
+
+# Ship the tables only when the browser copy is missing or outdated
+app.clientside_callback(
+    ClientsideFunction(namespace='dashboard', function_name='check_version'),
+    Output('dashboard-data-stale', 'data'),
+    Input('dashboard-data-version', 'data'),
+    State('dashboard-data', 'data')
+)
 
-# Callback for main visualization
 @app.callback(
+    Output('dashboard-data', 'data'),
+    Input('dashboard-data-stale', 'data'),
+    prevent_initial_call=True
+)
+def refresh_dashboard_data(stale_version):
+    return get_dashboard_payload()
+
+# Chart switches and stat cards are drawn in the browser from the stored tables
+app.clientside_callback(
+    ClientsideFunction(namespace='dashboard', function_name='render'),
     [Output('main-graph', 'figure'),
-     Output('stats-summary', 'children')],
+     Output('stat-total', 'children'),
+     Output('stat-mean', 'children'),
+     Output('stat-max', 'children'),
+     Output('stat-max-label', 'children'),
+     Output('overlay-positions', 'data')],
     [Input('data-selector', 'value'),
      Input('bar-btn', 'n_clicks'),
      Input('line-btn', 'n_clicks'),
      Input('pie-btn', 'n_clicks'),
      Input('map-btn', 'n_clicks'),
-     Input('visualization-options', 'value')]
+     Input('dashboard-data', 'data')],
+    State('visualization-options', 'value')
 )
-def update_visualization(data_type, bar_clicks, line_clicks, pie_clicks, map_clicks, viz_options):
-    # Determine chart type based on button clicks
-    ctx = dash.callback_context
-    if not ctx.triggered:
-        chart_type = 'bar'
-    else:
-        button_id = ctx.triggered[0]['prop_id'].split('.')[0]
-        chart_type = button_id.replace('-btn', '')
-    
-    if data_type == 'yearly':
-        df = data['yearly']
-        if chart_type == 'bar':
-            fig = px.bar(df, x='연도', y='발생건수',
-                        title='연도별 화물차 교통사고 현황',
-                        labels={'발생건수': '사고 건수', '연도': '연도'})
-        elif chart_type == 'line':
-            fig = px.line(df, x='연도', y='발생건수',
-                         title='연도별 화물차 교통사고 추이',
-                         labels={'발생건수': '사고 건수', '연도': '연도'})
-            
-        stats = [
-            dbc.Col([
-                html.Div([
-                    html.H3(f"{df['발생건수'].sum():,}건", className="mb-2"),
-                    html.P("총 사고 건수", className="text-muted mb-0")
-                ], className="stat-card")
-            ], width=4),
-            dbc.Col([
-                html.Div([
-                    html.H3(f"{df['발생건수'].mean():.1f}건", className="mb-2"),
-                    html.P("평균 사고 건수", className="text-muted mb-0")
-                ], className="stat-card")
-            ], width=4),
-            dbc.Col([
-                html.Div([
-                    html.H3(f"{df['발생건수'].max():,}건", className="mb-2"),
-                    html.P(f"최대 사고 건수 ({df.loc[df['발생건수'].idxmax(), '연도']}년)", className="text-muted mb-0")
-                ], className="stat-card")
-            ], width=4)
-        ]
-        
-    elif data_type == 'regional':
-        df = data['regional']
-        if chart_type == 'bar':
-            fig = px.bar(df, x='지자체', y='발생건수',
-                        title='지자체별 화물차 교통사고 현황',
-                        labels={'발생건수': '사고 건수', '지자체': '지역'})
-        elif chart_type == 'map':
-            fig = go.Figure(data=go.Scattergeo(
-                lon=[127.5, 126.5, 129.0, 128.5, 127.0, 126.5, 127.5, 128.5, 127.0, 126.5, 127.5, 128.5, 127.0, 126.5, 127.5, 128.5, 127.0],
-                lat=[37.5, 37.5, 35.5, 35.5, 35.5, 35.5, 35.5, 35.5, 35.5, 35.5, 35.5, 35.5, 35.5, 35.5, 35.5, 35.5, 35.5],
-                text=df['지자체'],
-                mode='markers',
-                marker=dict(
-                    size=df['발생건수']/100,
-                    color=df['발생건수'],
-                    colorscale='Viridis',
-                    showscale=True,
-                    colorbar_title='사고 건수'
-                )
-            ))
-            
-            fig.update_geos(
-                center=dict(lat=36.5, lon=127.5),
-                projection_scale=7,
-                visible=True,
-                scope='asia'
-            )
-            
-            fig.update_layout(
-                title='지역별 화물차 교통사고 현황',
-                geo=dict(
-                    showland=True,
-                    landcolor='rgb(243, 243, 243)',
-                    countrycolor='rgb(204, 204, 204)',
-                )
-            )
-            
-        stats = [
-            dbc.Col([
-                html.Div([
-                    html.H3(f"{df['발생건수'].sum():,}건", className="mb-2"),
-                    html.P("총 사고 건수", className="text-muted mb-0")
-                ], className="stat-card")
-            ], width=4),
-            dbc.Col([
-                html.Div([
-                    html.H3(f"{df['발생건수'].mean():.1f}건", className="mb-2"),
-                    html.P("평균 사고 건수", className="text-muted mb-0")
-                ], className="stat-card")
-            ], width=4),
-            dbc.Col([
-                html.Div([
-                    html.H3(f"{df['발생건수'].max():,}건", className="mb-2"),
-                    html.P(f"최다 사고 지역 ({df.loc[df['발생건수'].idxmax(), '지자체']})", className="text-muted mb-0")
-                ], className="stat-card")
-            ], width=4)
-        ]
-        
-    elif data_type == 'accident_type':
-        df = data['accident_type']
-        if chart_type == 'bar':
-            fig = px.bar(df, x='사고유형', y='발생건수',
-                        title='사고유형별 화물차 교통사고 현황',
-                        labels={'발생건수': '사고 건수', '사고유형': '사고 유형'})
-        elif chart_type == 'pie':
-            fig = px.pie(df, values='발생건수', names='사고유형',
-                        title='사고유형별 화물차 교통사고 비율')
-            
-        stats = [
-            dbc.Col([
-                html.Div([
-                    html.H3(f"{df['발생건수'].sum():,}건", className="mb-2"),
-                    html.P("총 사고 건수", className="text-muted mb-0")
-                ], className="stat-card")
-            ], width=4),
-            dbc.Col([
-                html.Div([
-                    html.H3(f"{df['발생건수'].mean():.1f}건", className="mb-2"),
-                    html.P("평균 사고 건수", className="text-muted mb-0")
-                ], className="stat-card")
-            ], width=4),
-            dbc.Col([
-                html.Div([
-                    html.H3(f"{df['발생건수'].max():,}건", className="mb-2"),
-                    html.P(f"최다 발생 유형 ({df.loc[df['발생건수'].idxmax(), '사고유형']})", className="text-muted mb-0")
-                ], className="stat-card")
-            ], width=4)
-        ]
-        
-    else:  # weather
-        df = data['weather']
-        if chart_type == 'bar':
-            fig = px.bar(df, x='기상상태', y='발생건수',
-                        title='기상상태별 화물차 교통사고 현황',
-                        labels={'발생건수': '사고 건수', '기상상태': '기상 상태'})
-        elif chart_type == 'pie':
-            fig = px.pie(df, values='발생건수', names='기상상태',
-                        title='기상상태별 화물차 교통사고 비율')
-            
-        stats = [
-            dbc.Col([
-                html.Div([
-                    html.H3(f"{df['발생건수'].sum():,}건", className="mb-2"),
-                    html.P("총 사고 건수", className="text-muted mb-0")
-                ], className="stat-card")
-            ], width=4),
-            dbc.Col([
-                html.Div([
-                    html.H3(f"{df['발생건수'].mean():.1f}건", className="mb-2"),
-                    html.P("평균 사고 건수", className="text-muted mb-0")
-                ], className="stat-card")
-            ], width=4),
-            dbc.Col([
-                html.Div([
-                    html.H3(f"{df['발생건수'].max():,}건", className="mb-2"),
-                    html.P(f"최다 발생 기상 ({df.loc[df['발생건수'].idxmax(), '기상상태']})", className="text-muted mb-0")
-                ], className="stat-card")
-            ], width=4)
-        ]
-    
-    # Add trend line if selected
-    if 'trend' in viz_options and chart_type in ['bar', 'line']:
-        fig.add_trace(go.Scatter(
-            x=df.iloc[:, 0],
-            y=np.poly1d(np.polyfit(range(len(df)), df['발생건수'], 1))(range(len(df))),
-            mode='lines',
-            name='추세선',
-            line=dict(dash='dash', color='red')
-        ))
-    
-    # Add mean line if selected
-    if 'mean' in viz_options and chart_type in ['bar', 'line']:
-        fig.add_hline(y=df['발생건수'].mean(),
-                     line_dash="dash",
-                     line_color="green",
-                     annotation_text="평균",
-                     annotation_position="right")
-    
-    # Update layout for better visualization
-    fig.update_layout(
-        template='plotly_white',
-        showlegend=True,
-        legend=dict(
-            orientation="h",
-            yanchor="bottom",
-            y=1.02,
-            xanchor="right",
-            x=1
-        ),
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        font=dict(
-            family="Arial, sans-serif",
-            size=12,
-            color="#2c3e50"
-        ),
-        margin=dict(t=50, l=50, r=50, b=50)
-    )
-    
-    return fig, stats
+
+# Overlay toggles patch the client-side figure instead of rebuilding it
+@app.callback(
+    Output('main-graph', 'figure', allow_duplicate=True),
+    Input('visualization-options', 'value'),
+    State('overlay-positions', 'data'),
+    prevent_initial_call=True
+)
+def toggle_overlays(viz_options, positions):
+    if not positions:
+        return dash.no_update
+    return patch_overlays(positions, viz_options)
 
 if __name__ == '__main__':
     app.run_server(debug=True) 
\ No newline at end of file
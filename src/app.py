@@ -4,8 +4,13 @@ import dash_bootstrap_components as dbc
 from components.layouts.main_layout import create_main_layout
 from components.layouts.analysis_layout import create_analysis_layout
 from components.layouts.report_layout import create_report_layout
-from callbacks import pipeline_callbacks, visualization_callbacks, metrics_callbacks
-from callbacks import analysis_callbacks, report_callbacks
+from components.layouts.diagnostics_layout import create_diagnostics_layout
+from callbacks import pipeline_callbacks, metrics_callbacks
+from callbacks import analysis_callbacks, report_callbacks, diagnostics_callbacks
+from utils.reload import source_watcher, watch_datasets
+from utils.transport import enable_compression
+from utils.export import register_export_routes
+from utils.memory import register_memory_diagnostics
 
 # Initialize the Dash app with Bootstrap theme
 app = dash.Dash(
@@ -17,6 +22,15 @@ app = dash.Dash(
     suppress_callback_exceptions=True
 )
 
+# Gzip layout and callback responses for clients that accept it
+enable_compression(app.server)
+
+# Streamed CSV/Parquet downloads of the filtered datasets
+register_export_routes(app.server)
+
+# Cache sizes and callback allocation traces at /diagnostics/memory (local requests only)
+register_memory_diagnostics(app.server)
+
 # Set custom CSS
 app.index_string = '''
 <!DOCTYPE html>
@@ -57,6 +71,13 @@ app.index_string = '''
 </html>
 '''
 
+# Register callbacks defined per app
+pipeline_callbacks.register_pipeline_callbacks(app)
+metrics_callbacks.register_metrics_callbacks(app)
+
+# Rebuild a dataset in the background when its source files change
+watch_datasets(source_watcher).start()
+
 # Create the layout with routing
 app.layout = html.Div([
     dcc.Location(id='url', refresh=False),
@@ -75,6 +96,8 @@ def display_page(pathname):
         return create_analysis_layout()
     elif pathname == '/report':
         return create_report_layout()
+    elif pathname == '/diagnostics':
+        return create_diagnostics_layout()
     else:
         return create_main_layout()  # Default to main layout
 
@@ -0,0 +1,29 @@
+// Clientside callbacks for the analysis page.
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    analysis: {
+        // 날짜 범위 드래그나 선택 변경이 멈춘 뒤 마지막 상태만 서버로 보낸다
+        debounce_query: function(dataType, startDate, endDate, analysisTypes, delay) {
+            const state = window.cargoAnalysisQuery || (window.cargoAnalysisQuery = {
+                session: Math.random().toString(36).slice(2) + Date.now().toString(36),
+                seq: 0
+            });
+            const seq = ++state.seq;
+            return new Promise(function(resolve) {
+                setTimeout(function() {
+                    if (seq !== state.seq) {
+                        resolve(window.dash_clientside.no_update);
+                        return;
+                    }
+                    resolve({
+                        session: state.session,
+                        seq: seq,
+                        data_type: dataType,
+                        start_date: startDate,
+                        end_date: endDate,
+                        analysis_types: analysisTypes || []
+                    });
+                }, delay);
+            });
+        }
+    }
+});
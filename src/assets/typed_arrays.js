@@ -0,0 +1,89 @@
+// Decode base64 typed arrays ({dtype, bdata, shape}) in figures sent by utils.transport
+// before plotly.js draws them; the bundled plotly.js predates native support.
+(function() {
+    const TYPES = {
+        f8: Float64Array, f4: Float32Array,
+        i4: Int32Array, u4: Uint32Array,
+        i2: Int16Array, u2: Uint16Array,
+        i1: Int8Array, u1: Uint8Array
+    };
+
+    function isEncoded(value) {
+        return value && typeof value === 'object' && typeof value.bdata === 'string' && TYPES[value.dtype];
+    }
+
+    function decodeArray(value) {
+        const binary = atob(value.bdata);
+        const bytes = new Uint8Array(binary.length);
+        for (let i = 0; i < binary.length; i++) {
+            bytes[i] = binary.charCodeAt(i);
+        }
+        const array = new TYPES[value.dtype](bytes.buffer);
+        if (!value.shape) {
+            return array;
+        }
+        // 2차원 배열(히트맵 z 등)은 행 단위 배열로 나눈다
+        const columns = Number(String(value.shape).split(',')[1]);
+        const rows = [];
+        for (let start = 0; start < array.length; start += columns) {
+            rows.push(array.subarray(start, start + columns));
+        }
+        return rows;
+    }
+
+    // 원본 그림은 그대로 두고, 인코딩된 배열이 있는 객체만 복사한다
+    function decode(node) {
+        if (isEncoded(node)) {
+            return decodeArray(node);
+        }
+        if (Array.isArray(node)) {
+            let copy = null;
+            node.forEach(function(item, i) {
+                const decoded = decode(item);
+                if (decoded !== item) {
+                    copy = copy || node.slice();
+                    copy[i] = decoded;
+                }
+            });
+            return copy || node;
+        }
+        if (node && typeof node === 'object' && Object.getPrototypeOf(node) === Object.prototype) {
+            let copy = null;
+            Object.keys(node).forEach(function(key) {
+                const decoded = decode(node[key]);
+                if (decoded !== node[key]) {
+                    copy = copy || Object.assign({}, node);
+                    copy[key] = decoded;
+                }
+            });
+            return copy || node;
+        }
+        return node;
+    }
+
+    function wrap(plotly) {
+        if (!plotly || plotly.cargoTypedArrays) {
+            return plotly;
+        }
+        ['newPlot', 'react'].forEach(function(method) {
+            const original = plotly[method];
+            plotly[method] = function(gd, data, layout, config) {
+                if (data && !Array.isArray(data) && data.data) {
+                    // dcc.Graph는 그림 객체 하나를 넘긴다
+                    return original.call(this, gd, Object.assign({}, data, {data: decode(data.data)}), layout, config);
+                }
+                return original.call(this, gd, decode(data), layout, config);
+            };
+        });
+        plotly.cargoTypedArrays = true;
+        return plotly;
+    }
+
+    // plotly.js는 첫 그래프가 그려질 때 비동기로 로드되므로 window.Plotly 할당을 가로챈다
+    let current = wrap(window.Plotly);
+    Object.defineProperty(window, 'Plotly', {
+        configurable: true,
+        get: function() { return current; },
+        set: function(plotly) { current = wrap(plotly); }
+    });
+})();
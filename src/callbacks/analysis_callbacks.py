@@ -1,35 +1,75 @@
-from dash import Input, Output, State, callback
+from dash import Input, Output, State, callback, clientside_callback, ClientsideFunction
+from dash.exceptions import PreventUpdate
 import plotly.express as px
 import plotly.graph_objects as go
+import numpy as np
 import pandas as pd
-from utils.data_loader import load_data
-from utils.data_processor import process_cargo_data, process_vehicle_data, process_fatal_data
-from utils.cache import get_cached_data
+from utils.query import (run_query, select_rows, query_dimension, query_dimension_comparison, query_correlation,
+                         latest_period, PRIMARY_MEASURES, TYPE_DIMENSIONS)
+from utils.hotspots import ALL_TYPES
+from utils.schema import TOTAL_DIMENSION
+from utils.records import query_records
+from utils.export import export_url
+from utils.supersede import request_tracker
+from utils.transport import compact_figure
+from utils.result_cache import result_cache, normalize_date
+from components.graphs.overlays import add_comparison
+
+WEEKDAY_LABELS = ['월', '화', '수', '목', '금', '토', '일']
+
+# 기간 비교 옵션별 기준 기간과 범례 이름; 기간을 고르지 않으면 최근 COMPARE_MONTHS개월을 비교
+COMPARE_OPTIONS = {'compare_year': ('year', '전년 동기'), 'compare': ('previous', '직전 기간')}
+COMPARE_MONTHS = 12
+
+# update_analysis_graphs의 결과를 바꾸는 분석 유형 (나머지는 다른 콜백이 그린다)
+GRAPH_ANALYSIS_TYPES = {'time', 'region', 'type', 'correlation'} | set(COMPARE_OPTIONS)
+
+# 입력 변화는 브라우저에서 디바운스해 마지막 상태만 'analysis-query'로 보낸다
+clientside_callback(
+    ClientsideFunction(namespace='analysis', function_name='debounce_query'),
+    Output('analysis-query', 'data'),
+    [Input('analysis-data-selector', 'value'),
+     Input('date-range', 'start_date'),
+     Input('date-range', 'end_date'),
+     Input('analysis-types', 'value')],
+    State('analysis-debounce-ms', 'data')
+)
+
+def parse_query(query):
+    """Unpack a debounced analysis query into (data_type, filters, analysis_types)."""
+    start_date, end_date = query.get('start_date'), query.get('end_date')
+    filters = {'date': (start_date, end_date)} if start_date and end_date else {}
+    return query['data_type'], filters, query.get('analysis_types') or []
+
+def comparison_setting(data_type, filters, analysis_types):
+    """Pick (period, baseline, label) for the selected comparison option, or None."""
+    for option, (baseline, label) in COMPARE_OPTIONS.items():
+        if option in analysis_types:
+            break
+    else:
+        return None
+    period = filters.get('date') or latest_period(data_type, COMPARE_MONTHS)
+    return (period, baseline, label) if period else None
 
 @callback(
     [Output('time-series-analysis', 'figure'),
      Output('regional-analysis', 'figure'),
      Output('accident-type-analysis', 'figure'),
      Output('correlation-analysis', 'figure')],
-    [Input('analysis-data-selector', 'value'),
-     Input('date-range', 'start_date'),
-     Input('date-range', 'end_date'),
-     Input('analysis-types', 'value')]
+    Input('analysis-query', 'data')
 )
-def update_analysis_graphs(data_type, start_date, end_date, analysis_types):
-    # Load and process data
-    df = get_cached_data(data_type)
-    if data_type == 'cargo':
-        df = process_cargo_data(df)
-    elif data_type == 'vehicle':
-        df = process_vehicle_data(df)
-    else:
-        df = process_fatal_data(df)
-    
-    # Filter by date range
-    if start_date and end_date:
-        df = df[(df['date'] >= start_date) & (df['date'] <= end_date)]
-    
+def update_analysis_graphs(query):
+    # 같은 세션에서 더 새로운 요청이 들어오면 다음 단계에서 계산을 멈춘다
+    request = request_tracker.begin_query(query, 'analysis-graphs')
+    data_type, filters, analysis_types = parse_query(query)
+    # 같은 입력의 결과는 모든 워커가 디스크 캐시에서 함께 쓴다
+    inputs = {'data_type': data_type,
+              'period': [normalize_date(value) for value in filters.get('date', ())],
+              'analysis_types': sorted(GRAPH_ANALYSIS_TYPES.intersection(analysis_types))}
+    return result_cache.cached('analysis-graphs', inputs, [data_type],
+                               lambda: create_analysis_graphs(request, data_type, filters, analysis_types))
+
+def create_analysis_graphs(request, data_type, filters, analysis_types):
     # Initialize empty figures
     time_series_fig = go.Figure()
     regional_fig = go.Figure()
@@ -37,30 +77,50 @@ def update_analysis_graphs(data_type, start_date, end_date, analysis_types):
     correlation_fig = go.Figure()
     
     # Update figures based on selected analysis types
+    comparison = comparison_setting(data_type, filters, analysis_types)
     if 'time' in analysis_types:
-        time_series_fig = create_time_series_analysis(df, data_type)
+        request.checkpoint('time')
+        time_series_fig = create_time_series_analysis(data_type, filters, comparison)
     
     if 'region' in analysis_types:
-        regional_fig = create_regional_analysis(df, data_type)
+        request.checkpoint('region')
+        regional_fig = create_regional_analysis(data_type, filters, comparison)
     
     if 'type' in analysis_types:
-        accident_type_fig = create_accident_type_analysis(df, data_type)
+        request.checkpoint('type')
+        accident_type_fig = create_accident_type_analysis(data_type, filters)
     
     if 'correlation' in analysis_types:
-        correlation_fig = create_correlation_analysis(df, data_type)
+        request.checkpoint('correlation')
+        correlation_fig = create_correlation_analysis(data_type, filters)
     
-    return time_series_fig, regional_fig, accident_type_fig, correlation_fig
+    request.checkpoint('done')
+    # 숫자 배열은 base64 typed array로 보낸다 (assets/typed_arrays.js가 풀어 그린다)
+    return (compact_figure(time_series_fig), compact_figure(regional_fig),
+            compact_figure(accident_type_fig), compact_figure(correlation_fig))
 
-def create_time_series_analysis(df, data_type):
+def create_time_series_analysis(data_type, filters, comparison=None):
+    measure = PRIMARY_MEASURES[data_type]
+    if comparison:
+        # 선택 기간과 기준 기간을 한 번의 집계로 구한다
+        period, baseline, label = comparison
+        df, baseline_df = query_dimension_comparison(data_type, TOTAL_DIMENSION, measure, period, baseline,
+                                                     by_date=True)
+    else:
+        df = query_dimension(data_type, TOTAL_DIMENSION, measure, filters, by_date=True)
     if data_type == 'cargo':
-        fig = px.line(df, x='date', y='accident_count',
+        fig = px.line(df, x='date', y=measure,
                      title='화물차 사고 건수 추이')
     elif data_type == 'vehicle':
-        fig = px.line(df, x='date', y=['car_accidents', 'truck_accidents'],
+        fig = px.line(df, x='date', y=measure,
                      title='차종별 사고 건수 추이')
     else:
-        fig = px.line(df, x='date', y='fatal_accidents',
+        fig = px.line(df, x='date', y=measure,
                      title='사망사고 건수 추이')
+    if comparison:
+        fig.data[0].name = '선택 기간'
+        fig.data[0].showlegend = True
+        add_comparison(fig, baseline_df['date'], baseline_df[measure], ['compare'], name=label)
     
     fig.update_layout(
         template='plotly_white',
@@ -70,19 +130,29 @@ def create_time_series_analysis(df, data_type):
     )
     return fig
 
-def create_regional_analysis(df, data_type):
+def create_regional_analysis(data_type, filters, comparison=None):
+    measure = PRIMARY_MEASURES[data_type]
+    if comparison:
+        period, baseline, label = comparison
+        df, baseline_df = query_dimension_comparison(data_type, 'region', measure, period, baseline)
+    else:
+        df = query_dimension(data_type, 'region', measure, filters)
     if data_type == 'cargo':
-        fig = px.bar(df.groupby('region')['accident_count'].sum().reset_index(),
-                    x='region', y='accident_count',
+        fig = px.bar(df, x='region', y=measure,
                     title='지역별 화물차 사고 건수')
     elif data_type == 'vehicle':
-        fig = px.bar(df.groupby('region')[['car_accidents', 'truck_accidents']].sum().reset_index(),
-                    x='region', y=['car_accidents', 'truck_accidents'],
+        fig = px.bar(df, x='region', y=measure,
                     title='지역별 차종 사고 건수')
     else:
-        fig = px.bar(df.groupby('region')['fatal_accidents'].sum().reset_index(),
-                    x='region', y='fatal_accidents',
+        fig = px.bar(df, x='region', y=measure,
                     title='지역별 사망사고 건수')
+    if comparison:
+        # 기준 기간 막대를 선택 기간의 지역 순서에 맞춰 나란히 그린다
+        baseline_values = baseline_df.set_index('region')[measure].reindex(df['region']).fillna(0)
+        fig.data[0].name = '선택 기간'
+        fig.data[0].showlegend = True
+        add_comparison(fig, df['region'], baseline_values, ['compare'], name=label, kind='bar')
+        fig.update_layout(barmode='group')
     
     fig.update_layout(
         template='plotly_white',
@@ -92,15 +162,18 @@ def create_regional_analysis(df, data_type):
     )
     return fig
 
-def create_accident_type_analysis(df, data_type):
+def create_accident_type_analysis(data_type, filters):
+    measure = PRIMARY_MEASURES[data_type]
+    dimension = TYPE_DIMENSIONS[data_type]
+    df = query_dimension(data_type, dimension, measure, filters)
     if data_type == 'cargo':
-        fig = px.pie(df, values='accident_count', names='accident_type',
+        fig = px.pie(df, values=measure, names=dimension,
                     title='화물차 사고 유형 분포')
     elif data_type == 'vehicle':
-        fig = px.pie(df, values='total_accidents', names='accident_type',
+        fig = px.pie(df, values=measure, names=dimension,
                     title='차종별 사고 유형 분포')
     else:
-        fig = px.pie(df, values='fatal_accidents', names='accident_type',
+        fig = px.pie(df, values=measure, names=dimension,
                     title='사망사고 유형 분포')
     
     fig.update_layout(
@@ -109,13 +182,9 @@ def create_accident_type_analysis(df, data_type):
     )
     return fig
 
-def create_correlation_analysis(df, data_type):
-    if data_type == 'cargo':
-        corr_matrix = df[['accident_count', 'weather', 'road_condition']].corr()
-    elif data_type == 'vehicle':
-        corr_matrix = df[['car_accidents', 'truck_accidents', 'weather']].corr()
-    else:
-        corr_matrix = df[['fatal_accidents', 'rest_area_count', 'weather']].corr()
+def create_correlation_analysis(data_type, filters):
+    # 수집 시 저장한 월별 충분통계량을 합쳐 측정값 간 상관관계를 계산
+    corr_matrix = query_correlation(data_type, filters)
     
     fig = px.imshow(corr_matrix,
                     title='상관관계 분석',
@@ -126,4 +195,203 @@ def create_correlation_analysis(df, data_type):
         xaxis_title='변수',
         yaxis_title='변수'
     )
-    return fig 
\ No newline at end of file
+    return fig 
+
+@callback(
+    [Output('export-csv', 'href'),
+     Output('export-parquet', 'href')],
+    Input('analysis-query', 'data')
+)
+def update_export_links(query):
+    # 다운로드는 콜백이 아닌 /export 경로가 스트리밍으로 보낸다
+    if not query:
+        raise PreventUpdate
+    data_type, filters, _ = parse_query(query)
+    return export_url(data_type, 'csv', filters), export_url(data_type, 'parquet', filters)
+
+
+@callback(
+    Output('temporal-heatmap', 'figure'),
+    Input('analysis-query', 'data')
+)
+def update_temporal_heatmap(query):
+    request = request_tracker.begin_query(query, 'temporal-heatmap')
+    data_type, filters, analysis_types = parse_query(query)
+    if 'heatmap' not in analysis_types:
+        return go.Figure()
+    fig = create_temporal_heatmap(data_type, filters)
+    request.checkpoint('done')
+    return compact_figure(fig)
+
+def create_temporal_heatmap(data_type, filters):
+    fig = go.Figure()
+    if data_type != 'fatal':
+        # 시각 정보는 사망사고 데이터에만 있다
+        fig.add_annotation(text="발생 시각 정보가 없는 데이터입니다", xref="paper", yref="paper",
+                           x=0.5, y=0.5, showarrow=False)
+        fig.update_layout(template='plotly_white')
+        return fig
+
+    # 7x24 집계 결과만 받아 격자로 채운다
+    df = run_query('fatal_temporal', filters, group_by=['weekday', 'hour'], measures=['fatal_count'])
+    df = df.dropna(subset=['weekday', 'hour'])
+    grid = np.zeros((7, 24))
+    grid[df['weekday'].astype(int), df['hour'].astype(int)] = df['fatal_count']
+    fig.add_trace(go.Heatmap(
+        z=grid,
+        x=[f'{hour:02d}시' for hour in range(24)],
+        y=WEEKDAY_LABELS,
+        colorscale='Reds',
+        colorbar=dict(title='사망자 수')
+    ))
+    fig.update_layout(
+        title='시간대×요일별 사망자 수',
+        template='plotly_white',
+        xaxis_title='시간대',
+        yaxis_title='요일'
+    )
+    return fig
+
+
+@callback(
+    Output('hotspot-map', 'figure'),
+    Input('analysis-query', 'data')
+)
+def update_hotspot_map(query):
+    request = request_tracker.begin_query(query, 'hotspot-map')
+    data_type, date_filters, analysis_types = parse_query(query)
+    if 'hotspot' not in analysis_types:
+        return go.Figure()
+    filters = {'accident_type': ALL_TYPES}
+    if date_filters:
+        start_date, end_date = date_filters['date']
+        filters['year'] = list(range(pd.Timestamp(start_date).year, pd.Timestamp(end_date).year + 1))
+    fig = create_hotspot_map(data_type, filters)
+    request.checkpoint('done')
+    return compact_figure(fig)
+
+def create_hotspot_map(data_type, filters):
+    fig = go.Figure()
+    if data_type != 'fatal':
+        # 위치 정보는 사망사고 데이터에만 있다
+        fig.add_annotation(text="위치 정보가 없는 데이터입니다", xref="paper", yref="paper",
+                           x=0.5, y=0.5, showarrow=False)
+        fig.update_layout(template='plotly_white')
+        return fig
+
+    # 미리 계산된 군집 경계와 건수만 읽어 그린다
+    df = select_rows('hotspots', filters)
+    hull_lon, hull_lat = [], []
+    for lons, lats in zip(df['hull_lon'], df['hull_lat']):
+        hull_lon += list(lons) + [None]
+        hull_lat += list(lats) + [None]
+    fig.add_trace(go.Scattermapbox(
+        lon=hull_lon, lat=hull_lat,
+        mode='lines',
+        fill='toself',
+        line=dict(color='#d62728', width=1),
+        hoverinfo='skip',
+        name='다발 구역'
+    ))
+    fig.add_trace(go.Scattermapbox(
+        lon=df['lon'], lat=df['lat'],
+        mode='markers',
+        marker=dict(size=np.sqrt(df['accidents']) * 4, color=df['fatalities'],
+                    colorscale='Reds', showscale=True, colorbar=dict(title='사망자 수')),
+        text=[f"{year}년 · 사고 {accidents}건 · 사망 {fatalities:.0f}명"
+              for year, accidents, fatalities in zip(df['year'], df['accidents'], df['fatalities'])],
+        hoverinfo='text',
+        name='다발 지점'
+    ))
+    fig.update_layout(
+        title='사망사고 다발 지점',
+        mapbox=dict(style='open-street-map', center=dict(lat=36.4, lon=127.8), zoom=5.5),
+        margin=dict(l=0, r=0, t=40, b=0),
+        showlegend=False,
+        height=600
+    )
+    return fig
+
+
+@callback(
+    Output('route-corridor', 'figure'),
+    Input('analysis-query', 'data')
+)
+def update_route_corridor(query):
+    request = request_tracker.begin_query(query, 'route-corridor')
+    data_type, _, analysis_types = parse_query(query)
+    if 'corridor' not in analysis_types:
+        return go.Figure()
+    fig = create_route_corridor(data_type)
+    request.checkpoint('done')
+    return compact_figure(fig)
+
+def create_route_corridor(data_type):
+    fig = go.Figure()
+    if data_type != 'fatal':
+        fig.add_annotation(text="위치 정보가 없는 데이터입니다", xref="paper", yref="paper",
+                           x=0.5, y=0.5, showarrow=False)
+        fig.update_layout(template='plotly_white')
+        return fig
+
+    # 미리 계산된 구간 집계: 노선별 거리표(km)에 따른 사망자 수와 휴게소 위치
+    segments = select_rows('route_segments')
+    gaps = select_rows('rest_area_gaps')
+    for route, part in segments.groupby('route', sort=False):
+        fig.add_trace(go.Scatter(
+            x=part['start_km'] + (part['end_km'] - part['start_km']) / 2,
+            y=part['fatalities'],
+            mode='lines+markers',
+            name=route,
+            legendgroup=route,
+            hovertemplate='%{x:.0f} km · 사망 %{y:.0f}명<extra>' + route + '</extra>'
+        ))
+        stops = gaps[(gaps['route'] == route) & (gaps['start_km'] > 0)]
+        fig.add_trace(go.Scatter(
+            x=stops['start_km'],
+            y=[0] * len(stops),
+            mode='markers',
+            marker=dict(symbol='triangle-up', size=10),
+            text=stops['from_rest_area'],
+            name=f'{route} 휴게소',
+            legendgroup=route,
+            showlegend=False,
+            hovertemplate='%{text} · %{x:.0f} km<extra>' + route + '</extra>'
+        ))
+
+    longest = gaps.sort_values('gap_km', ascending=False).iloc[0] if len(gaps) else None
+    fig.update_layout(
+        title='노선 구간별 사망자 수' + (
+            f" (최장 무휴게소 구간: {longest['route']} {longest['from_rest_area']}→{longest['to_rest_area']}, "
+            f"{longest['gap_km']:.0f} km · 사망 {longest['fatalities']:.0f}명)" if longest is not None else ''),
+        template='plotly_white',
+        xaxis_title='기점으로부터 거리 (km)',
+        yaxis_title='사망자 수',
+        height=500
+    )
+    return fig
+
+
+@callback(
+    [Output('fatal-records', 'data'),
+     Output('fatal-records', 'page_count'),
+     Output('fatal-records-count', 'children')],
+    [Input('analysis-query', 'data'),
+     Input('fatal-records', 'page_current'),
+     Input('fatal-records', 'page_size'),
+     Input('fatal-records', 'sort_by'),
+     Input('fatal-records', 'filter_query')]
+)
+def update_fatal_records(query, page_current, page_size, sort_by, filter_query):
+    # 한 페이지 분량의 행만 보낸다 (정렬·필터 결과는 서버에 캐시)
+    request = request_tracker.begin_query(query, 'fatal-records')
+    _, filters, analysis_types = parse_query(query)
+    if 'records' not in analysis_types:
+        return [], 0, ''
+    try:
+        records, page_count, matches = query_records(page_current, page_size, sort_by, filter_query,
+                                                     filters.get('date'))
+    except ValueError as e:
+        return [], 0, f'필터를 해석할 수 없습니다: {e}'
+    request.checkpoint('done')
+    return records, page_count, f'{matches:,}건'
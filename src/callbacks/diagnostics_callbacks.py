@@ -0,0 +1,43 @@
+from dash import Input, Output, callback, html
+from utils.memory import memory_report, recent_traces, start_tracing, stop_tracing, is_local_request
+
+MB = 2 ** 20
+
+@callback(
+    [Output('memory-summary', 'children'),
+     Output('memory-layers', 'data'),
+     Output('memory-entries', 'data'),
+     Output('memory-traces', 'data')],
+    [Input('memory-refresh', 'n_clicks'),
+     Input('memory-tracing', 'value')]
+)
+def update_memory_diagnostics(n_clicks, tracing):
+    if not is_local_request():
+        return html.P("메모리 진단은 서버와 같은 호스트에서만 볼 수 있습니다.", className="text-muted"), [], [], []
+    if tracing:
+        start_tracing()
+    else:
+        stop_tracing()
+
+    report = memory_report()
+    cached = sum(layer['bytes'] for layer in report['layers'])
+    # 여러 워커로 띄운 경우 이 콜백을 처리한 워커 하나의 값이다
+    summary = html.Div([
+        html.Span(f"PID {report['pid']} · ", className="text-muted"),
+        html.Span(f"RSS {_mb(report['rss_bytes'])} MB (최대 {_mb(report['peak_rss_bytes'])} MB) · "),
+        html.Span(f"캐시 합계 {_mb(cached)} MB"),
+        html.Span(f" · 추적 중 {_mb(report['traced_bytes'])} MB" if report['tracing'] else "")
+    ])
+    layers = [{'layer': layer['layer'], 'entries': len(layer['entries']), 'mb': _mb(layer['bytes'])}
+              for layer in report['layers']]
+    entries = sorted(({'layer': layer['layer'], 'entry': row['entry'], 'type': row['type'], 'mb': _mb(row['bytes'])}
+                      for layer in report['layers'] for row in layer['entries']), key=lambda row: -row['mb'])
+    traces = [{'time': trace['time'], 'callback': trace['callback'],
+               'allocated_kb': round(trace['allocated_bytes'] / 1024, 1),
+               'retained_kb': round(trace['retained_bytes'] / 1024, 1),
+               'site': trace['top'][0]['site'] if trace['top'] else None}
+              for trace in recent_traces()]
+    return summary, layers, entries, traces
+
+def _mb(value):
+    return None if value is None else round(value / MB, 2)
@@ -1,6 +1,7 @@
-from dash import Input, Output
+import math
+from dash import Input, Output, html
 import dash_bootstrap_components as dbc
-from utils.data_loader import load_data
+from utils.query import query_derived, PRIMARY_MEASURES
 
 def register_metrics_callbacks(app):
     @app.callback(
@@ -8,52 +9,67 @@ def register_metrics_callbacks(app):
         Input('data-selector', 'value')
     )
     def update_metrics(data_type):
-        # Load data
-        df = load_data(data_type)
-        
         # Calculate metrics based on data type
         if data_type == 'cargo':
-            metrics = calculate_cargo_metrics(df)
+            metrics = calculate_cargo_metrics()
         elif data_type == 'vehicle':
-            metrics = calculate_vehicle_metrics(df)
+            metrics = calculate_vehicle_metrics()
         else:  # fatal
-            metrics = calculate_fatal_metrics(df)
+            metrics = calculate_fatal_metrics()
         
         # Create metric cards
         return dbc.Row([
-            dbc.Col(create_metric_card(title, value, change), width=3)
-            for title, value, change in metrics
+            dbc.Col(create_metric_card(title, value, change, basis), width=3)
+            for title, value, change, basis in metrics
         ])
 
-def create_metric_card(title, value, change):
+def create_metric_card(title, value, change, basis=None):
+    # 비교할 기간이 없으면(첫 해 등) 변화율 대신 안내만 보인다
+    if change is None or math.isnan(change):
+        indicator = html.Small(f"{basis} 자료 없음" if basis else "", className="text-muted")
+    else:
+        # 사고는 늘어나면 나쁜 신호다
+        indicator = html.Small(
+            f"{basis} {change:+.1f}%" if basis else f"{change:+.1f}%",
+            className=f"text-{'danger' if change > 0 else 'success'}"
+        )
     return dbc.Card([
         dbc.CardBody([
             html.H6(title, className="card-subtitle mb-2 text-muted"),
             html.H3(value, className="card-title mb-0"),
-            html.Small(
-                f"{change:+.1f}%",
-                className=f"text-{'success' if change > 0 else 'danger'}"
-            )
+            indicator
         ])
     ], className="mb-3")
 
-def calculate_cargo_metrics(df):
-    total_accidents = df['accidents'].sum()
-    avg_accidents = df['accidents'].mean()
-    max_accidents = df['accidents'].max()
-    min_accidents = df['accidents'].min()
-    
+def calculate_series_metrics(dataset, unit="사고 건수"):
+    """Key-metric cards of a dataset's total series, with changes read from the derived measures."""
+    series = query_derived(dataset, PRIMARY_MEASURES[dataset])
+    if series.empty:
+        return [(f"총 {unit}", "-", None, None)]
+    latest = series.iloc[-1]
+    total = (f"총 {unit}", f"{int(series['value'].sum()):,}", None, None)
+    if latest['grain'] == 'YS':
+        # 연 단위 자료는 전년 대비 변화만 의미가 있다
+        peak = series.loc[series['value'].idxmax()]
+        return [
+            total,
+            (f"{latest['date']:%Y}년 {unit}", f"{int(latest['value']):,}", latest['yoy_pct'], "전년 대비"),
+            (f"연평균 {unit}", f"{series['value'].mean():,.1f}", None, None),
+            (f"최대 {unit} ({peak['date']:%Y}년)", f"{int(peak['value']):,}", None, None),
+        ]
+    previous = series['value'].iloc[-2] if len(series) > 1 else float('nan')
     return [
-        ("총 사고 건수", f"{total_accidents:,}", 0),
-        ("평균 사고 건수", f"{avg_accidents:.1f}", 0),
-        ("최대 사고 건수", f"{max_accidents:,}", 0),
-        ("최소 사고 건수", f"{min_accidents:,}", 0)
+        total,
+        (f"{latest['date']:%Y-%m} {unit}", f"{int(latest['value']):,}", latest['yoy_pct'], "전년 같은 달 대비"),
+        ("최근 12개월 월평균", f"{latest['rolling_12m']:,.1f}", latest['growth_12m_pct'], "직전 12개월 대비"),
+        ("전월 대비 증감", f"{latest['value'] - previous:+,.0f}", latest['mom_pct'], "전월 대비"),
     ]
 
-def calculate_vehicle_metrics(df):
-    # Similar to cargo metrics but for vehicle data
-    pass
+def calculate_cargo_metrics():
+    return calculate_series_metrics('cargo')
+
+def calculate_vehicle_metrics():
+    return calculate_series_metrics('vehicle')
 
-def calculate_fatal_metrics(df):
-    # Similar to cargo metrics but for fatal data
-    pass 
\ No newline at end of file
+def calculate_fatal_metrics():
+    return calculate_series_metrics('fatal', unit="사망자 수")
@@ -4,9 +4,10 @@ import plotly.express as px
 import plotly.graph_objects as go
 import pandas as pd
 from datetime import datetime, timedelta
-from utils.data_loader import load_data
-from utils.data_processor import process_cargo_data, process_vehicle_data, process_fatal_data
-from utils.cache import get_cached_data
+from utils.query import query_dimension, query_derived
+from utils.schema import TOTAL_DIMENSION
+from utils.transport import compact_figure
+from utils.result_cache import result_cache, normalize_date
 
 @callback(
     [Output('summary-section', 'children'),
@@ -26,13 +27,16 @@ def generate_report(n_clicks, report_type, start_date, end_date, sections):
     if not n_clicks:
         return [html.Div()] * 7
     
-    # Load and process data
-    df = get_cached_data('cargo')  # Default to cargo data
-    df = process_cargo_data(df)
-    
-    # Filter by date range
-    if start_date and end_date:
-        df = df[(df['date'] >= start_date) & (df['date'] <= end_date)]
+    # 같은 설정의 보고서는 모든 워커가 디스크 캐시에서 함께 쓴다 (보고서는 화물차 데이터만 읽는다)
+    start_date, end_date = normalize_date(start_date), normalize_date(end_date)
+    sections = sorted(sections or [])
+    inputs = {'report_type': report_type, 'period': [start_date, end_date], 'sections': sections}
+    return result_cache.cached('report', inputs, ['cargo'],
+                               lambda: create_report(report_type, start_date, end_date, sections))
+
+def create_report(report_type, start_date, end_date, sections):
+    # Filter by date range (cargo data by default)
+    filters = {'date': (start_date, end_date)} if start_date and end_date else {}
     
     # Initialize empty sections
     summary = html.Div()
@@ -45,30 +49,45 @@ def generate_report(n_clicks, report_type, start_date, end_date, sections):
     
     # Generate sections based on selection
     if 'summary' in sections:
-        summary = create_summary_section(df, report_type)
+        summary = create_summary_section(filters, report_type)
     
     if 'metrics' in sections:
-        metrics = create_metrics_section(df, report_type)
+        metrics = create_metrics_section(filters, report_type)
     
     if 'trends' in sections:
-        trends = create_trends_section(df, report_type)
+        trends = create_trends_section(filters, report_type)
     
     if 'regional' in sections:
-        regional = create_regional_section(df, report_type)
+        regional = create_regional_section(filters, report_type)
     
     if 'accident_types' in sections:
-        accident_types = create_accident_types_section(df, report_type)
+        accident_types = create_accident_types_section(filters, report_type)
     
     if 'recommendations' in sections:
-        recommendations = create_recommendations_section(df, report_type)
+        recommendations = create_recommendations_section(filters, report_type)
     
     return summary, metrics, trends, regional, accident_types, recommendations, date_display
 
-def create_summary_section(df, report_type):
-    total_accidents = df['accident_count'].sum()
-    avg_accidents = df['accident_count'].mean()
-    max_accidents = df['accident_count'].max()
-    min_accidents = df['accident_count'].min()
+def no_data_section(title):
+    # 보고서 기간에 자료가 없는 절은 안내 카드만 보여 준다
+    return html.Div([
+        html.H4(title, className="mb-3"),
+        dbc.Card([
+            dbc.CardBody([
+                html.H6("해당 기간 데이터 없음", className="card-title text-muted")
+            ])
+        ])
+    ])
+
+def create_summary_section(filters, report_type):
+    # 연도별 전체 사고 건수로 요약
+    yearly = query_dimension('cargo', TOTAL_DIMENSION, 'accident_count', filters, by_date=True)['accident_count']
+    if yearly.empty:
+        return no_data_section("요약 통계")
+    total_accidents = int(yearly.sum())
+    avg_accidents = yearly.mean()
+    max_accidents = int(yearly.max())
+    min_accidents = int(yearly.min())
     
     return html.Div([
         html.H4("요약 통계", className="mb-3"),
@@ -108,13 +127,18 @@ def create_summary_section(df, report_type):
         ])
     ])
 
-def create_metrics_section(df, report_type):
+def create_metrics_section(filters, report_type):
     # Calculate key metrics
+    accidents = query_dimension('cargo', TOTAL_DIMENSION, 'accident_count', filters, by_date=True)['accident_count']
+    if accidents.empty:
+        return no_data_section("주요 지표")
+    fatalities = query_dimension('cargo', TOTAL_DIMENSION, 'fatal_count', filters, by_date=True)['fatal_count']
     metrics = {
-        '사고 발생률': df['accident_count'].mean(),
-        '사고 증가율': ((df['accident_count'].iloc[-1] / df['accident_count'].iloc[0]) - 1) * 100,
-        '평균 사고 심각도': df['accident_severity'].mean(),
-        '최다 사고 지역': df.groupby('region')['accident_count'].sum().idxmax()
+        '사고 발생률': accidents.mean(),
+        '사고 증가율(전년 대비, %)': period_change(query_derived('cargo', 'accident_count'), filters),
+        '평균 사고 심각도': fatalities.sum() / accidents.sum() * 100,
+        '최다 사고 지역': query_dimension('cargo', 'region', 'accident_count', filters)
+                         .set_index('region')['accident_count'].idxmax()
     }
     
     return html.Div([
@@ -132,39 +156,48 @@ def create_metrics_section(df, report_type):
         ])
     ])
 
-def create_trends_section(df, report_type):
+def period_change(series, filters, column='yoy_pct'):
+    # 기간 끝(보고서 기간 안의 마지막 시점)의 파생 변화율; 비교할 자료가 없으면 '-'
+    start, end = filters.get('date', (None, None))
+    in_range = series[series['date'].between(pd.Timestamp(start or pd.Timestamp.min), pd.Timestamp(end or pd.Timestamp.max))]
+    if in_range.empty or pd.isna(in_range[column].iloc[-1]):
+        return '-'
+    return float(in_range[column].iloc[-1])
+
+def create_trends_section(filters, report_type):
     # Create trend analysis
+    df = query_dimension('cargo', TOTAL_DIMENSION, 'accident_count', filters, by_date=True)
     fig = px.line(df, x='date', y='accident_count',
                   title='사고 건수 추이')
     
     return html.Div([
         html.H4("추세 분석", className="mb-3"),
-        dcc.Graph(figure=fig)
+        dcc.Graph(figure=compact_figure(fig))
     ])
 
-def create_regional_section(df, report_type):
+def create_regional_section(filters, report_type):
     # Create regional analysis
-    regional_data = df.groupby('region')['accident_count'].sum().reset_index()
+    regional_data = query_dimension('cargo', 'region', 'accident_count', filters)
     fig = px.bar(regional_data, x='region', y='accident_count',
                  title='지역별 사고 건수')
     
     return html.Div([
         html.H4("지역별 분석", className="mb-3"),
-        dcc.Graph(figure=fig)
+        dcc.Graph(figure=compact_figure(fig))
     ])
 
-def create_accident_types_section(df, report_type):
+def create_accident_types_section(filters, report_type):
     # Create accident type analysis
-    type_data = df.groupby('accident_type')['accident_count'].sum().reset_index()
+    type_data = query_dimension('cargo', 'accident_type', 'accident_count', filters)
     fig = px.pie(type_data, values='accident_count', names='accident_type',
                  title='사고 유형 분포')
     
     return html.Div([
         html.H4("사고 유형 분석", className="mb-3"),
-        dcc.Graph(figure=fig)
+        dcc.Graph(figure=compact_figure(fig))
     ])
 
-def create_recommendations_section(df, report_type):
+def create_recommendations_section(filters, report_type):
     # Generate recommendations based on data analysis
     recommendations = [
         "사고가 많이 발생하는 지역에 대한 추가 안전 점검 실시",
@@ -0,0 +1,33 @@
+import plotly.graph_objects as go
+from dash import Patch
+
+# 시각화 옵션 중 그림 위에 겹쳐 그리는 요소
+OVERLAY_OPTIONS = ('trend', 'mean', 'compare')
+
+def add_comparison(fig, x, y, viz_options, name='비교 기간', color='gray', kind='line'):
+    """Add the baseline period as a dotted line (or bars), visible only when 'compare' is selected.
+
+    Overlays are always drawn so a toggle only has to flip their visibility.
+
+    Returns the overlay positions for `patch_overlays`.
+    """
+    visible = 'compare' in viz_options
+    if kind == 'bar':
+        fig.add_trace(go.Bar(x=list(x), y=list(y), name=name, marker_color=color, opacity=0.6, visible=visible))
+    else:
+        fig.add_trace(go.Scatter(x=list(x), y=list(y), mode='lines', name=name,
+                                 line=dict(dash='dot', color=color), visible=visible))
+    return {'compare': {'data': [len(fig.data) - 1]}}
+
+def patch_overlays(positions, viz_options):
+    """Build a Patch that only flips overlay visibility on the client-side figure."""
+    patched = Patch()
+    for name, targets in (positions or {}).items():
+        visible = name in viz_options
+        for index in targets.get('data', []):
+            patched['data'][index]['visible'] = visible
+        for index in targets.get('shapes', []):
+            patched['layout']['shapes'][index]['visible'] = visible
+        for index in targets.get('annotations', []):
+            patched['layout']['annotations'][index]['visible'] = visible
+    return patched
@@ -1,62 +1,98 @@
+from functools import lru_cache
+import networkx as nx
 import plotly.graph_objects as go
-from dash import dcc
+from dash import dcc, html
 
-def create_pipeline_graph():
-    # Create a sample pipeline graph
-    fig = go.Figure()
-    
-    # Add nodes
-    fig.add_trace(go.Scatter(
-        x=[0, 1, 2, 3],
-        y=[0, 0, 0, 0],
-        mode='markers+text',
-        marker=dict(size=50, color=['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728']),
-        text=['데이터 수집', '전처리', '분석', '시각화'],
-        textposition='top center',
-        hoverinfo='text'
-    ))
-    
-    # Add edges
-    fig.add_trace(go.Scatter(
-        x=[0.2, 0.8],
-        y=[0, 0],
-        mode='lines',
-        line=dict(color='gray', width=2),
-        hoverinfo='none'
-    ))
-    
-    fig.add_trace(go.Scatter(
-        x=[1.2, 1.8],
-        y=[0, 0],
-        mode='lines',
-        line=dict(color='gray', width=2),
-        hoverinfo='none'
-    ))
-    
-    fig.add_trace(go.Scatter(
-        x=[2.2, 2.8],
-        y=[0, 0],
-        mode='lines',
-        line=dict(color='gray', width=2),
-        hoverinfo='none'
-    ))
-    
-    # Update layout
+# 노드 색: 이번 실행에서 계산됨 / 캐시 사용 / 아직 실행 전
+STATUS_COLORS = {
+    'computed': '#ff7f0e',
+    'cached': '#2ca02c',
+    'pending': '#c7c7c7',
+}
+STATUS_LABELS = {
+    'computed': '재계산',
+    'cached': '캐시',
+    'pending': '대기',
+}
+
+# 파이프라인 상태를 다시 그리는 주기 (ms)
+REFRESH_INTERVAL = 10000
+
+@lru_cache(maxsize=32)
+def pipeline_layout(nodes, edges):
+    """Place DAG nodes in columns by topological generation.
+
+    Deterministic for the same DAG and cached on its structure.
+    """
+    G = nx.DiGraph()
+    G.add_nodes_from(nodes)
+    G.add_edges_from(edges)
+    pos = {}
+    for x, generation in enumerate(nx.topological_generations(G)):
+        generation = sorted(generation, key=nodes.index)
+        for i, node in enumerate(generation):
+            pos[node] = (x, (len(generation) - 1) / 2 - i)
+    return pos
+
+def create_pipeline_figure(pipeline):
+    """Draw a pipeline DAG with each node's cache status, last runtime and rows."""
+    stats = pipeline.stats()
+    pos = pipeline_layout(tuple(s['node'] for s in stats), tuple(pipeline.edges()))
+
+    edge_x, edge_y = [], []
+    for source, target in pipeline.edges():
+        x0, y0 = pos[source]
+        x1, y1 = pos[target]
+        edge_x += [x0, x1, None]
+        edge_y += [y0, y1, None]
+
+    def caption(s):
+        runtime = '-' if s['runtime_ms'] is None else f"{s['runtime_ms']:,.0f} ms"
+        rows = '' if s['rows'] is None else f"<br>{s['rows']:,}행"
+        return f"{s['label']}<br>{STATUS_LABELS[s['status']]} · {runtime}{rows}"
+
+    fig = go.Figure([
+        go.Scatter(
+            x=edge_x, y=edge_y,
+            mode='lines',
+            line=dict(color='gray', width=2),
+            hoverinfo='none'
+        ),
+        go.Scatter(
+            x=[pos[s['node']][0] for s in stats],
+            y=[pos[s['node']][1] for s in stats],
+            mode='markers+text',
+            marker=dict(size=40, color=[STATUS_COLORS[s['status']] for s in stats]),
+            text=[s['label'] for s in stats],
+            textposition='top center',
+            hovertext=[caption(s) for s in stats],
+            hoverinfo='text'
+        )
+    ])
+
+    xs = [x for x, _ in pos.values()] or [0]
     fig.update_layout(
         showlegend=False,
         plot_bgcolor='white',
         margin=dict(l=20, r=20, t=40, b=20),
         xaxis=dict(
             showgrid=False,
+            zeroline=False,
             showticklabels=False,
-            range=[-0.5, 3.5]
+            range=[min(xs) - 0.5, max(xs) + 0.5]
         ),
         yaxis=dict(
             showgrid=False,
+            zeroline=False,
             showticklabels=False,
-            range=[-0.5, 0.5]
+            range=[-1, 1]
         ),
         height=200
     )
-    
-    return dcc.Graph(figure=fig, config={'displayModeBar': False}) 
\ No newline at end of file
+    return fig
+
+def create_pipeline_graph():
+    return html.Div([
+        dcc.Graph(id='pipeline-graph', config={'displayModeBar': False}),
+        dcc.Interval(id='pipeline-interval', interval=REFRESH_INTERVAL)
+    ])
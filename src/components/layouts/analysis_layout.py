@@ -1,8 +1,29 @@
 import dash_bootstrap_components as dbc
-from dash import html, dcc
+from dash import html, dcc, dash_table
+from utils.records import PAGE_SIZE
+
+# 입력이 이 시간(ms) 동안 멈춰야 분석을 다시 요청한다
+QUERY_DEBOUNCE_MS = 300
+
+# 사망사고 원본 기록 표의 컬럼 (id, 제목, 형식)
+RECORD_TABLE_COLUMNS = [
+    ('date', '발생일', 'datetime'),
+    ('hour', '시', 'numeric'),
+    ('weekday', '요일(0=월)', 'numeric'),
+    ('region', '지역', 'text'),
+    ('accident_type', '사고 유형', 'text'),
+    ('road_type', '도로 형태', 'text'),
+    ('fatal_count', '사망자 수', 'numeric'),
+    ('lat', '위도', 'numeric'),
+    ('lon', '경도', 'numeric'),
+]
 
 def create_analysis_layout():
     return dbc.Container([
+        # 디바운스된 분석 조건 (세션 ID와 요청 순번 포함)
+        dcc.Store(id='analysis-query'),
+        dcc.Store(id='analysis-debounce-ms', data=QUERY_DEBOUNCE_MS),
+
         # Navigation Bar
         dbc.Navbar(
             dbc.Container([
@@ -49,11 +70,26 @@ def create_analysis_layout():
                                 {'label': '시계열 분석', 'value': 'time'},
                                 {'label': '지역별 분석', 'value': 'region'},
                                 {'label': '사고 유형 분석', 'value': 'type'},
-                                {'label': '상관관계 분석', 'value': 'correlation'}
+                                {'label': '상관관계 분석', 'value': 'correlation'},
+                                {'label': '시간대×요일 분석', 'value': 'heatmap'},
+                                {'label': '사고 다발 지점', 'value': 'hotspot'},
+                                {'label': '고속도로 노선 구간', 'value': 'corridor'},
+                                {'label': '사망사고 원본 기록', 'value': 'records'},
+                                {'label': '전기 대비 비교', 'value': 'compare'},
+                                {'label': '전년 동기 비교', 'value': 'compare_year'}
                             ],
                             value=['time'],
                             className="mb-3"
-                        )
+                        ),
+                        html.Hr(),
+                        html.H5("데이터 내보내기", className="mb-3"),
+                        # 현재 데이터와 기간으로 걸러진 행을 서버가 나눠 보내는 다운로드 링크
+                        dbc.ButtonGroup([
+                            dbc.Button("CSV", id='export-csv', href='/export/cargo.csv',
+                                       external_link=True, color="secondary", outline=True),
+                            dbc.Button("Parquet", id='export-parquet', href='/export/cargo.parquet',
+                                       external_link=True, color="secondary", outline=True)
+                        ], className="w-100")
                     ])
                 ], className="mb-4")
             ], width=3),
@@ -98,6 +134,66 @@ def create_analysis_layout():
                             dbc.CardBody([
                                 dcc.Graph(id='correlation-analysis')
                             ])
+                        ], className="mb-4")
+                    ], width=12)
+                ]),
+
+                dbc.Row([
+                    dbc.Col([
+                        dbc.Card([
+                            dbc.CardHeader("시간대×요일 분석"),
+                            dbc.CardBody([
+                                dcc.Graph(id='temporal-heatmap')
+                            ])
+                        ], className="mb-4")
+                    ], width=12)
+                ]),
+
+                dbc.Row([
+                    dbc.Col([
+                        dbc.Card([
+                            dbc.CardHeader("사고 다발 지점"),
+                            dbc.CardBody([
+                                dcc.Graph(id='hotspot-map')
+                            ])
+                        ], className="mb-4")
+                    ], width=12)
+                ]),
+
+                dbc.Row([
+                    dbc.Col([
+                        dbc.Card([
+                            dbc.CardHeader("고속도로 노선 구간"),
+                            dbc.CardBody([
+                                dcc.Graph(id='route-corridor')
+                            ])
+                        ], className="mb-4")
+                    ], width=12)
+                ]),
+
+                dbc.Row([
+                    dbc.Col([
+                        dbc.Card([
+                            dbc.CardHeader("사망사고 원본 기록"),
+                            dbc.CardBody([
+                                html.Div(id='fatal-records-count', className="text-muted mb-2"),
+                                # 페이지·정렬·필터는 서버에서 처리해 보이는 행만 받는다
+                                dash_table.DataTable(
+                                    id='fatal-records',
+                                    columns=[{'id': col, 'name': name, 'type': kind}
+                                             for col, name, kind in RECORD_TABLE_COLUMNS],
+                                    page_current=0,
+                                    page_size=PAGE_SIZE,
+                                    page_action='custom',
+                                    sort_action='custom',
+                                    sort_mode='single',
+                                    sort_by=[],
+                                    filter_action='custom',
+                                    filter_query='',
+                                    style_table={'overflowX': 'auto'},
+                                    style_cell={'fontFamily': 'Noto Sans KR, sans-serif', 'fontSize': 13}
+                                )
+                            ])
                         ])
                     ], width=12)
                 ])
@@ -0,0 +1,53 @@
+import tracemalloc
+import dash_bootstrap_components as dbc
+from dash import html, dash_table
+
+def _table(table_id, columns):
+    return dash_table.DataTable(
+        id=table_id,
+        columns=[{'name': label, 'id': col} for col, label in columns],
+        sort_action='native',
+        page_size=15,
+        style_table={'overflowX': 'auto'},
+        style_cell={'textAlign': 'left', 'fontSize': 13, 'maxWidth': 480,
+                    'overflow': 'hidden', 'textOverflow': 'ellipsis'},
+        style_header={'fontWeight': 'bold'}
+    )
+
+def create_diagnostics_layout():
+    return dbc.Container([
+        # Navigation Bar
+        dbc.Navbar(
+            dbc.Container([
+                dbc.NavbarBrand("화물차 사고 데이터 분석 대시보드", className="ms-2"),
+                dbc.Nav([
+                    dbc.NavItem(dbc.NavLink("대시보드", href="/", active="exact")),
+                    dbc.NavItem(dbc.NavLink("데이터 분석", href="/analysis", active="exact")),
+                    dbc.NavItem(dbc.NavLink("보고서", href="/report", active="exact")),
+                ], className="ms-auto")
+            ]),
+            color="white",
+            className="mb-4"
+        ),
+
+        dbc.Card([
+            dbc.CardHeader("메모리 진단"),
+            dbc.CardBody([
+                dbc.Row([
+                    dbc.Col(html.Div(id='memory-summary'), width=8),
+                    dbc.Col([
+                        dbc.Button("새로 고침", id='memory-refresh', color='primary', size='sm', className="me-3"),
+                        dbc.Switch(id='memory-tracing', label="콜백 할당 추적 (tracemalloc)",
+                                   value=tracemalloc.is_tracing(), className="d-inline-block")
+                    ], width=4, className="text-end")
+                ], className="mb-3"),
+                html.H6("캐시 계층", className="mt-2"),
+                _table('memory-layers', [('layer', '계층'), ('entries', '항목 수'), ('mb', 'MB')]),
+                html.H6("캐시 항목", className="mt-4"),
+                _table('memory-entries', [('layer', '계층'), ('entry', '항목'), ('type', '형식'), ('mb', 'MB')]),
+                html.H6("콜백별 할당 (최근)", className="mt-4"),
+                _table('memory-traces', [('time', '시각'), ('callback', '콜백'), ('allocated_kb', '할당 KB'),
+                                         ('retained_kb', '남은 KB'), ('site', '최대 할당 위치')])
+            ])
+        ])
+    ], fluid=True)
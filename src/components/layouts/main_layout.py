@@ -54,41 +54,8 @@ def create_main_layout():
 
             # Main Content Area
             dbc.Col([
-                # Summary Cards
-                dbc.Row([
-                    dbc.Col([
-                        dbc.Card([
-                            dbc.CardBody([
-                                html.H6("총 사고 건수", className="card-title"),
-                                html.H3(id="total-accidents", className="card-text")
-                            ])
-                        ])
-                    ], width=3),
-                    dbc.Col([
-                        dbc.Card([
-                            dbc.CardBody([
-                                html.H6("평균 사고 건수", className="card-title"),
-                                html.H3(id="avg-accidents", className="card-text")
-                            ])
-                        ])
-                    ], width=3),
-                    dbc.Col([
-                        dbc.Card([
-                            dbc.CardBody([
-                                html.H6("최대 사고 건수", className="card-title"),
-                                html.H3(id="max-accidents", className="card-text")
-                            ])
-                        ])
-                    ], width=3),
-                    dbc.Col([
-                        dbc.Card([
-                            dbc.CardBody([
-                                html.H6("최소 사고 건수", className="card-title"),
-                                html.H3(id="min-accidents", className="card-text")
-                            ])
-                        ])
-                    ], width=3)
-                ], className="mb-4"),
+                # Summary Cards: 파생 지표에서 읽은 주요 지표 카드 (metrics_callbacks)
+                html.Div(id='key-metrics', className="mb-4"),
                 
                 # Charts
                 dbc.Row([
@@ -1,7 +1,21 @@
 from functools import lru_cache
+from collections import OrderedDict
+import json
 import pandas as pd
 import os
+import shutil
+import threading
 from datetime import datetime, timedelta
+from utils.memory import memory_layer
+
+def temp_path(path):
+    """A temp file name next to `path` for write-then-os.replace.
+
+    Unique per process and thread: every worker runs its own ingest and
+    watcher, so a fixed name would let two writers overwrite each other's
+    half-written file.
+    """
+    return f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
 
 class DataCache:
     def __init__(self, cache_dir='.cache'):
@@ -20,8 +34,11 @@ class DataCache:
         return datetime.now() - cache_time < timedelta(hours=max_age_hours)
     
     def save_to_cache(self, df, data_type):
+        # 다른 워커와 감시 스레드가 읽는 중이므로 다 쓴 뒤에 바꿔 넣는다
         cache_path = self.get_cache_path(data_type)
-        df.to_parquet(cache_path)
+        tmp_path = temp_path(cache_path)
+        df.to_parquet(tmp_path)
+        os.replace(tmp_path, cache_path)
     
     def load_from_cache(self, data_type):
         cache_path = self.get_cache_path(data_type)
@@ -32,10 +49,96 @@ class DataCache:
 # Create global cache instance
 data_cache = DataCache()
 
-@lru_cache(maxsize=32)
+_derived_lock = threading.Lock()
+_derived = {}
+
+def load_derived(name, key, build):
+    """Get the tables derived under `name`, rebuilding them only when `key` changes.
+
+    `build()` returns a dict of table name -> DataFrame. The tables are kept
+    in memory and persisted to `.cache/<name>/` with the key they were built
+    for, so other processes and restarts reuse them.
+    """
+    base = os.path.join(data_cache.cache_dir, name)
+    key_path = os.path.join(base, 'key.json')
+    with _derived_lock:
+        loaded = _derived.get(name)
+        if loaded is not None and loaded[0] == key:
+            return loaded[1]
+        stored = {}
+        if os.path.exists(key_path):
+            with open(key_path, encoding='utf-8') as f:
+                stored = json.load(f)
+        tables = None
+        if stored.get('key') == key:
+            try:
+                tables = {table: pd.read_parquet(os.path.join(base, table + '.parquet'))
+                          for table in stored['tables']}
+            except OSError:
+                tables = None
+        if tables is None:
+            tables = build()
+            os.makedirs(base, exist_ok=True)
+            for table, df in tables.items():
+                path = os.path.join(base, table + '.parquet')
+                tmp_path = temp_path(path)
+                df.to_parquet(tmp_path, index=False)
+                os.replace(tmp_path, path)
+            tmp_path = temp_path(key_path)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'key': key, 'tables': sorted(tables)}, f, ensure_ascii=False)
+            os.replace(tmp_path, key_path)
+        _derived[name] = (key, tables)
+        return tables
+
 def get_cached_data(data_type):
-    """Get cached data with LRU cache."""
-    return data_cache.load_from_cache(data_type)
+    """Get the dataset at its current source version; only new or changed source files are re-parsed."""
+    from utils.ingest import ingest_dataset, source_version
+    # 수집이 버전을 올리므로 버전은 수집한 뒤에 읽는다 (새 프레임이 이전 버전 키에 들어가지 않게)
+    ingest_dataset(data_type)
+    return _cached_data(data_type, source_version(data_type))
+
+# 데이터셋 버전별로 최근 CACHED_DATA_SIZE개 프레임을 둔다 (메모리 진단에서 항목을 볼 수 있게 직접 관리)
+CACHED_DATA_SIZE = 32
+_data_lock = threading.Lock()
+_data = OrderedDict()
+
+def _cached_data(data_type, version):
+    key = (data_type, version)
+    with _data_lock:
+        if key in _data:
+            _data.move_to_end(key)
+            return _data[key]
+    from utils.ingest import read_dataset
+    df = read_dataset(data_type)
+    with _data_lock:
+        _data[key] = df
+        while len(_data) > CACHED_DATA_SIZE:
+            _data.popitem(last=False)
+    return df
+
+def clear_cached_data(data_type=None):
+    """Drop the cached frames of `data_type` (every version), or of all datasets."""
+    with _data_lock:
+        if data_type is None:
+            _data.clear()
+            return
+        for key in [key for key in _data if key[0] == data_type]:
+            del _data[key]
+
+@memory_layer('cache.source_data')
+def _source_data_entries():
+    # 현재 버전이 아닌 항목은 다시 쓰이지 않으면서 메모리를 차지한다
+    from utils.ingest import source_version
+    with _data_lock:
+        items = list(_data.items())
+    return {f"{data_type} v{version}" + ('' if version == source_version(data_type) else ' (stale)'): df
+            for (data_type, version), df in items}
+
+@memory_layer('cache.derived_tables')
+def _derived_entries():
+    with _derived_lock:
+        return {f'{name}/{table}': df for name, (_, tables) in _derived.items() for table, df in tables.items()}
 
 @lru_cache(maxsize=32)
 def get_cached_visualization(data_type, viz_type, **kwargs):
@@ -47,6 +150,10 @@ def clear_cache():
     """Clear all cached data."""
     data_cache = DataCache()
     for file in os.listdir(data_cache.cache_dir):
-        os.remove(os.path.join(data_cache.cache_dir, file))
-    get_cached_data.cache_clear()
+        path = os.path.join(data_cache.cache_dir, file)
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        else:
+            os.remove(path)
+    clear_cached_data()
     get_cached_visualization.cache_clear() 
\ No newline at end of file
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+from utils.schema import TOTAL_DIMENSION
+
+# 측정값 쌍마다 저장하는 충분통계량
+STAT_COLUMNS = ['n', 'sum_a', 'sum_b', 'sum_aa', 'sum_bb', 'sum_ab']
+CORRELATION_COLUMNS = ['dataset', 'feature_a', 'feature_b', 'date'] + STAT_COLUMNS
+
+
+def feature_matrix(long):
+    """Pivot a canonical long table into one row per breakdown cell and one column per measure.
+
+    Cells of the 'total' series are left out since they repeat the other
+    breakdowns. Missing measures count as 0, matching the zero cells dropped
+    at normalization.
+    """
+    cells = long[(long['dimension'] != TOTAL_DIMENSION) & long['date'].notna()]
+    if cells.empty:
+        return pd.DataFrame()
+    keys = ['dataset', 'date', 'dimension', 'dimension_value', 'segment']
+    return (cells.astype({col: object for col in keys if col != 'date'})
+            .fillna({'segment': ''})
+            .pivot_table(index=keys, columns='measure', values='value', aggfunc='sum',
+                         fill_value=0, observed=True))
+
+
+def correlation_stats(long):
+    """Compute per-month sufficient statistics for every pair of measures.
+
+    Statistics of different files and months add up, so a correlation
+    matrix for any set of months can be assembled from them without
+    touching the rows again.
+    """
+    features = feature_matrix(long)
+    if features.empty:
+        return pd.DataFrame(columns=CORRELATION_COLUMNS)
+    dates = features.index.get_level_values('date')
+    groups = [features.index.get_level_values('dataset'),
+              pd.DatetimeIndex(dates).to_period('M').to_timestamp()]
+    names = list(features.columns)
+    values = features.to_numpy(dtype='float64')
+
+    parts = []
+    for i, a in enumerate(names):
+        for j in range(i, len(names)):
+            x, y = values[:, i], values[:, j]
+            frame = pd.DataFrame({'n': 1.0, 'sum_a': x, 'sum_b': y, 'sum_aa': x * x,
+                                  'sum_bb': y * y, 'sum_ab': x * y})
+            part = frame.groupby(groups).sum()
+            part.index.names = ['dataset', 'date']
+            parts.append(part.reset_index().assign(feature_a=a, feature_b=names[j]))
+    return pd.concat(parts, ignore_index=True)[CORRELATION_COLUMNS]
+
+
+def correlation_matrix(stats):
+    """Assemble a correlation matrix from summed pair statistics.
+
+    `stats` has one row per (feature_a, feature_b) pair with the summed
+    STAT_COLUMNS; pairs with no variance are NaN.
+    """
+    names = sorted(set(stats['feature_a']) | set(stats['feature_b']))
+    matrix = pd.DataFrame(np.nan, index=names, columns=names)
+    n, sa, sb = stats['n'], stats['sum_a'], stats['sum_b']
+    cov = n * stats['sum_ab'] - sa * sb
+    var_a = n * stats['sum_aa'] - sa * sa
+    var_b = n * stats['sum_bb'] - sb * sb
+    with np.errstate(invalid='ignore', divide='ignore'):
+        r = cov / np.sqrt(var_a * var_b)
+    for a, b, value in zip(stats['feature_a'], stats['feature_b'], r.clip(-1, 1)):
+        matrix.loc[a, b] = matrix.loc[b, a] = value
+    return matrix
@@ -1,11 +1,35 @@
+import numpy as np
 import pandas as pd
+import logging
 import os
-import re
+from utils.logger import get_logger, log_event, log_timing
+from utils.schema import DIMENSION_REGISTRY, TOTAL_LABELS, extract_year, reshape_vehicle_table, vehicle_family
+from utils.gazetteer import encode_regions
+
+logger = get_logger('cargo.data.loader')
+
+BASE_PATH = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+
+# 데이터셋별 원본 폴더와 확장자
+SOURCE_DIRS = {
+    'cargo': (('화물차 사고 데이터 시각화',), ('.xls',)),
+    'vehicle': (('차종별 교통사고', 'data'), ('.xlsx',)),
+    'fatal': (('사망사고 및 휴게소',), ('.xlsb', '.csv')),
+}
+
+CARGO_DIMENSIONS = list(DIMENSION_REGISTRY['cargo'].values())
+
+EMPTY_COLUMNS = {
+    'cargo': ['date'] + CARGO_DIMENSIONS + ['accident_count', 'fatal_count', 'fatal_rate'],
+    'vehicle': ['date', 'region', 'accident_type', 'accident_count', 'vehicle_type'],
+    'fatal': ['date', 'region', 'accident_type', 'fatal_count', 'road_type', 'lat', 'lon',
+              'hour', 'weekday', 'month'],
+}
 
 def load_data(data_type):
     """Load data based on the selected type."""
-    base_path = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
-    
+    base_path = BASE_PATH
+
     if data_type == 'cargo':
         return load_cargo_data(base_path)
     elif data_type == 'vehicle':
@@ -14,172 +38,203 @@ def load_data(data_type):
         return load_fatal_data(base_path)
 
 def extract_year_from_filename(filename):
-    match = re.search(r'(20[0-9]{2})', filename)
-    if match:
-        return int(match.group(1))
-    return None
+    return extract_year(filename)
 
-def load_cargo_data(base_path):
-    """Load and process cargo accident data from '화물차 사고 데이터 시각화' folder."""
-    cargo_path = os.path.join(base_path, '화물차 사고 데이터 시각화')
-    
-    # Load all Excel files in the cargo directory
-    dfs = []
-    for file in os.listdir(cargo_path):
-        if file.endswith('.xls'):
-            file_path = os.path.join(cargo_path, file)
-            try:
-                # Read Excel file, skipping the first few rows if they contain metadata
-                df = pd.read_excel(file_path)
-                
-                # Rename columns to match expected format
-                rename_dict = {
-                    '발생건수': 'accident_count',
-                    '사망자수': 'fatal_count',
-                    '치사율(%)': 'fatal_rate',
-                    '시도': 'region',
-                    '지자체': 'region',
-                    '도로형태': 'accident_type',
-                    '사고유형': 'accident_type',
-                    '연령대': 'accident_type',
-                    '기상상태': 'accident_type',
-                    '위반유형': 'accident_type',
-                }
-                df = df.rename(columns=rename_dict)
-                
-                # Add date column if not present
-                year = extract_year_from_filename(file)
-                if year is not None:
-                    df['date'] = pd.to_datetime(f'{year}-01-01')
-                elif '연도' in df.columns:
-                    df['date'] = pd.to_datetime(df['연도'].astype(str) + '-01-01')
-                
-                # Keep only necessary columns
-                keep_cols = ['date', 'region', 'accident_type', 'accident_count', 'fatal_count', 'fatal_rate']
-                for col in keep_cols:
-                    if col not in df.columns:
-                        df[col] = None
-                dfs.append(df[keep_cols])
-            except Exception as e:
-                print(f"Error loading {file}: {str(e)}")
-                continue
-    
-    # Combine all dataframes
+def get_source_dir(data_type, base_path=BASE_PATH):
+    """Get the folder holding the source files of a dataset."""
+    return os.path.join(base_path, *SOURCE_DIRS[data_type][0])
+
+def list_source_files(data_type, base_path=BASE_PATH):
+    """List the source file paths of a dataset in a stable order."""
+    source_dir = get_source_dir(data_type, base_path)
+    extensions = SOURCE_DIRS[data_type][1]
+    if not os.path.isdir(source_dir):
+        return []
+    return [
+        os.path.join(source_dir, file)
+        for file in sorted(os.listdir(source_dir))
+        if file.endswith(extensions)
+    ]
+
+def read_raw_file(data_type, file_path):
+    """Read a source file as-is, logging its load time, size and row count."""
+    file = os.path.basename(file_path)
+    with log_timing(logger, 'file_loaded', dataset=data_type, file=file,
+                    bytes_read=os.path.getsize(file_path)) as event:
+        if file_path.endswith('.csv'):
+            raw = pd.read_csv(file_path)
+        elif file_path.endswith('.xlsb'):
+            import pyxlsb
+            raw = pd.read_excel(file_path, engine='pyxlsb')
+        else:
+            # Read Excel file, skipping the first few rows if they contain metadata
+            raw = pd.read_excel(file_path)
+        event['rows'] = len(raw)
+    return raw
+
+def parse_source_frame(data_type, file_path, raw):
+    """Turn a raw source frame into the dataset's row-level columns."""
+    file = os.path.basename(file_path)
+    if data_type == 'cargo':
+        return parse_cargo_frame(raw, file)
+    elif data_type == 'vehicle':
+        return parse_vehicle_frame(raw, file)
+    return parse_fatal_frame(raw, file)
+
+def read_source_file(data_type, file_path):
+    """Read and parse a single source file."""
+    return parse_source_frame(data_type, file_path, read_raw_file(data_type, file_path))
+
+def parse_cargo_frame(df, file):
+    """Parse one '화물차' table into the cargo columns."""
+    # Rename columns to match expected format; each breakdown keeps its own dimension
+    rename_dict = {
+        '발생건수': 'accident_count',
+        '사망자수': 'fatal_count',
+        '치사율(%)': 'fatal_rate',
+        **DIMENSION_REGISTRY['cargo'],
+    }
+    df = df.rename(columns=rename_dict)
+    # 합계 행은 행 단위 표에 두지 않는다: 지역·유형별 합산에서 두 번 세어진다
+    # (연도별 합계는 표준 long 표의 total 시리즈가 맡는다)
+    totals = np.zeros(len(df), dtype=bool)
+    for col in ['연도'] + CARGO_DIMENSIONS:
+        if col in df.columns:
+            totals |= df[col].astype(str).str.strip().isin(TOTAL_LABELS).to_numpy()
+    df = df[~totals].copy()
+
+    # Add date column if not present
+    year = extract_year_from_filename(file)
+    if '연도' in df.columns:
+        # 여러 해를 담은 파일은 행별 연도를 사용
+        years = pd.to_numeric(df['연도'], errors='coerce').fillna(year if year is not None else 0)
+        df['date'] = pd.to_datetime(years.astype(int).astype(str) + '-01-01', errors='coerce')
+    elif year is not None:
+        df['date'] = pd.to_datetime(f'{year}-01-01')
+
+    # Keep only necessary columns
+    keep_cols = EMPTY_COLUMNS['cargo']
+    for col in keep_cols:
+        if col not in df.columns:
+            df[col] = None
+    # 시도 표기를 지명 사전의 고정 범주로
+    df['region'] = encode_regions(df['region'])
+    return df[keep_cols]
+
+def parse_vehicle_frame(df, file):
+    """Parse one '차종별' table into the vehicle columns (accident counts per vehicle type)."""
+    long = reshape_vehicle_table(df, file)
+    long = long[long['measure'] == 'accident_count'].reset_index(drop=True)
+    if vehicle_family(file) == 'vehicle_type':
+        vehicle_type, accident_type = long['dimension_value'], None
+    else:
+        vehicle_type, accident_type = long['segment'], long['dimension_value']
+    # region is missing from the vehicle tables
+    return pd.DataFrame({
+        'date': long['date'],
+        'region': None,
+        'accident_type': accident_type,
+        'accident_count': long['value'],
+        'vehicle_type': vehicle_type,
+    }, columns=EMPTY_COLUMNS['vehicle'])
+
+def decode_hourly_timestamps(values):
+    """Decode YYYYMMDDHH integers into dates and integer hour/weekday/month keys.
+
+    Uses integer arithmetic on the whole column instead of string slicing;
+    out-of-range values become NaT with missing keys. Weekday is 0 for Monday.
+    """
+    numbers = pd.to_numeric(pd.Series(values), errors='coerce')
+    v = numbers.fillna(0).to_numpy(dtype='int64')
+    year, month, day, hour = v // 1_000_000, v // 10_000 % 100, v // 100 % 100, v % 100
+    valid = (numbers.notna().to_numpy() & (month >= 1) & (month <= 12)
+             & (day >= 1) & (day <= 31) & (hour <= 23))
+    months = ((year - 1970) * 12 + month - 1).astype('datetime64[M]')
+    dates = months.astype('datetime64[D]') + (day - 1).astype('timedelta64[D]')
+    # 31일이 없는 달처럼 다음 달로 넘어간 값도 무효
+    valid &= dates.astype('datetime64[M]') == months
+    dates = np.where(valid, dates, np.datetime64('NaT')).astype('datetime64[ns]')
+    weekday = (dates.astype('datetime64[D]').astype('int64') + 3) % 7  # 1970-01-01은 목요일
+
+    def key(array):
+        return pd.arrays.IntegerArray(np.where(valid, array, 0).astype('int8'), ~valid)
+
+    return pd.DataFrame({
+        'date': dates,
+        'hour': key(hour),
+        'weekday': key(weekday),
+        'month': key(month),
+    }, index=getattr(values, 'index', None))
+
+def parse_fatal_frame(df, file):
+    """Parse the fatal accident workbook or a rest-area CSV."""
+    if file.endswith('.csv'):
+        # Rest area information CSV
+        return df
+
+    rename_dict = {
+        '발생년': 'year',
+        '발생년월일시': 'datetime',
+        '사망자수': 'fatal_count',
+        '사고유형_대분류': 'accident_type',
+        '도로형태': 'road_type',
+        '발생지시도': 'region',
+        '위도': 'lat',
+        '경도': 'lon',
+    }
+    df = df.rename(columns=rename_dict)
+    # Date processing
+    if 'datetime' in df.columns:
+        # 발생년월일시는 YYYYMMDDHH 정수: 날짜와 시간대/요일/월 키를 한 번에 계산
+        df[['date', 'hour', 'weekday', 'month']] = decode_hourly_timestamps(df['datetime'])
+    elif 'year' in df.columns:
+        df['date'] = pd.to_datetime(df['year'].astype(str) + '-01-01')
+    keep_cols = EMPTY_COLUMNS['fatal']
+    for col in keep_cols:
+        if col not in df.columns:
+            df[col] = None
+    df['region'] = encode_regions(df['region'])
+    return df[keep_cols]
+
+def load_source_files(data_type, file_paths, reader=read_source_file):
+    """Read the given source files with `reader`, skipping (and logging) the ones that fail."""
+    frames = {}
+    for file_path in file_paths:
+        try:
+            frames[file_path] = reader(data_type, file_path)
+        except Exception as e:
+            log_event(logger, 'file_parse_error', level=logging.ERROR,
+                      dataset=data_type, file=os.path.basename(file_path), error=str(e))
+    return frames
+
+def combine_frames(data_type, dfs):
+    """Concatenate per-file frames and log a dataset summary."""
     if dfs:
         combined_df = pd.concat(dfs, ignore_index=True)
-        print(f"Loaded cargo data with columns: {combined_df.columns.tolist()}")
-        print(f"Sample data:\n{combined_df.head()}")
+        log_event(logger, 'dataset_loaded', dataset=data_type, files=len(dfs),
+                  rows=len(combined_df), columns=len(combined_df.columns))
+        # DataFrame 미리보기는 DEBUG 레벨에서만 직렬화
+        if logger.isEnabledFor(logging.DEBUG):
+            log_event(logger, 'dataset_sample', level=logging.DEBUG, dataset=data_type,
+                      columns=combined_df.columns.tolist(),
+                      sample=combined_df.head().to_dict('records'))
     else:
-        print("No cargo data files found or loaded successfully")
-        combined_df = pd.DataFrame(columns=['date', 'region', 'accident_type', 'accident_count', 'fatal_count', 'fatal_rate'])
-    
+        log_event(logger, 'dataset_empty', level=logging.WARNING, dataset=data_type)
+        combined_df = pd.DataFrame(columns=EMPTY_COLUMNS[data_type])
+
     return combined_df
 
+def load_cargo_data(base_path):
+    """Load and process cargo accident data from '화물차 사고 데이터 시각화' folder."""
+    frames = load_source_files('cargo', list_source_files('cargo', base_path))
+    return combine_frames('cargo', list(frames.values()))
+
 def load_vehicle_data(base_path):
     """Load and process vehicle accident data from '차종별 교통사고/data' folder."""
-    vehicle_path = os.path.join(base_path, '차종별 교통사고', 'data')
-    
-    # Load all Excel files in the vehicle directory
-    dfs = []
-    for file in os.listdir(vehicle_path):
-        if file.endswith('.xlsx'):
-            file_path = os.path.join(vehicle_path, file)
-            try:
-                df = pd.read_excel(file_path)
-                
-                # Check the first column name and melt/unpivot if necessary
-                if '가해운전자 차종별 ' in df.columns:
-                    # Extract rows with accident counts
-                    df = df[df.iloc[:,1] == '사고건수']
-                    # Extract only rows with vehicle types
-                    df = df[df.iloc[:,0].str.contains('화물차|승용차|버스|이륜차|기타', na=False)]
-                    # melt
-                    id_vars = [df.columns[0], df.columns[1]]
-                    value_vars = [col for col in df.columns if col not in id_vars]
-                    df_melt = df.melt(id_vars=id_vars, value_vars=value_vars, var_name='accident_type', value_name='accident_count')
-                    df_melt = df_melt.rename(columns={df.columns[0]: 'vehicle_type', df.columns[1]: 'stat_type'})
-                    # Add date column if not present
-                    year = extract_year_from_filename(file)
-                    if year is not None:
-                        df_melt['date'] = pd.to_datetime(f'{year}-01-01')
-                    elif '사고년도' in df_melt.columns:
-                        df_melt['date'] = pd.to_datetime(df_melt['사고년도'].astype(str) + '-01-01')
-                    # region is missing, use vehicle_type/accident_type instead
-                    df_melt['region'] = None
-                    # Keep only necessary columns
-                    keep_cols = ['date', 'region', 'accident_type', 'accident_count', 'vehicle_type']
-                    for col in keep_cols:
-                        if col not in df_melt.columns:
-                            df_melt[col] = None
-                    dfs.append(df_melt[keep_cols])
-                else:
-                    # If it's a simple table structure, use it directly
-                    dfs.append(df)
-            except Exception as e:
-                print(f"Error loading {file}: {str(e)}")
-                continue
-    
-    # Combine all dataframes
-    if dfs:
-        combined_df = pd.concat(dfs, ignore_index=True)
-        print(f"Loaded vehicle data with columns: {combined_df.columns.tolist()}")
-        print(f"Sample data:\n{combined_df.head()}")
-    else:
-        print("No vehicle data files found or loaded successfully")
-        combined_df = pd.DataFrame(columns=['date', 'region', 'accident_type', 'accident_count', 'vehicle_type'])
-    
-    return combined_df
+    frames = load_source_files('vehicle', list_source_files('vehicle', base_path))
+    return combine_frames('vehicle', list(frames.values()))
 
 def load_fatal_data(base_path):
     """Load and process fatal accident data from '사망사고 및 휴게소' folder."""
-    fatal_path = os.path.join(base_path, '사망사고 및 휴게소')
-    
-    # Load all files in the fatal directory
-    dfs = []
-    # Load fatal accident information.xlsb
-    xlsb_file = os.path.join(fatal_path, '사망사고정보.xlsb')
-    try:
-        import pyxlsb
-        df = pd.read_excel(xlsb_file, engine='pyxlsb')
-        rename_dict = {
-            '발생년': 'year',
-            '발생년월일시': 'datetime',
-            '사망자수': 'fatal_count',
-            '사고유형_대분류': 'accident_type',
-            '도로형태': 'road_type',
-            '발생지시도': 'region',
-            '위도': 'lat',
-            '경도': 'lon',
-        }
-        df = df.rename(columns=rename_dict)
-        # Date processing
-        if 'datetime' in df.columns:
-            df['date'] = pd.to_datetime(df['datetime'].astype(str).str[:8], errors='coerce')
-        elif 'year' in df.columns:
-            df['date'] = pd.to_datetime(df['year'].astype(str) + '-01-01')
-        keep_cols = ['date', 'region', 'accident_type', 'fatal_count', 'road_type', 'lat', 'lon']
-        for col in keep_cols:
-            if col not in df.columns:
-                df[col] = None
-        dfs.append(df[keep_cols])
-    except Exception as e:
-        print(f"Error loading fatal xlsb: {e}")
-    # Rest area information CSV
-    for file in os.listdir(fatal_path):
-        if file.endswith('.csv'):
-            try:
-                df = pd.read_csv(os.path.join(fatal_path, file))
-                dfs.append(df)
-            except Exception as e:
-                print(f"Error loading {file}: {e}")
-    
-    # Combine all dataframes
-    if dfs:
-        combined_df = pd.concat(dfs, ignore_index=True)
-        print(f"Loaded fatal data with columns: {combined_df.columns.tolist()}")
-        print(f"Sample data:\n{combined_df.head()}")
-    else:
-        print("No fatal data files found or loaded successfully")
-        combined_df = pd.DataFrame(columns=['date', 'region', 'accident_type', 'fatal_count', 'road_type', 'lat', 'lon'])
-    
-    return combined_df 
\ No newline at end of file
+    frames = load_source_files('fatal', list_source_files('fatal', base_path))
+    return combine_frames('fatal', list(frames.values()))
@@ -10,9 +10,7 @@ def process_cargo_data(df: pd.DataFrame) -> pd.DataFrame:
         df['date'] = pd.to_datetime(df['date'])
         df['year'] = df['date'].dt.year
         df['month'] = df['date'].dt.month
-    # 결측치 처리
-    if 'accident_count' in df.columns:
-        df['accident_count'] = pd.to_numeric(df['accident_count'], errors='coerce').fillna(0)
+    # 결측치 처리 (건수는 수집 단계의 검사에서 이미 숫자로 바뀌어 있다)
     if 'region' in df.columns:
         df['region'] = df['region'].fillna('미상')
     if 'accident_type' in df.columns:
@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+
+# 시리즈 키와 파생 측정값 (변화율은 %, 이동평균은 기간 값의 평균)
+SERIES_KEYS = ['dataset', 'dimension', 'dimension_value', 'measure']
+DERIVED_MEASURES = ['mom_pct', 'yoy_pct', 'rolling_3m', 'rolling_12m', 'growth_12m_pct']
+
+
+def series_grain(dates):
+    """'YS' when every date is January 1st (yearly tables), otherwise 'MS'."""
+    dates = pd.DatetimeIndex(dates)
+    return 'YS' if ((dates.month == 1) & (dates.day == 1)).all() else 'MS'
+
+
+def _change_pct(current, base):
+    # 기준값이 0 이하이거나 없으면 변화율을 정의하지 않는다
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(base > 0, (current / base - 1) * 100, np.nan)
+
+
+def build_derived_measures(rollup):
+    """Compute MoM, YoY, rolling 3/12-month means and 12-month growth for every series.
+
+    `rollup` is the canonical monthly rollup. Each dataset is pivoted into a
+    period x series matrix (missing periods count as 0), so every derived
+    measure is one shifted or rolling operation over all series at once.
+    Yearly tables get YoY and annual growth only. The result is long: one
+    row per series and period with `value` and the DERIVED_MEASURES.
+    """
+    frames = []
+    rollup = rollup[rollup['date'].notna()]
+    for dataset, part in rollup.groupby('dataset', observed=True):
+        grain = series_grain(part['date'].unique())
+        per_year = 12 if grain == 'MS' else 1
+        keys = [key for key in SERIES_KEYS if key != 'dataset']
+        wide = part.pivot_table(index='date', columns=keys, values='value', aggfunc='sum', observed=True)
+        periods = pd.date_range(wide.index.min(), wide.index.max(), freq=grain)
+        wide = wide.reindex(periods).fillna(0)
+        values = wide.to_numpy()
+        rolling_year = wide.rolling(per_year, min_periods=per_year).mean()
+        missing = np.full(values.shape, np.nan)
+        derived = {
+            'value': values,
+            'mom_pct': _change_pct(values, wide.shift(1).to_numpy()) if grain == 'MS' else missing,
+            'yoy_pct': _change_pct(values, wide.shift(per_year).to_numpy()),
+            'rolling_3m': wide.rolling(3, min_periods=3).mean().to_numpy() if grain == 'MS' else missing,
+            'rolling_12m': rolling_year.to_numpy(),
+            'growth_12m_pct': _change_pct(rolling_year.to_numpy(), rolling_year.shift(per_year).to_numpy()),
+        }
+        # 기간 x 시리즈 행렬을 행 우선으로 펼쳐 긴 표로
+        count, width = values.shape
+        long = wide.columns.to_frame(index=False).iloc[np.tile(np.arange(width), count)].reset_index(drop=True)
+        long.insert(0, 'dataset', dataset)
+        long['date'] = np.repeat(wide.index.to_numpy(), width)
+        for name, matrix in derived.items():
+            long[name] = matrix.ravel()
+        long['grain'] = grain
+        frames.append(long)
+    if not frames:
+        return pd.DataFrame(columns=SERIES_KEYS + ['date', 'value'] + DERIVED_MEASURES + ['grain'])
+    result = pd.concat(frames, ignore_index=True)
+    result['year'] = result['date'].dt.year
+    result['month'] = result['date'].dt.month
+    return result
+
+
+class DerivedIndex:
+    """Per-series row ranges of the derived table, for lookups without scanning it."""
+
+    def __init__(self, derived):
+        derived = derived.sort_values(SERIES_KEYS + ['date'], kind='stable').reset_index(drop=True)
+        self.frame = derived
+        # 정렬했으므로 시리즈마다 행이 연속된다: 첫 행과 끝 행만 기억한다
+        groups = derived.groupby(SERIES_KEYS, observed=True, sort=False).indices
+        self._ranges = {tuple(str(part) for part in key): (rows[0], rows[-1] + 1) for key, rows in groups.items()}
+
+    def series(self, dataset, dimension, dimension_value, measure):
+        """Rows of one series in date order (empty if unknown)."""
+        start, end = self._ranges.get((dataset, dimension, str(dimension_value), measure), (0, 0))
+        return self.frame.iloc[start:end]
@@ -0,0 +1,157 @@
+import io
+from urllib.parse import urlencode
+import pyarrow as pa
+import pyarrow.parquet as pq
+from flask import Response, abort, request, stream_with_context
+from utils.query import select_row_chunks, dataset_dimensions
+from utils.logger import get_logger, log_event, log_timing
+
+logger = get_logger('cargo.app.export')
+
+EXPORT_DATASETS = ('cargo', 'vehicle', 'fatal')
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+# 한 번에 직렬화해 보내는 행 수 (Parquet은 이 크기의 row group이 된다)
+EXPORT_CHUNK_ROWS = 20000
+
+
+def export_url(dataset, fmt, filters=None):
+    """Build the export link for a dataset and the current page filters.
+
+    `filters` maps a dimension to a value or list of values, and 'date' to a
+    (start, end) pair of dates.
+    """
+    params = []
+    for col, value in (filters or {}).items():
+        if col == 'date':
+            start, end = value
+            params += [('start_date', start)] if start else []
+            params += [('end_date', end)] if end else []
+        elif isinstance(value, (list, tuple, set)):
+            params += [(col, v) for v in value]
+        elif value is not None:
+            params.append((col, value))
+    query = urlencode(params)
+    return f'/export/{dataset}.{fmt}' + (f'?{query}' if query else '')
+
+
+def parse_export_filters(dataset, args):
+    """Read the filters of an export request (date range plus dimension values)."""
+    filters = {}
+    start, end = args.get('start_date'), args.get('end_date')
+    if start or end:
+        filters['date'] = (start or None, end or None)
+    for col in dataset_dimensions(dataset):
+        values = args.getlist(col)
+        if col != 'date' and values:
+            filters[col] = values
+    unknown = set(args) - set(filters) - {'start_date', 'end_date'}
+    if unknown:
+        raise ValueError(f"Unknown filters for {dataset}: {sorted(unknown)}")
+    return filters
+
+
+def count_rows(chunks, counter):
+    """Pass chunks through, adding their rows to counter['rows']."""
+    for chunk in chunks:
+        counter['rows'] += len(chunk)
+        yield chunk
+
+
+def stream_csv(chunks, frame):
+    # 엑셀에서 한글이 깨지지 않도록 BOM을 붙이고, 머리글은 한 번만 쓴다
+    yield '\ufeff' + frame.iloc[:0].to_csv(index=False)
+    for chunk in chunks:
+        yield chunk.to_csv(index=False, header=False, date_format='%Y-%m-%d')
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands written bytes to the caller instead of keeping them.
+
+    Reports the total bytes written from tell(), which the Parquet writer uses
+    for its column chunk offsets.
+    """
+
+    def __init__(self):
+        self._parts = []
+        self._written = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._written += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._written
+
+    def drain(self):
+        data, self._parts = b''.join(self._parts), []
+        return data
+
+
+def stream_parquet(chunks, frame):
+    """Encode each chunk as one Parquet row group and yield the bytes as they are written."""
+    # 모든 row group이 같은 스키마를 쓰도록 빈 프레임에서 스키마를 정한다
+    schema = pa.Schema.from_pandas(_parquet_ready(frame.iloc[:0]), preserve_index=False)
+    sink = _ChunkSink()
+    with pq.ParquetWriter(sink, schema, compression='snappy') as writer:
+        for chunk in chunks:
+            writer.write_table(pa.Table.from_pandas(_parquet_ready(chunk), schema=schema, preserve_index=False))
+            data = sink.drain()
+            if data:
+                yield data
+    yield sink.drain()
+
+
+def _parquet_ready(df):
+    # 여러 타입이 섞인 object 컬럼은 문자열로 (Parquet 컬럼은 한 타입이어야 한다)
+    df = df.copy()
+    for col in df.columns:
+        if df[col].dtype == object:
+            df[col] = df[col].map(str, na_action='ignore').astype('string')
+    return df
+
+
+def _export(dataset, fmt):
+    if dataset not in EXPORT_DATASETS or fmt not in EXPORT_FORMATS:
+        abort(404)
+    try:
+        filters = parse_export_filters(dataset, request.args)
+        header, chunks = select_row_chunks(dataset, filters, EXPORT_CHUNK_ROWS)
+    except ValueError as e:
+        abort(400, description=str(e))
+    # SQL 엔진은 행을 읽으면서 보내므로 행 수는 다 보낸 뒤에 안다
+    exported = {'rows': 0}
+    chunks = count_rows(chunks, exported)
+    if fmt == 'parquet':
+        body = stream_parquet(chunks, header)
+    else:
+        body = stream_csv(chunks, header)
+
+    def generate():
+        log_event(logger, 'export_started', dataset=dataset, format=fmt)
+        # 실패하면 log_timing이 export_finished_failed를 남긴다
+        with log_timing(logger, 'export_finished', dataset=dataset, format=fmt, bytes=0) as event:
+            for data in body:
+                data = data.encode('utf-8') if isinstance(data, str) else data
+                event['bytes'] += len(data)
+                yield data
+            event['rows'] = exported['rows']
+
+    filename = f'{dataset}_export.{fmt}'
+    return Response(stream_with_context(generate()), content_type=EXPORT_FORMATS[fmt], headers={
+        'Content-Disposition': f'attachment; filename={filename}',
+        'Cache-Control': 'no-store',
+    })
+
+
+def register_export_routes(server):
+    """Serve /export/<dataset>.<csv|parquet>?start_date=&end_date=&<dimension>=... as a streamed download."""
+    server.add_url_rule('/export/<dataset>.<fmt>', 'export_dataset', _export)
+    return server
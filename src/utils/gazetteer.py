@@ -0,0 +1,205 @@
+import argparse
+import json
+import os
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+from utils.logger import get_logger, log_event
+from utils.memory import memory_layer
+
+logger = get_logger('cargo.data.gazetteer')
+
+GAZETTEER_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                              'data', 'regions', 'sido.geojson')
+
+UNKNOWN_REGION = '미상'
+UNKNOWN_CODE = 0
+
+# 경계 단순화 허용 오차(도, 약 1km)와 좌표 소수 자릿수
+SIMPLIFY_TOLERANCE = 0.01
+COORDINATE_DIGITS = 4
+
+
+def _label_key(label):
+    # '서울특별시 강남구'처럼 시군구가 붙은 값은 앞의 시도만 본다
+    text = str(label).strip()
+    return text.split()[0] if text else text
+
+
+@lru_cache(maxsize=1)
+def load_gazetteer(path=GAZETTEER_PATH):
+    """Load the bundled 시도 gazetteer (read once per process).
+
+    Returns (regions, lookup, boundaries): `regions` is indexed by the
+    2-digit administrative code with the short name, official name and a
+    representative point; `lookup` maps every known spelling to its code;
+    `boundaries` is the simplified GeoJSON with feature ids set to the codes.
+    """
+    with open(path, encoding='utf-8') as f:
+        geojson = json.load(f)
+    rows, lookup = [], {}
+    for feature in geojson['features']:
+        props = feature['properties']
+        code = int(props['code'])
+        rows.append({'code': code, 'name': props['name'], 'full_name': props['full_name'],
+                     'lat': props['lat'], 'lon': props['lon']})
+        for label in [props['name'], props['full_name'], str(code)] + props.get('aliases', []):
+            lookup[_label_key(label)] = code
+        feature['id'] = str(code)
+    regions = pd.DataFrame(rows).set_index('code').sort_index()
+    return regions, lookup, geojson
+
+
+@memory_layer('gazetteer')
+def _gazetteer_entries():
+    if not load_gazetteer.cache_info().currsize:
+        return {}
+    regions, lookup, boundaries = load_gazetteer()
+    return {'regions': regions, 'lookup': lookup, 'boundaries': boundaries}
+
+
+def region_names():
+    """Short 시도 names in code order, the fixed dictionary of region columns."""
+    return load_gazetteer()[0]['name'].tolist()
+
+
+def region_boundaries():
+    """Pre-simplified 시도 boundaries as GeoJSON (feature id = code), shared by every choropleth."""
+    return load_gazetteer()[2]
+
+
+def _code_uniques(values):
+    # 서로 다른 값만 사전에서 찾는다: 행마다 문자열을 다듬지 않는다
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object), use_na_sentinel=True)
+    lookup = load_gazetteer()[1]
+    return codes, uniques, np.array([lookup.get(_label_key(label), UNKNOWN_CODE) for label in uniques],
+                                    dtype=np.int16)
+
+
+def region_codes(values):
+    """Administrative codes of region labels in any spelling (0 when missing or unknown)."""
+    codes, _, unique_codes = _code_uniques(values)
+    return np.where(codes >= 0, np.append(unique_codes, UNKNOWN_CODE)[codes], UNKNOWN_CODE)
+
+
+def encode_regions(values, keep=()):
+    """Dictionary-encode a region column on the gazetteer's fixed categories.
+
+    Every spelling becomes the short 시도 name; labels listed in `keep`
+    (such as total rows) stay as they are, any other label becomes
+    UNKNOWN_REGION and missing values stay missing. The categories are the
+    same for every file, so encoded frames concatenate without re-encoding.
+    """
+    regions = load_gazetteer()[0]
+    categories = regions['name'].tolist() + [UNKNOWN_REGION] + [label for label in keep
+                                                                if label not in regions['name'].values]
+    codes, uniques, unique_codes = _code_uniques(values)
+    position = {code: i for i, code in enumerate(regions.index)}
+    unknown = categories.index(UNKNOWN_REGION)
+    mapped = np.array([position[code] if code else (categories.index(label) if label in keep else unknown)
+                       for label, code in zip(uniques, unique_codes)], dtype=np.int16)
+    unmatched = sorted({str(label) for label, code in zip(uniques, unique_codes)
+                        if not code and label not in keep and label != UNKNOWN_REGION})
+    if unmatched:
+        log_event(logger, 'regions_unmatched', labels=unmatched[:20], count=len(unmatched))
+    return pd.Categorical.from_codes(np.where(codes >= 0, np.append(mapped, -1)[codes], -1), categories)
+
+
+def canonical_region_names(values):
+    """Short 시도 names for region labels; labels outside the gazetteer are returned unchanged."""
+    regions = load_gazetteer()[0]
+    codes, uniques, unique_codes = _code_uniques(values)
+    names = np.array([regions.at[code, 'name'] if code else label
+                      for label, code in zip(uniques, unique_codes)] + [None], dtype=object)
+    return names[codes]
+
+
+def simplify_ring(points, tolerance=SIMPLIFY_TOLERANCE):
+    """Douglas-Peucker simplification of a closed ring of (lon, lat) points."""
+    points = np.asarray(points, dtype='float64')
+    if len(points) <= 4:
+        return points
+    keep = np.zeros(len(points), dtype=bool)
+    keep[[0, -1]] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        segment = points[end] - points[start]
+        offsets = points[start + 1:end] - points[start]
+        length = np.hypot(*segment)
+        if length == 0:
+            distances = np.hypot(offsets[:, 0], offsets[:, 1])
+        else:
+            distances = np.abs(segment[0] * offsets[:, 1] - segment[1] * offsets[:, 0]) / length
+        farthest = int(distances.argmax())
+        if distances[farthest] > tolerance:
+            split = start + 1 + farthest
+            keep[split] = True
+            stack += [(start, split), (split, end)]
+    simplified = points[keep]
+    # 너무 작아져 면이 사라지는 고리는 원래 점을 둔다
+    return simplified if len(simplified) >= 4 else points
+
+
+def _wound(ring, clockwise):
+    # 부호 있는 면적이 음수면 시계 방향
+    area = np.sum(ring[:-1, 0] * ring[1:, 1] - ring[1:, 0] * ring[:-1, 1])
+    return ring[::-1] if (area < 0) != clockwise else ring
+
+
+def simplify_geometry(geometry, tolerance=SIMPLIFY_TOLERANCE):
+    """Simplify every ring of a Polygon or MultiPolygon and round its coordinates.
+
+    Outer rings are wound clockwise and holes counter-clockwise, the order
+    plotly.js (d3-geo) expects; RFC 7946 files use the opposite order and
+    would otherwise fill the whole globe.
+    """
+    polygons = geometry['coordinates'] if geometry['type'] == 'MultiPolygon' else [geometry['coordinates']]
+    simplified = [[np.round(_wound(simplify_ring(ring, tolerance), clockwise=i == 0), COORDINATE_DIGITS).tolist()
+                   for i, ring in enumerate(polygon)]
+                  for polygon in polygons]
+    if geometry['type'] == 'MultiPolygon':
+        return {'type': 'MultiPolygon', 'coordinates': simplified}
+    return {'type': 'Polygon', 'coordinates': simplified[0]}
+
+
+def build_boundaries(source, name_property, output=GAZETTEER_PATH, tolerance=SIMPLIFY_TOLERANCE):
+    """Replace the bundled boundaries with simplified ones from an official 시도 GeoJSON (WGS84).
+
+    Features are matched to the gazetteer through `name_property` (any
+    spelling the gazetteer knows); names, codes and points are kept.
+    """
+    _, lookup, gazetteer = load_gazetteer(output)
+    with open(source, encoding='utf-8') as f:
+        features = json.load(f)['features']
+    geometries = {}
+    for feature in features:
+        code = lookup.get(_label_key(feature['properties'].get(name_property, '')))
+        if code is None:
+            log_event(logger, 'boundary_unmatched', name=feature['properties'].get(name_property))
+            continue
+        geometries[code] = simplify_geometry(feature['geometry'], tolerance)
+    for feature in gazetteer['features']:
+        code = int(feature['properties']['code'])
+        if code in geometries:
+            feature['geometry'] = geometries[code]
+        feature.pop('id', None)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(gazetteer, f, ensure_ascii=False, separators=(',', ':'))
+    load_gazetteer.cache_clear()
+    log_event(logger, 'boundaries_built', source=os.path.basename(source), matched=len(geometries),
+              bytes=os.path.getsize(output))
+    return len(geometries)
+
+
+if __name__ == '__main__':
+    # 오프라인 실행: python -m utils.gazetteer <시도 경계 GeoJSON> --name-property CTP_KOR_NM (src 폴더에서)
+    parser = argparse.ArgumentParser(description='Simplify official 시도 boundaries into the bundled gazetteer')
+    parser.add_argument('source')
+    parser.add_argument('--name-property', default='CTP_KOR_NM')
+    parser.add_argument('--tolerance', type=float, default=SIMPLIFY_TOLERANCE)
+    args = parser.parse_args()
+    matched = build_boundaries(args.source, args.name_property, tolerance=args.tolerance)
+    print(f'{matched} regions updated in {GAZETTEER_PATH}')
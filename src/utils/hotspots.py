@@ -0,0 +1,171 @@
+import numpy as np
+import pandas as pd
+from utils.cache import load_derived
+from utils.ingest import ingest_dataset, read_dataset, partition_store
+from utils.logger import get_logger, log_event, log_timing
+
+logger = get_logger('cargo.data.hotspots')
+
+# 밀도 군집 파라미터: 반경 EPS_KM 안에 MIN_SAMPLES건 이상이면 핵심 지점
+EPS_KM = 1.0
+MIN_SAMPLES = 5
+
+# 한반도 중위도 기준 경위도 1도의 거리(km)
+KM_PER_DEG_LAT = 110.574
+KM_PER_DEG_LON = 111.320 * np.cos(np.radians(36.0))
+
+ALL_TYPES = '전체'
+HOTSPOT_COLUMNS = ['year', 'accident_type', 'cluster', 'accidents', 'fatalities',
+                   'lat', 'lon', 'hull_lat', 'hull_lon']
+
+
+def neighbor_pairs(x, y, eps):
+    """Find every pair of points within `eps` through a spatial hash of eps-sized cells.
+
+    Each cell is only compared with itself and four forward neighbours, so
+    every pair is reported once (i, j) with i != j.
+    """
+    cells = pd.Series(np.arange(len(x))).groupby(
+        [np.floor(x / eps).astype('int64'), np.floor(y / eps).astype('int64')]).indices
+    pairs_i, pairs_j = [], []
+    for (gx, gy), members in cells.items():
+        for dx, dy in ((0, 0), (1, -1), (1, 0), (1, 1), (0, 1)):
+            others = cells.get((gx + dx, gy + dy))
+            if others is None:
+                continue
+            d2 = (x[members, None] - x[others]) ** 2 + (y[members, None] - y[others]) ** 2
+            i, j = np.nonzero(d2 <= eps * eps)
+            if dx == dy == 0:
+                keep = i < j
+                i, j = i[keep], j[keep]
+            pairs_i.append(members[i])
+            pairs_j.append(others[j])
+    if not pairs_i:
+        return np.empty(0, dtype='int64'), np.empty(0, dtype='int64')
+    return np.concatenate(pairs_i), np.concatenate(pairs_j)
+
+
+def dbscan(x, y, eps=EPS_KM, min_samples=MIN_SAMPLES):
+    """DBSCAN over projected coordinates with grid-based neighbour lookup.
+
+    Returns a cluster label per point, numbered by cluster size, with -1 for noise.
+    """
+    n = len(x)
+    i, j = neighbor_pairs(x, y, eps)
+    degree = np.bincount(i, minlength=n) + np.bincount(j, minlength=n) + 1
+    core = degree >= min_samples
+
+    # 핵심 지점끼리의 연결 성분: 최소 인덱스 전파 + 포인터 점프
+    labels = np.arange(n)
+    linked = core[i] & core[j]
+    ci, cj = i[linked], j[linked]
+    while True:
+        new = labels.copy()
+        np.minimum.at(new, ci, labels[cj])
+        np.minimum.at(new, cj, labels[ci])
+        new = new[new]
+        if np.array_equal(new, labels):
+            break
+        labels = new
+
+    # 경계 지점은 이웃한 핵심 지점의 군집에 속한다
+    result = np.where(core, labels, -1)
+    border = core[i] & ~core[j]
+    result[j[border]] = labels[i[border]]
+    border = core[j] & ~core[i]
+    result[i[border]] = labels[j[border]]
+
+    clustered = result >= 0
+    roots, sizes = np.unique(result[clustered], return_counts=True)
+    rank = np.empty(len(roots), dtype='int64')
+    rank[np.argsort(-sizes, kind='stable')] = np.arange(len(roots))
+    result[clustered] = rank[np.searchsorted(roots, result[clustered])]
+    return result
+
+
+def convex_hull(x, y):
+    """Get the convex hull of points as closed coordinate lists (monotone chain)."""
+    points = sorted(set(zip(x.tolist(), y.tolist())))
+    if len(points) < 3:
+        return [p[0] for p in points], [p[1] for p in points]
+
+    def cross(o, a, b):
+        return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+
+    lower, upper = [], []
+    for p in points:
+        while len(lower) >= 2 and cross(lower[-2], lower[-1], p) <= 0:
+            lower.pop()
+        lower.append(p)
+    for p in reversed(points):
+        while len(upper) >= 2 and cross(upper[-2], upper[-1], p) <= 0:
+            upper.pop()
+        upper.append(p)
+    hull = lower[:-1] + upper[:-1]
+    hull.append(hull[0])
+    return [p[0] for p in hull], [p[1] for p in hull]
+
+
+def cluster_hotspots(df):
+    """Cluster one group of accidents and summarize each cluster."""
+    lat = df['lat'].to_numpy(dtype='float64')
+    lon = df['lon'].to_numpy(dtype='float64')
+    labels = dbscan(lon * KM_PER_DEG_LON, lat * KM_PER_DEG_LAT)
+    fatalities = pd.to_numeric(df['fatal_count'], errors='coerce').fillna(0).to_numpy()
+    rows = []
+    for cluster in range(labels.max() + 1 if len(labels) else 0):
+        members = labels == cluster
+        hull_lon, hull_lat = convex_hull(lon[members], lat[members])
+        rows.append({
+            'cluster': cluster,
+            'accidents': int(members.sum()),
+            'fatalities': float(fatalities[members].sum()),
+            'lat': float(lat[members].mean()),
+            'lon': float(lon[members].mean()),
+            'hull_lat': hull_lat,
+            'hull_lon': hull_lon,
+        })
+    return rows
+
+
+def build_hotspots(df):
+    """Detect hotspots per year and accident type (plus all types together)."""
+    df = df[df['lat'].notna() & df['lon'].notna() & df['date'].notna()]
+    df = df.assign(year=pd.to_datetime(df['date']).dt.year,
+                   accident_type=df['accident_type'].fillna('기타'))
+    rows = []
+    for year, group in df.groupby('year', sort=True):
+        for accident_type, part in [(ALL_TYPES, group)] + list(group.groupby('accident_type', sort=True)):
+            for row in cluster_hotspots(part):
+                rows.append(dict(row, year=int(year), accident_type=accident_type))
+    return pd.DataFrame(rows, columns=HOTSPOT_COLUMNS)
+
+
+def source_key():
+    """Identify the fatal source contents and clustering parameters the hotspots were built from."""
+    manifest = partition_store.read_manifest('fatal')
+    return {
+        'files': {file: entry['sha1'] for file, entry in sorted(manifest.items())},
+        'eps_km': EPS_KM,
+        'min_samples': MIN_SAMPLES,
+    }
+
+
+def _build_tables():
+    with log_timing(logger, 'hotspots_built', eps_km=EPS_KM, min_samples=MIN_SAMPLES) as event:
+        hotspots = build_hotspots(read_dataset('fatal'))
+        event['clusters'] = len(hotspots)
+    return {'hotspots': hotspots}
+
+
+def refresh_hotspots():
+    """Rebuild and persist the hotspots if the fatal sources changed; returns them."""
+    ingest_dataset('fatal')
+    return load_derived('hotspots', source_key(), _build_tables)['hotspots']
+
+
+if __name__ == '__main__':
+    # 오프라인 실행: python -m utils.hotspots (src 폴더에서)
+    result = refresh_hotspots()
+    log_event(logger, 'hotspots_ready', clusters=len(result))
+    print(result.groupby(['year', 'accident_type']).size().to_string())
@@ -0,0 +1,347 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import pandas as pd
+from utils.cache import data_cache, clear_cached_data, temp_path
+from utils.data_loader import (list_source_files, load_source_files, combine_frames,
+                               read_raw_file, parse_source_frame)
+from utils.logger import get_logger, log_event
+from utils.schema import normalize_source, concat_long
+from utils.correlation import correlation_stats, CORRELATION_COLUMNS
+from utils.validation import validate_rows, QUARANTINE_COLUMNS
+
+logger = get_logger('cargo.data.ingest')
+
+UNKNOWN_YEAR = 'unknown'
+MANIFEST_VERSION = 8
+
+# 원본 파일마다 저장하는 테이블: 행 단위 프레임, 표준 long 포맷, 월별 상관 충분통계량, 검사에서 걸러진 행
+TABLES = ('rows', 'long', 'stats', 'quarantine')
+
+# 차종별 표는 행을 값 단위로 다시 펼치므로 파싱한 행이 원본 행과 맞지 않는다
+RESHAPED_DATASETS = ('vehicle',)
+
+_listeners = []
+_ingest_lock = threading.Lock()
+_source_versions = {}
+_source_digests = {}
+
+
+def source_version(data_type):
+    """Get the version counter of a dataset's sources, bumped each time its partitions change."""
+    return _source_versions.get(data_type, 0)
+
+
+def source_digest(data_type):
+    """Get a digest of the source contents this process last ingested.
+
+    Unlike source_version it is the same in every process that ingested the
+    same files and survives restarts, so it can key results shared on disk.
+    """
+    if data_type not in _source_digests:
+        ingest_dataset(data_type)
+    return _source_digests[data_type]
+
+
+def manifest_digest(manifest):
+    files = sorted((file, entry['sha1']) for file, entry in manifest.items())
+    return hashlib.sha1(json.dumps([MANIFEST_VERSION, files]).encode('utf-8')).hexdigest()[:16]
+
+
+def on_partitions_changed(listener):
+    """Register `listener(data_type, years)` to run after partitions are replaced.
+
+    `years` is the set of year partition keys ('2020', ..., or 'unknown') that were
+    appended, replaced or removed, so downstream rollups and caches only
+    need to refresh those.
+    """
+    _listeners.append(listener)
+    return listener
+
+
+def file_fingerprint(file_path):
+    stat = os.stat(file_path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def content_hash(file_path):
+    digest = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def make_columnar(df):
+    """Make object columns with mixed Python types storable in Parquet.
+
+    Datetime columns are stored at nanosecond resolution so partitions
+    written from different sources concatenate cleanly.
+    """
+    df = df.copy()
+    for col in df.columns[[pd.api.types.is_datetime64_dtype(dtype) for dtype in df.dtypes]]:
+        df[col] = df[col].astype('datetime64[ns]')
+    for col in df.columns[df.dtypes == object]:
+        kind = pd.api.types.infer_dtype(df[col], skipna=True)
+        if kind.startswith('mixed'):
+            df[col] = df[col].map(lambda v: v if pd.isna(v) else str(v))
+    return df
+
+
+class PartitionStore:
+    """Year-partitioned Parquet store with a manifest of ingested source files."""
+
+    def __init__(self, cache_dir=data_cache.cache_dir):
+        self.root = os.path.join(cache_dir, 'partitions')
+
+    def dataset_dir(self, data_type):
+        return os.path.join(self.root, data_type)
+
+    def manifest_path(self, data_type):
+        return os.path.join(self.dataset_dir(data_type), 'manifest.json')
+
+    def read_manifest(self, data_type):
+        """Read the manifest; one written by an older layout is discarded with its partitions."""
+        path = self.manifest_path(data_type)
+        if not os.path.exists(path):
+            return {}
+        with open(path, encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('version') != MANIFEST_VERSION:
+            shutil.rmtree(self.dataset_dir(data_type))
+            return {}
+        return manifest['files']
+
+    def write_manifest(self, data_type, manifest):
+        path = self.manifest_path(data_type)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = temp_path(path)
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': MANIFEST_VERSION, 'files': manifest}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+
+    def file_dir(self, data_type, file, table=None):
+        file_key = hashlib.md5(file.encode('utf-8')).hexdigest()[:12]
+        file_dir = os.path.join(self.dataset_dir(data_type), file_key)
+        return os.path.join(file_dir, table) if table else file_dir
+
+    def write_file_partitions(self, data_type, file, df, table='rows'):
+        """Write every year partition of one source file's table; returns the years written."""
+        file_dir = self.file_dir(data_type, file, table)
+        os.makedirs(file_dir, exist_ok=True)
+        if table in ('rows', 'quarantine'):
+            df = make_columnar(df)
+        if 'date' in df.columns:
+            years = pd.to_datetime(df['date'], errors='coerce').dt.year
+            years = years.astype('Int64').astype(str).where(years.notna(), UNKNOWN_YEAR)
+        else:
+            years = pd.Series(UNKNOWN_YEAR, index=df.index, dtype=object)
+        written = []
+        for year, part in df.groupby(years, sort=True):
+            path = os.path.join(file_dir, f'{year}.parquet')
+            tmp_path = temp_path(path)
+            part.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, path)
+            written.append(year)
+        return written
+
+    def remove_file_partitions(self, data_type, file):
+        file_dir = self.file_dir(data_type, file)
+        if os.path.isdir(file_dir):
+            shutil.rmtree(file_dir)
+
+    def read_partitions(self, data_type, manifest, table='rows'):
+        return list(self.iter_partitions(data_type, manifest, table))
+
+    def iter_partitions(self, data_type, manifest, table='rows'):
+        """Read the (file, year) partitions of `manifest` one at a time."""
+        for file in sorted(manifest):
+            file_dir = self.file_dir(data_type, file, table)
+            for year in manifest[file]['tables'][table]:
+                path = os.path.join(file_dir, f'{year}.parquet')
+                if os.path.exists(path):
+                    yield pd.read_parquet(path)
+
+
+partition_store = PartitionStore()
+
+
+@on_partitions_changed
+def _invalidate_cached_data(data_type, years):
+    # 바뀐 데이터셋의 이전 버전 프레임만 캐시에서 내린다: 사용 중인 요청은 끝까지 그대로 쓴다
+    clear_cached_data(data_type)
+
+
+def detect_changes(data_type, manifest=None):
+    """Compare source files with the manifest.
+
+    Returns (changed, removed): paths that are new or whose content changed,
+    and file names that disappeared. A touched file whose content hash is
+    unchanged only gets its fingerprint refreshed.
+    """
+    if manifest is None:
+        manifest = partition_store.read_manifest(data_type)
+    changed = []
+    current = set()
+    for file_path in list_source_files(data_type):
+        file = os.path.basename(file_path)
+        current.add(file)
+        entry = manifest.get(file)
+        fingerprint = file_fingerprint(file_path)
+        if entry is None:
+            changed.append(file_path)
+        elif (entry['size'], entry['mtime_ns']) != (fingerprint['size'], fingerprint['mtime_ns']):
+            if entry.get('sha1') != content_hash(file_path):
+                changed.append(file_path)
+            else:
+                entry.update(fingerprint)
+    removed = [file for file in manifest if file not in current]
+    return changed, removed
+
+
+def read_source_tables(data_type, file_path):
+    """Read a source file once and build its tables (see TABLES) and quality report.
+
+    Rows failing validation go to the quarantine table and are left out of
+    the row-level table and, where rows map to source rows, the long table.
+    """
+    raw = read_raw_file(data_type, file_path)
+    rows = parse_source_frame(data_type, file_path, raw)
+    aligned = data_type not in RESHAPED_DATASETS
+    rows, quarantine, quality = validate_rows(data_type, rows, os.path.basename(file_path),
+                                              raw if aligned else None)
+    if aligned:
+        raw = raw.loc[rows.index]
+    long = normalize_source(data_type, file_path, raw, dates=rows.get('date'))
+    return rows, long, correlation_stats(long), quarantine, quality
+
+
+def ingest_dataset(data_type):
+    """Parse only new or changed source files and replace their year partitions.
+
+    Returns the set of affected years.
+    """
+    with _ingest_lock:
+        manifest = partition_store.read_manifest(data_type)
+        stored = json.dumps(manifest, sort_keys=True)
+        changed, removed = detect_changes(data_type, manifest)
+        affected = set()
+
+        for file in removed:
+            affected.update(*manifest.pop(file)['tables'].values())
+            partition_store.remove_file_partitions(data_type, file)
+
+        frames = load_source_files(data_type, changed, reader=read_source_tables)
+        for file_path, (*tables, quality) in frames.items():
+            file = os.path.basename(file_path)
+            if file in manifest:
+                affected.update(*manifest[file]['tables'].values())
+            partition_store.remove_file_partitions(data_type, file)
+            years = {
+                table: partition_store.write_file_partitions(data_type, file, df, table)
+                for table, df in zip(TABLES, tables)
+            }
+            affected.update(*years.values())
+            manifest[file] = dict(file_fingerprint(file_path), sha1=content_hash(file_path),
+                                  tables=years, rows=len(tables[0]), quality=quality)
+
+        if json.dumps(manifest, sort_keys=True) != stored or not os.path.exists(partition_store.manifest_path(data_type)):
+            partition_store.write_manifest(data_type, manifest)
+        if changed or removed:
+            _source_versions[data_type] = source_version(data_type) + 1
+        _source_digests[data_type] = manifest_digest(manifest)
+
+    if changed or removed:
+        log_event(logger, 'partitions_updated', dataset=data_type,
+                  changed_files=[os.path.basename(p) for p in changed],
+                  removed_files=removed, years=sorted(map(str, affected)))
+        for listener in _listeners:
+            try:
+                listener(data_type, affected)
+            except Exception as e:
+                log_event(logger, 'partition_listener_error', level=logging.ERROR,
+                          dataset=data_type, error=str(e))
+    return affected
+
+
+def load_dataset(data_type):
+    """Bring the partitions up to date and return the combined dataset.
+
+    The combined frame is kept as a snapshot in the data cache and is only
+    rebuilt when some partition changed.
+    """
+    return read_dataset(data_type, snapshot=not ingest_dataset(data_type))
+
+
+def read_dataset(data_type, snapshot=True):
+    """Return the combined dataset as last ingested, without checking the source files.
+
+    For builders that already ingested and may run under their own locks,
+    where ingesting (and so notifying listeners) again must not happen.
+    `snapshot=False` skips the stored snapshot and combines the partitions.
+    """
+    snapshot_path = data_cache.get_cache_path(data_type)
+    manifest_path = partition_store.manifest_path(data_type)
+    # 다른 경로(파일 감시 등)에서 수집한 뒤라면 스냅샷이 manifest보다 오래되었다
+    if (snapshot and os.path.exists(snapshot_path) and os.path.exists(manifest_path)
+            and os.stat(snapshot_path).st_mtime_ns >= os.stat(manifest_path).st_mtime_ns):
+        return pd.read_parquet(snapshot_path)
+
+    manifest = partition_store.read_manifest(data_type)
+    frames = partition_store.read_partitions(data_type, manifest)
+    df = combine_frames(data_type, frames)
+    data_cache.save_to_cache(make_columnar(df), data_type)
+    return df
+
+
+def iter_dataset(data_type, table='rows'):
+    """Yield the dataset as last ingested, one partition at a time, without checking the source files.
+
+    Like `read_dataset`, for callers that ingest on their own; readers that
+    must not hold the whole dataset (the SQL engine's table loads) use this.
+    """
+    for df in partition_store.iter_partitions(data_type, partition_store.read_manifest(data_type), table):
+        # 파티션마다 범주가 달라 합친 프레임에서는 문자열 컬럼이 되므로, 조각도 같은 타입으로 건넨다
+        yield df.astype({col: object for col in df.columns if isinstance(df[col].dtype, pd.CategoricalDtype)})
+
+
+def load_long_dataset(data_type):
+    """Bring the partitions up to date and return the dataset's canonical long table."""
+    ingest_dataset(data_type)
+    manifest = partition_store.read_manifest(data_type)
+    return concat_long(partition_store.read_partitions(data_type, manifest, table='long'))
+
+
+def load_correlation_stats(data_type):
+    """Bring the partitions up to date and return the dataset's per-month correlation statistics."""
+    ingest_dataset(data_type)
+    manifest = partition_store.read_manifest(data_type)
+    frames = partition_store.read_partitions(data_type, manifest, table='stats')
+    if not frames:
+        return pd.DataFrame(columns=CORRELATION_COLUMNS)
+    return pd.concat(frames, ignore_index=True)
+
+
+def load_quarantine(data_type):
+    """Bring the partitions up to date and return the rows that failed validation, with file, row and reason."""
+    ingest_dataset(data_type)
+    manifest = partition_store.read_manifest(data_type)
+    frames = partition_store.read_partitions(data_type, manifest, table='quarantine')
+    if not frames:
+        return pd.DataFrame(columns=QUARANTINE_COLUMNS)
+    return pd.concat(frames, ignore_index=True)
+
+
+def quality_report(data_type):
+    """Per-file validation results of the ingested sources: rows read, kept and quarantined, and failures per check."""
+    ingest_dataset(data_type)
+    manifest = partition_store.read_manifest(data_type)
+    return pd.DataFrame([
+        {'file': file, 'rows': entry['quality']['rows'], 'valid': entry['quality']['valid'],
+         'quarantined': entry['quality']['quarantined'],
+         'checks': ', '.join(f'{name}={count}' for name, count in entry['quality']['checks'].items())}
+        for file, entry in sorted(manifest.items())
+    ], columns=['file', 'rows', 'valid', 'quarantined', 'checks'])
@@ -0,0 +1,461 @@
+import argparse
+import datetime
+import gzip
+import http.client
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROOT_DIR = os.path.dirname(SRC_DIR)
+
+# 로컬에서 띄우는 앱: 작업 폴더, 모듈, 기본 포트
+TARGETS = {
+    'app': {'cwd': SRC_DIR, 'module': 'app', 'port': 8051},
+    'dashboard': {'cwd': ROOT_DIR, 'module': 'dashboard', 'port': 8050},
+}
+
+DATA_TYPES = ['cargo', 'vehicle', 'fatal']
+ANALYSIS_TYPES = [
+    ['time', 'region', 'type', 'correlation'],
+    ['time', 'heatmap'],
+    ['region', 'hotspot', 'corridor'],
+    ['time', 'records'],
+    ['time', 'region', 'compare'],
+    ['time', 'region', 'compare_year'],
+]
+RECORD_SORTS = [[], [{'column_id': 'fatal_count', 'direction': 'desc'}], [{'column_id': 'region', 'direction': 'asc'}]]
+RECORD_FILTERS = ['', '{region} contains 서울', '{fatal_count} >= 2 && {road_type} contains 교차로']
+REPORT_SECTIONS = ['summary', 'metrics', 'trends', 'regional', 'accident_types', 'recommendations']
+
+# 시나리오 단계:
+#   ('load', path)                       페이지 로드 (레이아웃과 초기 콜백)
+#   ('set', id, prop, choices)           choices 중 하나로 값 변경
+#   ('click', id)                        n_clicks 증가
+#   ('drag', id, (start, end), steps)    날짜 범위를 steps번 연달아 바꿈 (마지막 값만 디바운스 통과)
+SCENARIOS = {
+    'app': [
+        ('load', '/'),
+        ('set', 'data-selector', 'value', DATA_TYPES),
+        ('load', '/analysis'),
+        ('set', 'analysis-types', 'value', ANALYSIS_TYPES),
+        ('set', 'analysis-data-selector', 'value', DATA_TYPES),
+        ('drag', 'date-range', ('2018-01-01', '2022-12-31'), 6),
+        ('set', 'analysis-data-selector', 'value', DATA_TYPES),
+        ('set', 'analysis-types', 'value', [['time', 'records']]),
+        ('set', 'fatal-records', 'filter_query', RECORD_FILTERS),
+        ('set', 'fatal-records', 'sort_by', RECORD_SORTS),
+        ('set', 'fatal-records', 'page_current', [1, 2, 5]),
+        ('load', '/report'),
+        ('set', 'report-type-selector', 'value', ['monthly', 'quarterly', 'yearly']),
+        ('set', 'report-sections', 'value', [REPORT_SECTIONS, REPORT_SECTIONS[:3]]),
+        ('click', 'generate-report'),
+    ],
+    'dashboard': [
+        ('load', '/'),
+        ('set', 'data-selector', 'value', ['yearly', 'regional', 'accident_type', 'weather']),
+        ('click', 'line-btn'),
+        ('set', 'visualization-options', 'value', [['trend'], ['mean'], ['trend', 'mean']]),
+        ('set', 'data-selector', 'value', ['yearly', 'regional', 'accident_type', 'weather']),
+        ('click', 'bar-btn'),
+        ('set', 'visualization-options', 'value', [[], ['trend']]),
+    ],
+}
+
+NO_UPDATE = object()
+
+
+def _debounce_query(session, inputs, state):
+    # assets/analysis.js: 입력이 멈춘 뒤 세션 ID와 순번을 붙인 조건 하나만 내보낸다
+    data_type, start_date, end_date, analysis_types = inputs
+    session.seq += 1
+    return [{'session': session.name, 'seq': session.seq, 'data_type': data_type,
+             'start_date': start_date, 'end_date': end_date, 'analysis_types': analysis_types or []}]
+
+
+def _check_version(session, inputs, state):
+    # assets/dashboard.js: 브라우저에 저장된 표가 없거나 버전이 다를 때만 서버에 요청
+    version, = inputs
+    stored, = state
+    return [NO_UPDATE if stored and stored.get('version') == version else version]
+
+
+def _render(session, inputs, state):
+    # assets/dashboard.js: 그림은 브라우저에서 그리고, 겹쳐 그린 요소의 위치만 토글 콜백이 쓴다
+    payload = inputs[-1]
+    if not payload:
+        return [NO_UPDATE] * 6
+    return [NO_UPDATE] * 5 + [{'trend': {'data': [1]}, 'mean': {'shapes': [0], 'annotations': [0]}}]
+
+
+CLIENTSIDE = {
+    ('analysis', 'debounce_query'): _debounce_query,
+    ('dashboard', 'check_version'): _check_version,
+    ('dashboard', 'render'): _render,
+}
+
+
+def parse_outputs(spec):
+    """Split a callback output spec ('a.figure' or '..a.figure...b.data..') into (id, prop) pairs."""
+    parts = spec[2:-2].split('...') if spec.startswith('..') else [spec]
+    outputs = []
+    for part in parts:
+        component_id, prop = part.rsplit('.', 1)
+        outputs.append((component_id, prop.split('@')[0]))
+    return outputs
+
+
+def walk_components(tree, found=None):
+    """Collect {(id, prop): value} for every component with an id in a layout tree."""
+    found = {} if found is None else found
+    if isinstance(tree, list):
+        for child in tree:
+            walk_components(child, found)
+    elif isinstance(tree, dict) and 'props' in tree:
+        props = tree['props']
+        component_id = props.get('id')
+        if isinstance(component_id, str):
+            for prop, value in props.items():
+                if prop != 'children' or not isinstance(value, (dict, list)):
+                    found[(component_id, prop)] = value
+            found.setdefault((component_id, 'n_clicks'), props.get('n_clicks'))
+        walk_components(props.get('children'), found)
+    return found
+
+
+def find_locations(tree):
+    """Ids of the dcc.Location components in a layout tree."""
+    if isinstance(tree, list):
+        return [i for child in tree for i in find_locations(child)]
+    if isinstance(tree, dict) and 'props' in tree:
+        found = [tree['props']['id']] if tree.get('type') == 'Location' else []
+        return found + find_locations(tree['props'].get('children'))
+    return []
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, int(round(q / 100 * len(ordered) + 0.5)) - 1))]
+
+
+def read_rss(pid):
+    """Resident memory (bytes) of a process and its children, from /proc; None where unavailable."""
+    total = None
+    pids = [pid]
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as f:
+            pids += [int(p) for p in f.read().split()]
+    except OSError:
+        pass
+    for p in pids:
+        try:
+            with open(f'/proc/{p}/status') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        total = (total or 0) + int(line.split()[1]) * 1024
+        except OSError:
+            continue
+    return total
+
+
+class Recorder:
+    """Thread-safe collection of request latencies and outcomes per callback."""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.prevented = defaultdict(int)
+        self.wire_bytes = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds, status, wire_bytes=0):
+        with self._lock:
+            self.samples[name].append(seconds * 1000)
+            self.wire_bytes[name] += wire_bytes
+            if status == 204:
+                self.prevented[name] += 1
+            elif status != 200:
+                self.errors[name] += 1
+
+
+class Session:
+    """One simulated browser tab."""
+
+    def __init__(self, name, host, port, dependencies, recorder, rng, think_ms):
+        self.name = name
+        self.seq = 0
+        self.conn = http.client.HTTPConnection(host, port, timeout=300)
+        self.callbacks = dependencies
+        self.recorder = recorder
+        self.rng = rng
+        self.think_ms = think_ms
+        self.props = {}
+
+    def request(self, name, method, path, body=None):
+        headers = {'Accept-Encoding': 'gzip'}
+        if body is not None:
+            headers['Content-Type'] = 'application/json'
+        started = time.perf_counter()
+        try:
+            self.conn.request(method, path, body=None if body is None else json.dumps(body), headers=headers)
+            response = self.conn.getresponse()
+            data = response.read()
+            status = response.status
+            wire_bytes = len(data)
+            if response.getheader('Content-Encoding') == 'gzip':
+                data = gzip.decompress(data)
+        except (OSError, http.client.HTTPException):
+            self.conn.close()
+            data, status, wire_bytes = b'', 0, 0
+        self.recorder.record(name, time.perf_counter() - started, status, wire_bytes)
+        return status, data
+
+    def load(self, path):
+        """Load a page: index, layout and every initial callback of the new components."""
+        self.request(f'GET {path}', 'GET', path)
+        status, data = self.request('GET /_dash-layout', 'GET', '/_dash-layout')
+        layout = json.loads(data) if status == 200 else None
+        self.props = walk_components(layout)
+        for component_id in find_locations(layout):
+            self.props[(component_id, 'pathname')] = path
+        self.fire(set(self.props), initial=True)
+
+    def present(self, component_id):
+        return any(key[0] == component_id for key in self.props)
+
+    def fire(self, changed, initial=False):
+        """Run the callbacks triggered by `changed` props, then the ones their outputs trigger."""
+        queue = deque([(set(changed), initial)])
+        while queue:
+            changed, initial = queue.popleft()
+            for callback in self.callbacks:
+                if initial and callback.get('prevent_initial_call'):
+                    continue
+                inputs = [(i['id'], i['property']) for i in callback['inputs']]
+                triggered = [key for key in inputs if key in changed]
+                if not triggered or not all(self.present(i) for i, _ in inputs):
+                    continue
+                outputs = parse_outputs(callback['output'])
+                if not all(self.present(i) for i, _ in outputs):
+                    continue
+                updated, added = self.run_callback(callback, inputs, outputs, triggered)
+                if updated:
+                    queue.append((updated, False))
+                if added:
+                    # 새로 그려진 컴포넌트는 초기 렌더링처럼 콜백을 부른다
+                    queue.append((added, True))
+
+    def run_callback(self, callback, inputs, outputs, triggered):
+        state = [(s['id'], s['property']) for s in callback['state']]
+        clientside = callback.get('clientside_function')
+        if clientside:
+            emulate = CLIENTSIDE.get((clientside['namespace'], clientside['function_name']))
+            if emulate is None:
+                return set(), set()
+            values = emulate(self, [self.props.get(k) for k in inputs], [self.props.get(k) for k in state])
+            return self.apply(dict(zip(outputs, values)))
+
+        def spec(key):
+            return {'id': key[0], 'property': key[1]}
+        multi = callback['output'].startswith('..')
+        body = {
+            'output': callback['output'],
+            'outputs': [spec(k) for k in outputs] if multi else spec(outputs[0]),
+            'inputs': [dict(spec(k), value=self.props.get(k)) for k in inputs],
+            'state': [dict(spec(k), value=self.props.get(k)) for k in state],
+            'changedPropIds': [f'{i}.{p}' for i, p in triggered],
+        }
+        name = callback['output'].split('...')[0].strip('.').split('@')[0]
+        status, data = self.request(name, 'POST', '/_dash-update-component', body)
+        if status != 200:
+            return set(), set()
+        response = json.loads(data).get('response', {})
+        return self.apply({(i, p): value for i, props in response.items() for p, value in props.items()})
+
+    def apply(self, values):
+        """Store callback outputs and return (changed props, props of newly rendered components)."""
+        changed, added = set(), set()
+        for key, value in values.items():
+            if value is NO_UPDATE or (isinstance(value, dict) and '__dash_patch_update' in value):
+                continue
+            self.props[key] = value
+            changed.add(key)
+            if key[1] == 'children' and isinstance(value, (dict, list)):
+                components = walk_components(value)
+                self.props.update(components)
+                added |= set(components)
+        return changed, added
+
+    def think(self):
+        time.sleep(self.think_ms * self.rng.uniform(0.5, 1.5) / 1000)
+
+    def run(self, steps):
+        for step in steps:
+            kind = step[0]
+            if kind == 'load':
+                self.load(step[1])
+            elif kind == 'set':
+                _, component_id, prop, choices = step
+                self.props[(component_id, prop)] = self.rng.choice(choices)
+                self.fire({(component_id, prop)})
+            elif kind == 'click':
+                key = (step[1], 'n_clicks')
+                self.props[key] = (self.props.get(key) or 0) + 1
+                self.fire({key})
+            elif kind == 'drag':
+                _, component_id, (first, last), count = step
+                first, last = datetime.date.fromisoformat(first), datetime.date.fromisoformat(last)
+                days = (last - first).days
+                for _ in range(count):
+                    start = self.rng.randrange(0, days // 2)
+                    end = self.rng.randrange(start + 1, days + 1)
+                    self.props[(component_id, 'start_date')] = str(first + datetime.timedelta(days=start))
+                    self.props[(component_id, 'end_date')] = str(first + datetime.timedelta(days=end))
+                # 클라이언트 디바운스로 중간 값은 서버에 가지 않는다
+                self.fire({(component_id, 'start_date'), (component_id, 'end_date')})
+            self.think()
+        self.conn.close()
+
+
+def start_server(target, port):
+    """Start an app locally (no debug reloader, file watcher off) and wait until it serves pages."""
+    spec = TARGETS[target]
+    code = (f"import {spec['module']} as m; "
+            f"m.app.run_server(host='127.0.0.1', port={port}, debug=False, threaded=True)")
+    env = dict(os.environ, CARGO_RELOAD_INTERVAL='0')
+    process = subprocess.Popen([sys.executable, '-c', code], cwd=spec['cwd'], env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 300
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'{target} exited with code {process.returncode}')
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+            conn.request('GET', '/_dash-dependencies')
+            if conn.getresponse().status == 200:
+                return process
+        except OSError:
+            time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError(f'{target} did not start on port {port}')
+
+
+def run_load_test(target, sessions=4, iterations=2, seed=0, think_ms=200, host='127.0.0.1',
+                  port=None, pid=None):
+    """Replay the target's scenario from concurrent sessions and summarize the results.
+
+    Starts the app unless `port` points at one already running (pass its
+    `pid` to sample its memory).
+    """
+    process = None
+    if port is None:
+        port = TARGETS[target]['port']
+        process = start_server(target, port)
+        pid = process.pid
+    try:
+        conn = http.client.HTTPConnection(host, port, timeout=30)
+        conn.request('GET', '/_dash-dependencies')
+        dependencies = json.loads(conn.getresponse().read())
+        recorder = Recorder()
+        rss = []
+        done = threading.Event()
+
+        def sample_memory():
+            while not done.is_set():
+                value = read_rss(pid) if pid else None
+                if value is not None:
+                    rss.append(value)
+                done.wait(0.5)
+
+        def run_session(index):
+            rng = random.Random(seed * 1000 + index)
+            for iteration in range(iterations):
+                session = Session(f'loadtest-{seed}-{index}-{iteration}', host, port, dependencies,
+                                  recorder, rng, think_ms)
+                session.run(SCENARIOS[target])
+
+        sampler = threading.Thread(target=sample_memory, daemon=True)
+        sampler.start()
+        started = time.perf_counter()
+        workers = [threading.Thread(target=run_session, args=(i,)) for i in range(sessions)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - started
+        done.set()
+        sampler.join()
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    callbacks = {}
+    for name, samples in sorted(recorder.samples.items()):
+        callbacks[name] = {
+            'requests': len(samples),
+            'errors': recorder.errors[name],
+            'prevented': recorder.prevented[name],
+            'p50_ms': percentile(samples, 50),
+            'p95_ms': percentile(samples, 95),
+            'p99_ms': percentile(samples, 99),
+            'mean_kb': recorder.wire_bytes[name] / len(samples) / 1024,
+        }
+    total = sum(c['requests'] for c in callbacks.values())
+    errors = sum(c['errors'] for c in callbacks.values())
+    return {
+        'target': target,
+        'sessions': sessions,
+        'iterations': iterations,
+        'seed': seed,
+        'elapsed_s': elapsed,
+        'requests': total,
+        'throughput_rps': total / elapsed if elapsed else 0.0,
+        'error_rate': errors / total if total else 0.0,
+        'rss_start_mb': rss[0] / 2 ** 20 if rss else None,
+        'rss_peak_mb': max(rss) / 2 ** 20 if rss else None,
+        'rss_end_mb': rss[-1] / 2 ** 20 if rss else None,
+        'callbacks': callbacks,
+    }
+
+
+def format_report(result):
+    lines = [
+        f"{result['target']}: {result['sessions']} sessions x {result['iterations']} iterations (seed {result['seed']})",
+        f"requests {result['requests']} in {result['elapsed_s']:.1f} s · {result['throughput_rps']:.1f} req/s · "
+        f"errors {100 * result['error_rate']:.2f}%",
+    ]
+    if result['rss_peak_mb'] is not None:
+        lines.append(f"worker RSS start {result['rss_start_mb']:.0f} MB · peak {result['rss_peak_mb']:.0f} MB · "
+                     f"end {result['rss_end_mb']:.0f} MB")
+    lines.append(f"{'callback':40} {'count':>6} {'err':>4} {'204':>4} {'p50':>8} {'p95':>8} {'p99':>8} {'KB':>7}  (ms, mean KB on the wire)")
+    for name, c in result['callbacks'].items():
+        lines.append(f"{name[:40]:40} {c['requests']:>6} {c['errors']:>4} {c['prevented']:>4} "
+                     f"{c['p50_ms']:>8.1f} {c['p95_ms']:>8.1f} {c['p99_ms']:>8.1f} {c['mean_kb']:>7.1f}")
+    return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Replay concurrent Dash callback traffic against a local app.')
+    parser.add_argument('target', choices=sorted(TARGETS))
+    parser.add_argument('--sessions', type=int, default=4, help='concurrent simulated sessions')
+    parser.add_argument('--iterations', type=int, default=2, help='scenario runs per session')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--think-ms', type=float, default=200, help='mean pause between steps')
+    parser.add_argument('--port', type=int, help='use an app already running on this port')
+    parser.add_argument('--pid', type=int, help='process id of the running app, for memory sampling')
+    parser.add_argument('--json', help='also write the results to this file')
+    args = parser.parse_args()
+
+    result = run_load_test(args.target, args.sessions, args.iterations, args.seed, args.think_ms,
+                           port=args.port, pid=args.pid)
+    print(format_report(result))
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
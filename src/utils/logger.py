@@ -0,0 +1,80 @@
+import json
+import logging
+import os
+import random
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+# 환경 변수로 로그 레벨과 샘플링 비율을 제어
+LOG_LEVEL = os.environ.get('CARGO_LOG_LEVEL', 'WARNING').upper()
+LOG_SAMPLE_RATE = float(os.environ.get('CARGO_LOG_SAMPLE_RATE', '1.0'))
+
+_sample_rate = LOG_SAMPLE_RATE
+
+
+class StructuredFormatter(logging.Formatter):
+    """Format log records as one JSON object per line."""
+
+    def format(self, record):
+        payload = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'event': record.getMessage(),
+        }
+        payload.update(getattr(record, 'fields', {}))
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+def get_logger(name='cargo.data'):
+    """Get a logger that writes structured events to stderr."""
+    logger = logging.getLogger(name)
+    root = logging.getLogger('cargo')
+    if not root.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(StructuredFormatter())
+        root.addHandler(handler)
+        root.setLevel(LOG_LEVEL)
+        root.propagate = False
+    return logger
+
+
+def set_log_level(level, sample_rate=None):
+    """Change the level (and optionally the sampling rate) at runtime."""
+    global _sample_rate
+    get_logger()
+    logging.getLogger('cargo').setLevel(level.upper() if isinstance(level, str) else level)
+    if sample_rate is not None:
+        _sample_rate = float(sample_rate)
+
+
+def log_event(logger, event, level=logging.INFO, sample_rate=None, **fields):
+    """Emit a structured event if the level is enabled and the event is sampled.
+
+    Warnings and errors are never sampled out.
+    """
+    if not logger.isEnabledFor(level):
+        return
+    rate = _sample_rate if sample_rate is None else sample_rate
+    if level < logging.WARNING and rate < 1.0 and random.random() >= rate:
+        return
+    logger.log(level, event, extra={'fields': fields})
+
+
+@contextmanager
+def log_timing(logger, event, level=logging.INFO, **fields):
+    """Time a block and emit `event` with `duration_ms` plus any fields added to the yielded dict.
+
+    If the block raises, `event` is not emitted; `<event>_failed` is logged at
+    ERROR with the exception instead and the exception propagates.
+    """
+    start = time.perf_counter()
+    try:
+        yield fields
+    except Exception as exc:
+        fields['duration_ms'] = round((time.perf_counter() - start) * 1000, 2)
+        log_event(logger, f'{event}_failed', level=logging.ERROR, error=repr(exc), **fields)
+        raise
+    fields['duration_ms'] = round((time.perf_counter() - start) * 1000, 2)
+    log_event(logger, event, level=level, **fields)
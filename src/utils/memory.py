@@ -0,0 +1,195 @@
+import datetime
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import OrderedDict, deque
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from flask import abort, g, jsonify, request
+from utils.logger import get_logger, log_event
+
+logger = get_logger('cargo.app.memory')
+
+# CARGO_TRACEMALLOC=<프레임 수>이면 시작부터 콜백마다 할당 위치를 추적한다 (0이면 끔, 진단 페이지에서 켤 수 있다)
+TRACE_FRAMES = int(os.environ.get('CARGO_TRACEMALLOC', '0') or 0)
+DEFAULT_TRACE_FRAMES = 5
+
+# 콜백마다 보고하는 상위 할당 위치 수와 보관하는 최근 보고 수
+TOP_SITES = 10
+TRACE_HISTORY = 50
+
+# 추적에서 제외하는 할당 (추적기 자신과 import)
+TRACE_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>'),
+)
+
+LOCAL_ADDRESSES = ('127.0.0.1', '::1')
+
+_layers = OrderedDict()
+_traces = deque(maxlen=TRACE_HISTORY)
+_traces_lock = threading.Lock()
+
+
+def memory_layer(name):
+    """Register a cache layer for memory reports.
+
+    The decorated function returns {entry name: object} for the layer's
+    current contents; it is only called when a report is made.
+    """
+    def register(entries):
+        _layers[name] = entries
+        return entries
+    return register
+
+
+def deep_size(obj, _seen=None):
+    """Approximate bytes held by an object, following what it references.
+
+    pandas objects count their buffers (object columns deeply), NumPy
+    arrays their data, figures their JSON form, and containers and plain
+    objects their contents. Objects reached twice are counted once.
+    """
+    seen = set() if _seen is None else _seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(index=True, deep=True).sum())
+    if isinstance(obj, (pd.Series, pd.Index)):
+        return int(obj.memory_usage(deep=True))
+    if isinstance(obj, pd.Categorical):
+        return int(obj.nbytes)
+    if isinstance(obj, np.ndarray):
+        # 다른 배열의 view는 원본이 이미 센 버퍼를 가리킨다
+        return sys.getsizeof(obj) + (obj.nbytes if obj.base is None else 0)
+    if isinstance(obj, go.Figure):
+        return deep_size(obj.to_plotly_json(), seen)
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_size(key, seen) + deep_size(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+        size += sum(deep_size(value, seen) for value in obj)
+    elif hasattr(obj, '__dict__') and not isinstance(obj, type) and not callable(obj):
+        size += deep_size(vars(obj), seen)
+    return size
+
+
+def process_memory():
+    """Current and peak resident memory of this process in bytes (None where /proc is unavailable)."""
+    fields = {'VmRSS:': 'rss_bytes', 'VmHWM:': 'peak_rss_bytes'}
+    usage = dict.fromkeys(fields.values())
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                key = line.split(maxsplit=1)[0]
+                if key in fields:
+                    usage[fields[key]] = int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return usage
+
+
+def memory_report():
+    """Deep memory usage of every registered cache layer and its entries, largest first."""
+    started = time.perf_counter()
+    layers = []
+    for name, entries in list(_layers.items()):
+        try:
+            items = entries()
+        except Exception as e:
+            log_event(logger, 'memory_layer_error', layer=name, error=str(e))
+            continue
+        rows = sorted(({'entry': str(key), 'type': type(obj).__name__, 'bytes': deep_size(obj)}
+                       for key, obj in items.items()), key=lambda row: -row['bytes'])
+        layers.append({'layer': name, 'entries': rows, 'bytes': sum(row['bytes'] for row in rows)})
+    layers.sort(key=lambda layer: -layer['bytes'])
+    report = dict(process_memory(), layers=layers, tracing=tracemalloc.is_tracing(),
+                  pid=os.getpid(), ms=round(1000 * (time.perf_counter() - started), 1))
+    if tracemalloc.is_tracing():
+        report['traced_bytes'], report['traced_peak_bytes'] = tracemalloc.get_traced_memory()
+    log_event(logger, 'memory_report', rss=report['rss_bytes'], cached=sum(layer['bytes'] for layer in layers),
+              ms=report['ms'])
+    return report
+
+
+def start_tracing(frames=None):
+    """Start recording allocation sites; callbacks then report their top allocations."""
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames or TRACE_FRAMES or DEFAULT_TRACE_FRAMES)
+        log_event(logger, 'tracing_started', frames=tracemalloc.get_traceback_limit())
+
+
+def stop_tracing():
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+        log_event(logger, 'tracing_stopped')
+
+
+def recent_traces():
+    """Allocation reports of the most recent traced callbacks, newest first."""
+    with _traces_lock:
+        return list(reversed(_traces))
+
+
+def _is_callback_request():
+    return request.method == 'POST' and request.path.endswith('/_dash-update-component')
+
+
+def _snapshot():
+    return tracemalloc.take_snapshot().filter_traces(TRACE_FILTERS)
+
+
+def _before_callback():
+    if tracemalloc.is_tracing() and _is_callback_request():
+        g.memory_snapshot = _snapshot()
+
+
+def _after_callback(response):
+    before = g.pop('memory_snapshot', None)
+    if before is None or not tracemalloc.is_tracing():
+        return response
+    # 스레드 서버에서는 동시에 처리된 다른 요청의 할당도 섞인다
+    stats = _snapshot().compare_to(before, 'lineno')
+    top = [{'site': f'{stat.traceback[0].filename}:{stat.traceback[0].lineno}',
+            'size_diff': stat.size_diff, 'count_diff': stat.count_diff}
+           for stat in stats[:TOP_SITES] if stat.size_diff]
+    callback = (request.get_json(silent=True) or {}).get('output')
+    record = {'callback': callback, 'time': datetime.datetime.now().isoformat(timespec='seconds'),
+              'allocated_bytes': sum(stat.size_diff for stat in stats if stat.size_diff > 0),
+              'retained_bytes': sum(stat.size_diff for stat in stats), 'top': top}
+    with _traces_lock:
+        _traces.append(record)
+    log_event(logger, 'callback_allocations', callback=callback, allocated=record['allocated_bytes'],
+              retained=record['retained_bytes'], top=top[:3])
+    return response
+
+
+def is_local_request():
+    # 캐시 내용과 할당 위치(파일 경로)가 드러나므로 진단은 로컬 요청에만 보인다
+    return request.remote_addr in LOCAL_ADDRESSES
+
+
+def _memory_endpoint():
+    if not is_local_request():
+        abort(403)
+    if request.args.get('trace') == 'on':
+        start_tracing()
+    elif request.args.get('trace') == 'off':
+        stop_tracing()
+    return jsonify(dict(memory_report(), traces=recent_traces()))
+
+
+def register_memory_diagnostics(server):
+    """Serve /diagnostics/memory (local requests only) and trace callbacks when tracing is on."""
+    server.before_request(_before_callback)
+    server.after_request(_after_callback)
+    server.add_url_rule('/diagnostics/memory', 'memory_diagnostics', _memory_endpoint)
+    if TRACE_FRAMES:
+        start_tracing(TRACE_FRAMES)
+    return server
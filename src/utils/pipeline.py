@@ -0,0 +1,175 @@
+import hashlib
+import threading
+import time
+import pandas as pd
+import plotly.graph_objects as go
+from utils.ingest import partition_store, manifest_digest
+from utils.logger import get_logger, log_event
+from utils.memory import memory_layer
+from utils.query import dataset_columns, dataset_rows, get_data_version, run_query, PRIMARY_MEASURES
+
+logger = get_logger('cargo.data.pipeline')
+
+# 원본 데이터 노드 이름 (데이터셋별로 다르게 표시)
+RAW_LABELS = {
+    'cargo': '원본 데이터',
+    'vehicle': '차종별 데이터',
+    'fatal': '사망사고 데이터',
+}
+
+
+class PipelineNode:
+    """One stage of a pipeline and the state of its last run."""
+
+    def __init__(self, name, label, func, inputs=()):
+        self.name = name
+        self.label = label
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.fingerprint = None
+        self.output = None
+        self.status = 'pending'
+        self.runtime_ms = None
+        self.rows = None
+
+
+class Pipeline:
+    """Executable DAG whose node outputs are memoized by input fingerprint.
+
+    Root nodes are fingerprinted by `source()`; every other node by its own
+    name and its inputs' fingerprints, so only nodes downstream of a change
+    recompute.
+    """
+
+    def __init__(self, name, source):
+        self.name = name
+        self.source = source
+        self.nodes = {}
+        self._lock = threading.Lock()
+
+    def add_node(self, name, label, func, inputs=()):
+        for dep in inputs:
+            if dep not in self.nodes:
+                raise ValueError(f"Unknown pipeline input: {dep}")
+        self.nodes[name] = PipelineNode(name, label, func, inputs)
+        return self.nodes[name]
+
+    def edges(self):
+        return [(dep, name) for name, node in self.nodes.items() for dep in node.inputs]
+
+    def _upstream(self, target):
+        # 노드는 입력보다 나중에 추가되므로 추가 순서가 곧 위상 순서
+        if target is None:
+            return list(self.nodes)
+        needed = {target}
+        for name in reversed(list(self.nodes)):
+            if name in needed:
+                needed.update(self.nodes[name].inputs)
+        return [name for name in self.nodes if name in needed]
+
+    def run(self, target=None):
+        """Run the nodes `target` depends on (default: all), recomputing only stale ones.
+
+        Returns the output of `target`, or of the last node.
+        """
+        with self._lock:
+            fingerprints = {}
+            order = self._upstream(target)
+            for name in order:
+                node = self.nodes[name]
+                parts = [fingerprints[dep] for dep in node.inputs] if node.inputs else [self.source()]
+                fingerprint = hashlib.sha1(repr((name, parts)).encode('utf-8')).hexdigest()
+                fingerprints[name] = fingerprint
+                if fingerprint == node.fingerprint:
+                    node.status = 'cached'
+                    continue
+                start = time.perf_counter()
+                node.output = node.func(*[self.nodes[dep].output for dep in node.inputs])
+                node.runtime_ms = round((time.perf_counter() - start) * 1000, 2)
+                node.rows = row_count(node.output)
+                node.fingerprint = fingerprint
+                node.status = 'computed'
+                log_event(logger, 'pipeline_node_run', pipeline=self.name, node=name,
+                          duration_ms=node.runtime_ms, rows=node.rows)
+            return self.nodes[order[-1]].output if order else None
+
+    def stats(self):
+        """Get the last runtime, cache status and row count of every node."""
+        return [
+            {'node': node.name, 'label': node.label, 'status': node.status,
+             'runtime_ms': node.runtime_ms, 'rows': node.rows}
+            for node in self.nodes.values()
+        ]
+
+
+def row_count(output):
+    """Rows of a stage output: the length of a frame, or the count a stage returns as an int."""
+    if isinstance(output, (pd.DataFrame, pd.Series)):
+        return len(output)
+    return output if isinstance(output, int) else None
+
+
+def loaded_fingerprint(data_type):
+    """Fingerprint what the app currently serves: the ingested manifest and the query-layer version.
+
+    Only reads the manifest file; ingestion and reloads happen elsewhere.
+    """
+    return manifest_digest(partition_store.read_manifest(data_type)), get_data_version(data_type)
+
+
+def source_rows(data_type):
+    """Rows read from the source files at ingest, including quarantined ones, from the manifest."""
+    return sum(entry.get('quality', {}).get('rows', entry['rows'])
+               for entry in partition_store.read_manifest(data_type).values())
+
+
+def aggregate_by_date(data_type, measure):
+    if 'date' not in dataset_columns(data_type):
+        return pd.DataFrame(columns=['date', measure])
+    return run_query(data_type, group_by=['date'], measures=[measure])
+
+
+def build_figure(df, measure):
+    fig = go.Figure(go.Scatter(x=df['date'], y=df[measure], mode='lines+markers'))
+    fig.update_layout(template='plotly_white')
+    return fig
+
+
+def build_pipeline(data_type):
+    """Build the raw load → preprocessing → aggregation → visualization pipeline of a dataset.
+
+    The stages report on the data the app serves rather than loading it again:
+    source rows come from the ingest manifest, the prepared frame and the
+    daily aggregate from the query layer, so the stages keep row counts, the
+    (cached, shared) query result and the figure - no copies of the dataset.
+    """
+    measure = PRIMARY_MEASURES[data_type]
+    pipeline = Pipeline(data_type, lambda: loaded_fingerprint(data_type))
+    pipeline.add_node('raw_data', RAW_LABELS[data_type], lambda: source_rows(data_type))
+    pipeline.add_node('preprocessing', '전처리',
+                      lambda rows: dataset_rows(data_type), inputs=['raw_data'])
+    pipeline.add_node('aggregation', '집계',
+                      lambda rows: aggregate_by_date(data_type, measure), inputs=['preprocessing'])
+    pipeline.add_node('visualization', '시각화',
+                      lambda df: build_figure(df, measure), inputs=['aggregation'])
+    return pipeline
+
+
+_pipelines = {}
+_pipelines_lock = threading.Lock()
+
+
+def get_pipeline(data_type):
+    with _pipelines_lock:
+        if data_type not in _pipelines:
+            _pipelines[data_type] = build_pipeline(data_type)
+        return _pipelines[data_type]
+
+
+@memory_layer('pipeline.outputs')
+def _output_entries():
+    # 단계마다 마지막 출력(행 수, 질의 계층과 함께 쓰는 일별 집계, 그림)을 들고 있다
+    with _pipelines_lock:
+        pipelines = list(_pipelines.values())
+    return {f'{pipeline.name}/{node.name}': node.output
+            for pipeline in pipelines for node in pipeline.nodes.values() if node.output is not None}
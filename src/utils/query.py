@@ -0,0 +1,839 @@
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from utils.cache import get_cached_data
+from utils.data_loader import SOURCE_DIRS
+from utils.data_processor import process_cargo_data, process_vehicle_data, process_fatal_data
+from utils.ingest import (on_partitions_changed, ingest_dataset, iter_dataset, load_long_dataset,
+                          load_correlation_stats, partition_store, MANIFEST_VERSION)
+from utils.correlation import correlation_matrix, STAT_COLUMNS
+from utils.derived import build_derived_measures, DerivedIndex, SERIES_KEYS, DERIVED_MEASURES
+from utils.hotspots import refresh_hotspots
+from utils.routes import load_route_segments, load_rest_area_gaps
+from utils.schema import concat_long, TOTAL_DIMENSION, TOTAL_VALUE
+from utils.sql_engine import get_engine, QUERY_ENGINE, FETCH_CHUNK
+from utils.logger import get_logger, log_event, log_timing
+from utils.memory import memory_layer
+
+logger = get_logger('cargo.data.query')
+
+# 페이지마다 다르게 부르던 측정값 이름을 표준 이름으로 통일
+MEASURE_ALIASES = {
+    '발생건수': 'accident_count',
+    'accidents': 'accident_count',
+    'count': 'accident_count',
+    '사망자수': 'fatal_count',
+    'fatal_accidents': 'fatal_count',
+    '치사율(%)': 'fatal_rate',
+}
+
+# 데이터셋별 기본 측정값
+PRIMARY_MEASURES = {
+    'cargo': 'accident_count',
+    'vehicle': 'accident_count',
+    'fatal': 'fatal_count',
+}
+
+# 사고 유형 보기에 쓰는 표준 차원
+TYPE_DIMENSIONS = {
+    'cargo': 'accident_type',
+    'vehicle': 'vehicle_type',
+    'fatal': 'accident_type',
+}
+
+# 표준 long 테이블을 구성하는 원본 데이터셋
+CANONICAL_SOURCES = ('cargo', 'vehicle', 'fatal')
+
+# 롤업에서 다시 계산할 수 있는 집계 (mean = sum / 값이 있는 행 수)
+ROLLUP_AGGS = ('sum', 'count', 'mean')
+# 롤업에서 측정값별로 값이 있는 행 수를 담는 컬럼의 접두어
+ROLLUP_COUNT_PREFIX = '_count_'
+SUPPORTED_AGGS = ROLLUP_AGGS + ('max', 'min')
+
+# 기간 비교의 기준 기간: 직전 같은 길이의 기간 / 전년 같은 기간
+COMPARE_BASELINES = ('previous', 'year')
+
+RESULT_CACHE_SIZE = 256
+
+_datasets = {}
+_versions = {}
+_frames = {}
+_rollups = {}
+_result_cache = OrderedDict()
+_derived_index = {}
+_lock = threading.RLock()
+_refresh_lock = threading.RLock()
+
+
+def register_dataset(name, loader, dimensions, measures, rename=None, rollup_grain=None, sources=None,
+                     chunks=None):
+    """Register a dataset the query layer can serve.
+
+    `loader()` returns the row-level frame, `rename` maps source column
+    names to canonical ones, and `rollup_grain` ('MS' for months) coarsens
+    the date of the rollup cube; None keeps the native date grain.
+    `sources` lists the ingested datasets it is built from (default: `name`).
+    `chunks()`, if given, yields the same rows one partition at a time, so
+    a SQL engine can load the dataset without building the whole frame.
+    """
+    with _lock:
+        _datasets[name] = {
+            'loader': loader,
+            'dimensions': list(dimensions),
+            'measures': list(measures),
+            'rename': dict(rename or {}),
+            'rollup_grain': rollup_grain,
+            'sources': tuple(sources or (name,)),
+            'chunks': chunks,
+        }
+        invalidate_dataset(name)
+
+
+def invalidate_dataset(name):
+    """Drop the prepared frame, rollup and cached results of a dataset."""
+    with _lock:
+        _versions[name] = _versions.get(name, 0) + 1
+        _frames.pop(name, None)
+        _rollups.pop(name, None)
+        for key in [key for key in _result_cache if key[0] == name]:
+            del _result_cache[key]
+
+
+@on_partitions_changed
+def _refresh_on_ingest(data_type, years):
+    # 등록 순서대로 다시 만들어 파생 데이터셋이 새 원본 프레임을 읽게 한다
+    for name, spec in list(_datasets.items()):
+        if data_type in spec['sources']:
+            refresh_dataset(name)
+
+
+def get_data_version(name):
+    return _versions.get(name, 0)
+
+
+def canonical_measure(measure):
+    return MEASURE_ALIASES.get(measure, measure)
+
+
+def _build_frame(spec):
+    return _prepare(spec, spec['loader']())
+
+
+def _prepare(spec, df):
+    df = df.rename(columns=spec['rename'])
+    return df.rename(columns={col: canonical_measure(col) for col in df.columns
+                              if canonical_measure(col) in spec['measures']})
+
+
+def _build_sql_rollup(backend, name):
+    # 월 단위 롤업은 날짜 대신 테이블의 year/month로 묶고 월 첫날로 되돌린다
+    spec = _datasets[name]
+    engine, fingerprint, load = _sql_table(backend, name)
+    kinds = engine.ensure_table(name, fingerprint, load)
+    dims = [dim for dim in spec['dimensions'] if dim in kinds and dim not in ('year', 'month')]
+    measures = [m for m in spec['measures'] if m in kinds]
+    by_month = bool(spec['rollup_grain']) and 'date' in dims and 'year' in kinds
+    group_by = [dim for dim in dims if not (by_month and dim == 'date')] + (['year', 'month'] if by_month else [])
+    cube = engine.query(name, fingerprint, load, [], group_by,
+                        [(m, agg) for m in measures for agg in ('sum', 'count')])
+    cube = cube.rename(columns={f'{m}_count': ROLLUP_COUNT_PREFIX + m for m in measures})
+    if by_month:
+        cube.insert(len(group_by) - 2, 'date', pd.to_datetime(
+            cube[['year', 'month']].assign(day=1), errors='coerce'))
+    elif 'date' in cube.columns:
+        cube['year'] = cube['date'].dt.year
+        cube['month'] = cube['date'].dt.month
+    return cube
+
+
+def _build_rollup(spec, df):
+    dims = [dim for dim in spec['dimensions'] if dim in df.columns and dim not in ('year', 'month')]
+    measures = [m for m in spec['measures'] if m in df.columns]
+    keys = df[dims].copy()
+    if spec['rollup_grain'] and 'date' in keys.columns:
+        keys['date'] = pd.to_datetime(keys['date']).dt.to_period('M').dt.to_timestamp()
+    values = df[measures].apply(pd.to_numeric, errors='coerce')
+    # 결측 측정값은 건수와 평균의 분모에서 뺀다 (원본 행의 count/mean과 같게)
+    values = pd.concat([values, values.notna().astype(np.int64).add_prefix(ROLLUP_COUNT_PREFIX)], axis=1)
+    cube = values.groupby([keys[dim] for dim in dims], dropna=False, observed=True).sum().reset_index()
+    if 'date' in cube.columns:
+        cube['year'] = cube['date'].dt.year
+        cube['month'] = cube['date'].dt.month
+    return cube
+
+
+def get_frame(name):
+    """Get the prepared row-level frame of a dataset.
+
+    A missing frame is built outside `_lock`: loaders may ingest sources,
+    whose listeners refresh datasets. Like `refresh_dataset`, building takes
+    `_refresh_lock` before `_lock`, so the two serialize instead of
+    deadlocking.
+    """
+    with _lock:
+        if name in _frames:
+            return _frames[name]
+    with _refresh_lock:
+        with _lock:
+            if name in _frames:
+                return _frames[name]
+            spec = _datasets[name]
+        df = _build_frame(spec)
+        with _lock:
+            return _frames.setdefault(name, df)
+
+
+def iter_frames(name):
+    """Yield a dataset's prepared rows in pieces, without keeping them in the query layer.
+
+    Yields the loaded frame if there is one, else one partition at a time for
+    datasets registered with `chunks`, else the loader's whole frame.
+    """
+    with _lock:
+        spec = _datasets[name]
+        loaded = _frames.get(name)
+    if loaded is not None:
+        yield loaded
+        return
+    empty = True
+    for df in spec['chunks']() if spec['chunks'] is not None else ():
+        empty = False
+        yield _prepare(spec, df)
+    if empty:
+        # 파티션이 없으면 로더가 만드는 (빈) 프레임으로 컬럼을 알린다
+        yield _build_frame(spec)
+
+
+def get_rollup(name):
+    """Get the rollup cube: measure sums and non-null counts over every dimension.
+
+    With a SQL engine the cube is grouped in the engine, so the row-level
+    frame is not loaded.
+    """
+    with _lock:
+        if name in _rollups:
+            return _rollups[name]
+    if QUERY_ENGINE != 'pandas':
+        version = get_data_version(name)
+        cube = _build_sql_rollup(QUERY_ENGINE, name)
+        with _lock:
+            # 그 사이 데이터셋이 바뀌었으면 이전 자료로 만든 큐브는 두지 않는다
+            if get_data_version(name) == version:
+                cube = _rollups.setdefault(name, cube)
+        log_event(logger, 'rollup_built', dataset=name, plan=QUERY_ENGINE, cube_rows=len(cube))
+        return cube
+    with _refresh_lock:
+        df = get_frame(name)
+        with _lock:
+            if name in _rollups:
+                return _rollups[name]
+            spec = _datasets[name]
+        cube = _build_rollup(spec, df)
+        with _lock:
+            cube = _rollups.setdefault(name, cube)
+        log_event(logger, 'rollup_built', dataset=name, rows=len(df), cube_rows=len(cube))
+        return cube
+
+
+def refresh_dataset(name):
+    """Rebuild a loaded dataset off to the side, then swap it in with a new version.
+
+    Queries that already hold the old frame finish on it; their results are
+    cached under the old version, so later queries only see the new data.
+    A dataset that was never loaded is just invalidated.
+    """
+    with _refresh_lock:
+        with _lock:
+            spec = _datasets[name]
+            loaded, had_rollup = name in _frames, name in _rollups
+        if not loaded:
+            invalidate_dataset(name)
+            return get_data_version(name)
+        with log_timing(logger, 'dataset_refreshed', dataset=name) as event:
+            df = _build_frame(spec)
+            cube = _build_rollup(spec, df) if had_rollup else None
+            event['rows'] = len(df)
+        with _lock:
+            _frames[name] = df
+            if cube is not None:
+                _rollups[name] = cube
+            else:
+                _rollups.pop(name, None)
+            _versions[name] = _versions.get(name, 0) + 1
+            for key in [key for key in _result_cache if key[0] == name]:
+                del _result_cache[key]
+            return _versions[name]
+
+
+def _normalize_value(value):
+    if isinstance(value, (list, set)):
+        return ('in', tuple(sorted(str(v) for v in value)))
+    if isinstance(value, tuple):
+        start, end = value
+        return ('between', None if start is None else str(pd.Timestamp(start).date()),
+                None if end is None else str(pd.Timestamp(end).date()))
+    return ('eq', str(value))
+
+
+def normalize_query(dataset, filters=None, group_by=None, measures=None):
+    """Turn a query spec into a hashable, order-independent key.
+
+    `filters` maps a column to a scalar (equality), a list (membership) or a
+    (start, end) date tuple (inclusive range; either end may be None).
+    `measures` is a list of measure names (summed) or (measure, agg) pairs.
+    """
+    spec = _datasets[dataset]
+    norm_filters = tuple(sorted(
+        (col, _normalize_value(value))
+        for col, value in (filters or {}).items()
+        if value is not None and value != (None, None)
+    ))
+    norm_measures = []
+    for measure in measures or spec['measures'][:1]:
+        measure, agg = (measure, 'sum') if isinstance(measure, str) else measure
+        if agg not in SUPPORTED_AGGS:
+            raise ValueError(f"Unsupported aggregation: {agg}")
+        norm_measures.append((canonical_measure(measure), agg))
+    return (dataset, norm_filters, tuple(group_by or ()), tuple(norm_measures))
+
+
+def plan_query(key):
+    """Pick 'rollup' when the cube can answer the query, otherwise 'raw'."""
+    dataset, filters, group_by, measures = key
+    spec = _datasets[dataset]
+    dims = set(spec['dimensions'])
+    if any(agg not in ROLLUP_AGGS for _, agg in measures):
+        return 'raw'
+    if not set(group_by) <= dims or not {col for col, _ in filters} <= dims:
+        return 'raw'
+    if spec['rollup_grain']:
+        if 'date' in group_by:
+            return 'raw'
+        for col, (op, *args) in filters:
+            if col == 'date' and not _month_aligned(op, args):
+                return 'raw'
+    return 'rollup'
+
+
+def _month_aligned(op, args):
+    if op != 'between':
+        return False
+    start, end = args
+    start_ok = start is None or pd.Timestamp(start).day == 1
+    end_ok = end is None or (pd.Timestamp(end) + pd.Timedelta(days=1)).day == 1
+    return start_ok and end_ok
+
+
+def _filter_mask(df, filters):
+    mask = pd.Series(True, index=df.index)
+    for col, (op, *args) in filters:
+        if op == 'between':
+            start, end = args
+            values = pd.to_datetime(df[col])
+            if start is not None:
+                mask &= values >= pd.Timestamp(start)
+            if end is not None:
+                mask &= values <= pd.Timestamp(end)
+        elif isinstance(df[col].dtype, pd.CategoricalDtype):
+            # 사전 인코딩된 컬럼은 문자열로 풀지 않고 카테고리 코드로 비교
+            mask &= df[col].isin(args[0] if op == 'in' else args)
+        elif op == 'in':
+            mask &= df[col].astype(str).isin(args[0])
+        else:
+            mask &= df[col].astype(str) == args[0]
+    return mask
+
+
+def _apply_filters(df, filters):
+    return df[_filter_mask(df, filters)]
+
+
+def _aggregate(df, group_by, measures, plan):
+    columns = {}
+    grouped = df.groupby(list(group_by), dropna=False, observed=True, sort=True) if group_by else None
+    for measure, agg in measures:
+        name = measure if agg == 'sum' else f'{measure}_{agg}'
+        if plan == 'rollup':
+            sums = grouped[measure].sum() if grouped is not None else df[measure].sum()
+            count = ROLLUP_COUNT_PREFIX + measure
+            rows = grouped[count].sum() if grouped is not None else df[count].sum()
+            columns[name] = {'sum': sums, 'count': rows, 'mean': sums / rows}[agg]
+        else:
+            values = pd.to_numeric(df[measure], errors='coerce')
+            if grouped is not None:
+                values = values.groupby([df[col] for col in group_by], dropna=False, observed=True, sort=True)
+            columns[name] = getattr(values, agg)()
+    if grouped is None:
+        return pd.DataFrame({name: [value] for name, value in columns.items()})
+    return pd.DataFrame(columns).reset_index()
+
+
+def run_query(dataset, filters=None, group_by=None, measures=None, engine=None):
+    """Run a declarative query and return a compact result frame.
+
+    The result has one column per `group_by` dimension plus one per
+    measure, named after the measure for sums and `<measure>_<agg>`
+    otherwise. `engine` is 'pandas' or a SQL backend ('sqlite', 'duckdb');
+    it defaults to CARGO_QUERY_ENGINE. A SQL engine answers from its table
+    and its errors propagate; it never falls back to the in-memory frame.
+    Results are cached on the normalized query, the engine and the dataset
+    version; callers must not modify the returned frame.
+    """
+    engine = engine or QUERY_ENGINE
+    key = normalize_query(dataset, filters, group_by, measures)
+    cache_key = key + (get_data_version(dataset), engine)
+    with _lock:
+        if cache_key in _result_cache:
+            _result_cache.move_to_end(cache_key)
+            return _result_cache[cache_key]
+
+    if engine != 'pandas':
+        try:
+            result = _run_sql(engine, key)
+        except Exception as e:
+            log_event(logger, 'sql_query_failed', level=logging.ERROR, dataset=dataset,
+                      engine=engine, error=str(e))
+            raise
+        log_event(logger, 'query_executed', dataset=dataset, plan=engine,
+                  group_by=list(key[2]), result_rows=len(result))
+    else:
+        plan = plan_query(key)
+        source = get_rollup(dataset) if plan == 'rollup' else get_frame(dataset)
+        result = _aggregate(_apply_filters(source, key[1]), key[2], key[3], plan)
+        log_event(logger, 'query_executed', dataset=dataset, plan=plan,
+                  group_by=list(key[2]), source_rows=len(source), result_rows=len(result))
+
+    with _lock:
+        _result_cache[cache_key] = result
+        while len(_result_cache) > RESULT_CACHE_SIZE:
+            _result_cache.popitem(last=False)
+    return result
+
+
+def comparison_periods(period, baseline='previous'):
+    """Resolve a (start, end) period into (current, baseline, offset).
+
+    `baseline` is 'previous' (the equally long period just before) or
+    'year' (the same dates a year earlier). `offset` shifts baseline dates
+    onto the current period. Whole-month periods shift by whole months so
+    monthly rollups can answer them.
+    """
+    if baseline not in COMPARE_BASELINES:
+        raise ValueError(f"Unsupported comparison baseline: {baseline}")
+    start, end = (pd.Timestamp(value).normalize() for value in period)
+    if baseline == 'year':
+        offset = pd.DateOffset(years=1)
+        return (start, end), (start - offset, end - offset), offset
+    if _month_aligned('between', (start, end)):
+        offset = pd.DateOffset(months=(end.year - start.year) * 12 + end.month - start.month + 1)
+    else:
+        offset = pd.Timedelta(days=(end - start).days + 1)
+    return (start, end), (start - offset, start - pd.Timedelta(days=1)), offset
+
+
+def run_period_comparison(dataset, period, baseline='previous', filters=None, group_by=None, measures=None,
+                          engine=None):
+    """Aggregate a period and its baseline period in one filter and group-by pass.
+
+    Rows of both periods are selected with one date filter, labelled with a
+    `period` column ('current' or 'baseline') and grouped together; baseline
+    `date` values are shifted onto the current period so the two line up.
+    A SQL engine (`engine`, default CARGO_QUERY_ENGINE) aggregates the two
+    periods as two queries instead. Results are cached with the dataset's
+    other query results.
+    """
+    engine = engine or QUERY_ENGINE
+    current, previous, offset = comparison_periods(period, baseline)
+    key = normalize_query(dataset, dict(filters or {}, date=(min(current[0], previous[0]),
+                                                             max(current[1], previous[1]))), group_by, measures)
+    cache_key = key + (get_data_version(dataset), 'compare', engine, baseline,
+                       str(current[0].date()), str(current[1].date()))
+    with _lock:
+        if cache_key in _result_cache:
+            _result_cache.move_to_end(cache_key)
+            return _result_cache[cache_key]
+
+    if engine != 'pandas':
+        columns = list(key[2]) + [m if agg == 'sum' else f'{m}_{agg}' for m, agg in key[3]]
+        # 평균은 합과 건수로 받아 두어, 날짜를 옮겨 한 날로 모인 묶음도 다시 합칠 수 있게 한다
+        fetched = list(dict.fromkeys(key[3] + tuple((m, agg) for m, requested in key[3] if requested == 'mean'
+                                                    for agg in ('sum', 'count'))))
+        parts = []
+        for label, dates in (('baseline', previous), ('current', current)):
+            part = run_query(dataset, dict(filters or {}, date=dates), group_by, fetched, engine=engine)
+            if label == 'baseline' and 'date' in part.columns:
+                part = _merge_shifted(part.assign(date=part['date'] + offset), key[2], key[3])
+            parts.append(part[columns].assign(period=label))
+        result = pd.concat([part for part in parts if not part.empty] or parts[-1:], ignore_index=True)
+        result = result[['period'] + columns]
+        log_event(logger, 'comparison_executed', dataset=dataset, plan=engine, baseline=baseline,
+                  group_by=list(key[2]), result_rows=len(result))
+    else:
+        plan = plan_query(key)
+        source = get_rollup(dataset) if plan == 'rollup' else get_frame(dataset)
+        rows = _apply_filters(source, key[1])
+        dates = pd.to_datetime(rows['date'])
+        in_current, in_baseline = dates.between(*current), dates.between(*previous)
+        # 두 기간이 겹치면(1년보다 긴 전년 비교) 겹친 행은 양쪽에 모두 들어간다
+        labelled = pd.concat([rows[in_current].assign(period='current'),
+                              rows[in_baseline].assign(period='baseline', date=dates[in_baseline] + offset)],
+                             ignore_index=True)
+        result = _aggregate(labelled, ('period',) + key[2], key[3], plan)
+        log_event(logger, 'comparison_executed', dataset=dataset, plan=plan, baseline=baseline,
+                  group_by=list(key[2]), source_rows=len(rows), result_rows=len(result))
+
+    with _lock:
+        _result_cache[cache_key] = result
+        while len(_result_cache) > RESULT_CACHE_SIZE:
+            _result_cache.popitem(last=False)
+    return result
+
+
+def _merge_shifted(part, group_by, measures):
+    # 월/연 단위로 옮기면 서로 다른 날이 한 날로 모인다 (8월 29~31일 → 2월 29일): 그 묶음을 다시 합친다
+    if not part.duplicated(list(group_by)).any():
+        return part
+    grouped = part.groupby(list(group_by), dropna=False, sort=True)
+    columns = {}
+    for measure, agg in measures:
+        name = measure if agg == 'sum' else f'{measure}_{agg}'
+        if agg == 'mean':
+            columns[name] = grouped[measure].sum() / grouped[f'{measure}_count'].sum()
+        else:
+            columns[name] = getattr(grouped[name], 'sum' if agg == 'count' else agg)()
+    return pd.DataFrame(columns).reset_index()
+
+
+def sql_fingerprint(name):
+    """Identify the source files and schema a dataset's SQL table is built from.
+
+    Unlike the in-process data version, this stays valid across restarts
+    and worker processes sharing the database file.
+    """
+    spec = _datasets[name]
+    sources = {source: {file: entry['sha1'] for file, entry in sorted(partition_store.read_manifest(source).items())}
+               for source in spec['sources']}
+    payload = json.dumps([MANIFEST_VERSION, spec['dimensions'], spec['measures'], sources],
+                         ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def sql_frames(name):
+    """Yield the rows stored in the SQL engine, one piece at a time (see `iter_frames`).
+
+    Rows are row-level, with year/month keys derived from date like the rollup.
+    """
+    for df in iter_frames(name):
+        if 'date' in df.columns and pd.api.types.is_datetime64_any_dtype(df['date']):
+            df = df.assign(year=df['date'].dt.year, month=df['date'].dt.month)
+        yield df
+
+
+def _sql_table(backend, name):
+    # 원본을 먼저 수집해야 지문이 지금 적재될 행을 가리킨다 (수집 대상이 아닌 등록 데이터셋은 그대로)
+    for source in _datasets[name]['sources']:
+        if source in SOURCE_DIRS:
+            ingest_dataset(source)
+    return get_engine(backend), sql_fingerprint(name), lambda: sql_frames(name)
+
+
+def _run_sql(backend, key):
+    dataset, filters, group_by, measures = key
+    engine, fingerprint, load = _sql_table(backend, dataset)
+    return engine.query(dataset, fingerprint, load, filters, group_by, measures)
+
+
+def compare_engines(dataset, filters=None, group_by=None, measures=None, engine='sqlite'):
+    """Run a query through pandas and a SQL engine; returns both results and the largest measure difference."""
+    expected = run_query(dataset, filters, group_by, measures, engine='pandas')
+    actual = run_query(dataset, filters, group_by, measures, engine=engine)
+    value_columns = [col for col in expected.columns if col not in (group_by or [])]
+    merged = expected.merge(actual, on=list(group_by or []) or None, how='outer',
+                            suffixes=('_pandas', '_sql'), indicator=True) if group_by else None
+    if merged is not None:
+        unmatched = int((merged['_merge'] != 'both').sum())
+        diffs = [(merged[f'{col}_pandas'] - merged[f'{col}_sql']).abs().max() for col in value_columns]
+    else:
+        unmatched = 0
+        diffs = [abs(expected[col].iloc[0] - actual[col].iloc[0]) for col in value_columns]
+    return expected, actual, {'unmatched_groups': unmatched,
+                              'max_difference': float(max([d for d in diffs if pd.notna(d)], default=0.0))}
+
+
+def select_rows(dataset, filters=None, columns=None):
+    """Get the filtered row-level frame for views that need individual rows."""
+    key = normalize_query(dataset, filters)
+    df = _apply_filters(get_frame(dataset), key[1])
+    return df[columns] if columns is not None else df
+
+
+def select_row_positions(dataset, filters=None):
+    """Get the row-level frame and the positions of its rows matching `filters`.
+
+    Unlike `select_rows` this does not copy the matching rows, so callers can
+    read them in chunks. Filters on columns the dataset does not declare as
+    dimensions raise ValueError.
+    """
+    key = _dimension_query(dataset, filters)
+    df = get_frame(dataset)
+    return df, np.flatnonzero(_filter_mask(df, key[1]).to_numpy())
+
+
+def select_row_chunks(dataset, filters=None, chunk_rows=FETCH_CHUNK, engine=None):
+    """Get (header, chunks) to stream out the rows of a dataset matching `filters`.
+
+    `header` is an empty frame with the columns; `chunks` yields the rows
+    `chunk_rows` at a time, sliced from the frame with the pandas engine or
+    read from the table's cursor with a SQL engine. Filters on columns the
+    dataset does not declare as dimensions raise ValueError.
+    """
+    engine = engine or QUERY_ENGINE
+    if engine == 'pandas':
+        df, positions = select_row_positions(dataset, filters)
+        return df.iloc[:0], (df.take(positions[start:start + chunk_rows])
+                             for start in range(0, len(positions), chunk_rows))
+    key = _dimension_query(dataset, filters)
+    engine, fingerprint, load = _sql_table(engine, dataset)
+    return engine.select(dataset, fingerprint, load, key[1], chunk_rows)
+
+
+def _dimension_query(dataset, filters):
+    key = normalize_query(dataset, filters)
+    unknown = {col for col, _ in key[1]} - set(_datasets[dataset]['dimensions'])
+    if unknown:
+        raise ValueError(f"Unknown dimensions for {dataset}: {sorted(unknown)}")
+    return key
+
+
+def row_frame(dataset, columns=None):
+    """Get a dataset's row-level frame, or only `columns` of it.
+
+    With a SQL engine the rows are read partition by partition and only
+    `columns` are kept, instead of building and caching the whole frame.
+    """
+    if QUERY_ENGINE == 'pandas':
+        df = get_frame(dataset)
+        return df if columns is None else df[[col for col in columns if col in df.columns]]
+    frames = [df if columns is None else df[[col for col in columns if col in df.columns]]
+              for df in iter_frames(dataset)]
+    return pd.concat([df for df in frames if not df.empty] or frames[:1], ignore_index=True)
+
+
+def dataset_dimensions(dataset):
+    return list(_datasets[dataset]['dimensions'])
+
+
+def dataset_columns(dataset):
+    """Columns of a dataset's row-level frame (of its table with a SQL engine)."""
+    if QUERY_ENGINE == 'pandas':
+        return list(get_frame(dataset).columns)
+    engine, fingerprint, load = _sql_table(QUERY_ENGINE, dataset)
+    return list(engine.ensure_table(dataset, fingerprint, load))
+
+
+def dataset_rows(dataset):
+    """Number of rows of a dataset's row-level frame (of its table with a SQL engine)."""
+    if QUERY_ENGINE == 'pandas':
+        return len(get_frame(dataset))
+    engine, fingerprint, load = _sql_table(QUERY_ENGINE, dataset)
+    return engine.count(dataset, fingerprint, load)
+
+
+def query_dimension(dataset, dimension, measure, filters=None, by_date=False):
+    """Sum one measure of a dataset by the values of one canonical dimension.
+
+    Reads the canonical long table; the result has a `dimension` column
+    (plus `date` when `by_date`) and a column named after the measure.
+    """
+    filters = dict(filters or {}, dataset=dataset, dimension=dimension, measure=measure)
+    group_by = ['date', 'dimension_value'] if by_date else ['dimension_value']
+    result = run_query('canonical', filters, group_by=group_by, measures=['value'])
+    if by_date and dimension == TOTAL_DIMENSION:
+        result = result.drop(columns='dimension_value')
+    return result.rename(columns={'dimension_value': dimension, 'value': measure})
+
+
+def query_dimension_comparison(dataset, dimension, measure, period, baseline='previous', filters=None,
+                               by_date=False):
+    """Like `query_dimension`, for a period and its baseline at once (see `run_period_comparison`).
+
+    Returns (current, baseline) frames shaped like `query_dimension` results.
+    """
+    filters = dict(filters or {}, dataset=dataset, dimension=dimension, measure=measure)
+    filters.pop('date', None)
+    group_by = ['date', 'dimension_value'] if by_date else ['dimension_value']
+    result = run_period_comparison('canonical', period, baseline, filters, group_by=group_by, measures=['value'])
+    if by_date and dimension == TOTAL_DIMENSION:
+        result = result.drop(columns='dimension_value')
+    result = result.rename(columns={'dimension_value': dimension, 'value': measure})
+    return tuple(result[result['period'] == name].drop(columns='period').reset_index(drop=True)
+                 for name in ('current', 'baseline'))
+
+
+def latest_period(dataset, months=12):
+    """The last `months` whole months up to a dataset's newest date, or None without data."""
+    dates = query_dimension(dataset, TOTAL_DIMENSION, PRIMARY_MEASURES[dataset], by_date=True)['date']
+    if dates.empty:
+        return None
+    last = dates.max().to_period('M')
+    return (last - (months - 1)).to_timestamp(), last.to_timestamp(how='end').normalize()
+
+
+def query_derived(dataset, measure, dimension=TOTAL_DIMENSION, dimension_value=TOTAL_VALUE):
+    """Get one series of the derived measures (value, MoM/YoY %, rolling means, growth) in date order.
+
+    The index is rebuilt only when the 'derived' dataset gets a new version,
+    so each call is a dictionary lookup and a slice.
+    """
+    version = get_data_version('derived')
+    with _lock:
+        cached = _derived_index.get('derived')
+    if cached is None or cached[0] != version:
+        # 프레임은 잠금 밖에서 가져온다 (없으면 만들면서 원본을 수집할 수 있다)
+        frame = get_frame('derived')
+        with log_timing(logger, 'derived_index_built', version=version) as event:
+            index = DerivedIndex(frame)
+            event['rows'] = len(index.frame)
+        with _lock:
+            cached = _derived_index['derived'] = (version, index)
+    return cached[1].series(dataset, dimension, dimension_value, canonical_measure(measure))
+
+
+def query_correlation(dataset, filters=None):
+    """Get the correlation matrix of a dataset's measures over a date range.
+
+    Merges the stored per-month statistics of the months touching the range,
+    so the cost grows with the number of months, not rows.
+    """
+    filters = dict(filters or {}, dataset=dataset)
+    if filters.get('date'):
+        start, end = filters['date']
+        filters['date'] = (None if start is None else pd.Timestamp(start).to_period('M').to_timestamp(), end)
+    stats = run_query('correlation', filters, group_by=['feature_a', 'feature_b'],
+                      measures=STAT_COLUMNS)
+    return correlation_matrix(stats)
+
+
+def load_correlation_table():
+    return pd.concat([load_correlation_stats(name) for name in CANONICAL_SOURCES], ignore_index=True)
+
+
+def load_canonical_table():
+    """Concatenate the canonical long tables of every dataset."""
+    return concat_long([load_long_dataset(name) for name in CANONICAL_SOURCES])
+
+
+@memory_layer('query.frames')
+def _frame_entries():
+    with _lock:
+        return {f'{name} v{get_data_version(name)}': df for name, df in _frames.items()}
+
+
+@memory_layer('query.rollups')
+def _rollup_entries():
+    with _lock:
+        return {f'{name} v{get_data_version(name)}': cube for name, cube in _rollups.items()}
+
+
+@memory_layer('query.results')
+def _result_entries():
+    # 결과 캐시 키: (데이터셋, 필터, 묶음, 측정값, 버전, 엔진 또는 비교 기간)
+    with _lock:
+        return {' | '.join(map(str, key)): result for key, result in _result_cache.items()}
+
+
+@memory_layer('query.derived_index')
+def _derived_index_entries():
+    with _lock:
+        return {f'{name} v{version}': index for name, (version, index) in _derived_index.items()}
+
+
+def clear_query_cache():
+    with _lock:
+        _result_cache.clear()
+
+
+register_dataset(
+    'cargo',
+    lambda: process_cargo_data(get_cached_data('cargo').copy()),
+    dimensions=['date', 'year', 'month', 'region', 'accident_type'],
+    measures=['accident_count', 'fatal_count', 'fatal_rate'],
+    chunks=lambda: (process_cargo_data(df) for df in iter_dataset('cargo')),
+)
+register_dataset(
+    'vehicle',
+    lambda: process_vehicle_data(get_cached_data('vehicle').copy()),
+    dimensions=['date', 'year', 'month', 'region', 'accident_type', 'vehicle_type'],
+    measures=['accident_count', 'total_accidents'],
+    chunks=lambda: (process_vehicle_data(df) for df in iter_dataset('vehicle')),
+)
+register_dataset(
+    'fatal',
+    lambda: process_fatal_data(get_cached_data('fatal').copy()),
+    dimensions=['date', 'year', 'month', 'region', 'accident_type', 'road_type'],
+    measures=['fatal_count'],
+    rollup_grain='MS',
+    chunks=lambda: (process_fatal_data(df) for df in iter_dataset('fatal')),
+)
+# 시간대 x 요일 키만 남긴 사망사고 데이터: 롤업 큐브가 월 x 7 x 24 이하로 작다
+FATAL_TEMPORAL_COLUMNS = ['date', 'year', 'month', 'weekday', 'hour', 'fatal_count']
+register_dataset(
+    'fatal_temporal',
+    lambda: get_frame('fatal')[FATAL_TEMPORAL_COLUMNS],
+    dimensions=['date', 'year', 'month', 'weekday', 'hour'],
+    measures=['fatal_count'],
+    rollup_grain='MS',
+    sources=['fatal'],
+    chunks=lambda: (df[FATAL_TEMPORAL_COLUMNS] for df in iter_frames('fatal')),
+)
+register_dataset(
+    'canonical',
+    load_canonical_table,
+    dimensions=['dataset', 'dimension', 'dimension_value', 'segment', 'measure', 'date', 'year', 'month'],
+    measures=['value'],
+    rollup_grain='MS',
+    sources=CANONICAL_SOURCES,
+    chunks=lambda: (concat_long([df]) for name in CANONICAL_SOURCES for df in iter_dataset(name, 'long')),
+)
+# 시리즈별 전월·전년 대비 변화율, 3/12개월 이동평균과 증가율 (표준 롤업에서 한 번에 계산)
+register_dataset(
+    'derived',
+    lambda: build_derived_measures(get_rollup('canonical')),
+    dimensions=SERIES_KEYS + ['date', 'year', 'month'],
+    measures=['value'] + DERIVED_MEASURES,
+    sources=CANONICAL_SOURCES,
+)
+register_dataset(
+    'correlation',
+    load_correlation_table,
+    dimensions=['dataset', 'feature_a', 'feature_b', 'date'],
+    measures=STAT_COLUMNS,
+    sources=CANONICAL_SOURCES,
+)
+# 오프라인으로 계산해 저장한 사망사고 다발 지점 (python -m utils.hotspots)
+register_dataset(
+    'hotspots',
+    refresh_hotspots,
+    dimensions=['year', 'accident_type'],
+    measures=['accidents', 'fatalities'],
+    sources=['fatal'],
+)
+# 고속도로 노선별 고정 길이 구간과 휴게소 사이 구간의 사고 집계 (python -m utils.routes)
+register_dataset(
+    'route_segments',
+    load_route_segments,
+    dimensions=['route', 'segment', 'start_km'],
+    measures=['accidents', 'fatalities', 'rest_areas'],
+    sources=['fatal'],
+)
+register_dataset(
+    'rest_area_gaps',
+    load_rest_area_gaps,
+    dimensions=['route', 'from_rest_area', 'to_rest_area', 'start_km', 'end_km', 'gap_km'],
+    measures=['accidents', 'fatalities'],
+    sources=['fatal'],
+)
@@ -0,0 +1,251 @@
+import math
+import re
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from utils.query import row_frame, get_data_version
+from utils.logger import get_logger, log_event, log_timing
+from utils.memory import memory_layer
+
+logger = get_logger('cargo.data.records')
+
+# 원본 기록 표에 보여 주는 사망사고 컬럼
+RECORD_COLUMNS = ['date', 'hour', 'weekday', 'region', 'accident_type', 'road_type', 'fatal_count', 'lat', 'lon']
+PAGE_SIZE = 20
+
+# (필터, 기간, 정렬)별로 정렬된 행 번호를 기억하는 개수
+ORDER_CACHE_SIZE = 64
+
+# DataTable filter_query의 연산자 (앞의 s/i는 대소문자 구분 여부)
+FILTER_OPERATORS = {
+    '>=': 'ge', '<=': 'le', '!=': 'ne', '<': 'lt', '>': 'gt', '=': 'eq',
+    'ge': 'ge', 'le': 'le', 'ne': 'ne', 'lt': 'lt', 'gt': 'gt', 'eq': 'eq',
+    'contains': 'contains', 'datestartswith': 'datestartswith',
+}
+FILTER_TERM = re.compile(r'^\s*\{(?P<column>[^}]+)\}\s*(?P<op>[si]?(?:[<>!]?=|[<>])|[a-z]+)\s*(?P<value>.*?)\s*$')
+# 따옴표로 감싸지 않은 값에 들어 있으면 다른 식(논리 연산, 다른 컬럼)이다
+UNSUPPORTED_VALUE = re.compile(r'\|\||&&|[{}]')
+
+
+def parse_filter(filter_query):
+    """Split a DataTable filter_query into (column, operator, value, case_sensitive) terms.
+
+    Raises ValueError for expressions the table does not support (only
+    `&&`-joined column comparisons are generated by the filter row).
+    """
+    terms = []
+    for part in (filter_query or '').split(' && '):
+        if not part.strip():
+            continue
+        match = FILTER_TERM.match(part)
+        if match is None:
+            raise ValueError(f'Unsupported filter expression: {part}')
+        column, op, value = match.group('column'), match.group('op'), match.group('value')
+        sensitive = True
+        if op not in FILTER_OPERATORS and op[:1] in ('s', 'i') and op[1:] in FILTER_OPERATORS:
+            op, sensitive = op[1:], op[0] == 's'
+        op = FILTER_OPERATORS.get(op)
+        if op is None:
+            raise ValueError(f'Unsupported filter operator: {match.group("op")}')
+        if len(value) >= 2 and value[0] == value[-1] and value[0] in '"\'`':
+            value = value[1:-1]
+        elif UNSUPPORTED_VALUE.search(value):
+            # '{a} = 1 || {b} = 2' 같은 식이 값 하나로 읽히지 않게 한다
+            raise ValueError(f'Unsupported filter expression: {part}')
+        terms.append((column, op, value, sensitive))
+    return terms
+
+
+class RecordColumn:
+    """One dictionary-encoded column: sorted distinct values and each row's code (-1 for missing).
+
+    Because the dictionary is sorted, ordering rows by code orders them by
+    value, so every column gets its presorted row index once at build time.
+    """
+
+    def __init__(self, values):
+        if pd.api.types.is_extension_array_dtype(values) and pd.api.types.is_numeric_dtype(values):
+            # nullable 정수(Int8 등)는 결측을 NaN으로 둔 실수로 다룬다
+            values = values.astype('float64')
+        codes, uniques = pd.factorize(values, sort=True)
+        self.codes = codes.astype(np.int32)
+        self.values = np.asarray(uniques)
+        self._labels = None
+        # 결측값(-1)은 오름차순·내림차순 모두 맨 뒤에 둔다
+        keys = np.where(self.codes < 0, len(self.values), self.codes)
+        ascending = np.argsort(keys, kind='stable').astype(np.int32)
+        valid = int((self.codes >= 0).sum())
+        self.order = {
+            'asc': ascending,
+            'desc': np.concatenate([_reverse_runs(ascending[:valid], keys), ascending[valid:]]),
+        }
+
+    def match(self, op, value, sensitive=True):
+        """Evaluate a filter on the dictionary and expand it to a row mask through the codes."""
+        matched = self._match_values(op, value, sensitive)
+        return np.append(matched, False)[self.codes]
+
+    def code_range(self, start=None, end=None):
+        """Row mask of values in [start, end], using binary search on the sorted dictionary."""
+        low = 0 if start is None else np.searchsorted(self.values, start, side='left')
+        high = len(self.values) if end is None else np.searchsorted(self.values, end, side='right')
+        return (self.codes >= low) & (self.codes < high)
+
+    def _match_values(self, op, value, sensitive):
+        values = self.values
+        if op in ('contains', 'datestartswith'):
+            text = self.labels()
+            if op == 'datestartswith':
+                return text.str.startswith(value).to_numpy()
+            return text.str.contains(value, case=sensitive, regex=False).to_numpy()
+        target = _coerce(values, value)
+        if target is None:
+            return np.zeros(len(values), dtype=bool)
+        if values.dtype == object and not sensitive:
+            values, target = np.array([str(v).lower() for v in values], dtype=object), str(target).lower()
+        compare = {'eq': np.equal, 'ne': np.not_equal, 'lt': np.less, 'le': np.less_equal,
+                   'gt': np.greater, 'ge': np.greater_equal}[op]
+        return np.asarray(compare(values, target), dtype=bool)
+
+    def labels(self):
+        """Dictionary values as displayed, for text matching (built once)."""
+        if self._labels is None:
+            if np.issubdtype(self.values.dtype, np.datetime64):
+                self._labels = pd.Series(pd.DatetimeIndex(self.values).strftime('%Y-%m-%d'))
+            else:
+                self._labels = pd.Series(self.values).map(_display).astype(str)
+        return self._labels
+
+    def take(self, rows):
+        codes = self.codes[rows]
+        return [None if code < 0 else _display(self.values[code]) for code in codes]
+
+
+def _reverse_runs(ascending, keys):
+    # 같은 값끼리는 원래(날짜) 순서를 유지한 채 값 순서만 뒤집는다
+    if not len(ascending):
+        return ascending
+    sorted_keys = keys[ascending]
+    starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+    runs = np.split(ascending, starts[1:])
+    return np.concatenate(runs[::-1])
+
+
+def _coerce(values, value):
+    """Convert a filter value to the dictionary's type, or None if it cannot match."""
+    try:
+        if np.issubdtype(values.dtype, np.datetime64):
+            return np.datetime64(pd.Timestamp(value))
+        if np.issubdtype(values.dtype, np.number):
+            return float(value)
+    except (TypeError, ValueError):
+        return None
+    return value
+
+
+def _display(value):
+    if isinstance(value, (pd.Timestamp, np.datetime64)):
+        return pd.Timestamp(value).strftime('%Y-%m-%d')
+    if isinstance(value, (float, np.floating)):
+        if math.isnan(value):
+            return None
+        return int(value) if float(value).is_integer() else round(float(value), 6)
+    if isinstance(value, np.integer):
+        return int(value)
+    return value
+
+
+class RecordTable:
+    """Row-level records of a dataset, served page by page.
+
+    Every column is dictionary-encoded with its presorted row index. A page
+    request slices the index of its sort order; filters are evaluated on the
+    small dictionaries and the filtered order is cached, so turning pages
+    touches only the rows returned.
+    """
+
+    def __init__(self, df, columns=RECORD_COLUMNS, default_sort='date'):
+        self.columns = {col: RecordColumn(df[col]) for col in columns if col in df.columns}
+        self.rows = len(df)
+        self.default_sort = default_sort
+        self._orders = OrderedDict()
+        self._lock = threading.Lock()
+
+    def ordered_rows(self, sort_by=None, filter_query=None, date_range=None):
+        """Row numbers matching the filters, in sort order."""
+        sort = sort_by[0] if sort_by else {'column_id': self.default_sort, 'direction': 'asc'}
+        if sort['column_id'] not in self.columns:
+            sort = {'column_id': self.default_sort, 'direction': 'asc'}
+        order = self.columns[sort['column_id']].order[sort['direction']]
+        terms = parse_filter(filter_query)
+        if not terms and not date_range:
+            return order
+
+        key = (sort['column_id'], sort['direction'], tuple(terms), tuple(date_range or ()))
+        with self._lock:
+            if key in self._orders:
+                self._orders.move_to_end(key)
+                return self._orders[key]
+        mask = np.ones(self.rows, dtype=bool)
+        if date_range and 'date' in self.columns:
+            start, end = (None if value is None else np.datetime64(pd.Timestamp(value)) for value in date_range)
+            mask &= self.columns['date'].code_range(start, end)
+        for column, op, value, sensitive in terms:
+            if column not in self.columns:
+                raise ValueError(f'Unknown column: {column}')
+            mask &= self.columns[column].match(op, value, sensitive)
+        rows = order[mask[order]]
+        with self._lock:
+            self._orders[key] = rows
+            while len(self._orders) > ORDER_CACHE_SIZE:
+                self._orders.popitem(last=False)
+        return rows
+
+    def page(self, page_current=0, page_size=PAGE_SIZE, sort_by=None, filter_query=None, date_range=None):
+        """Get one page as (records, page_count, matching_rows); the page is clamped to the last one."""
+        rows = self.ordered_rows(sort_by, filter_query, date_range)
+        page_count = max(1, math.ceil(len(rows) / page_size))
+        page_current = min(max(page_current or 0, 0), page_count - 1)
+        selected = rows[page_current * page_size:(page_current + 1) * page_size]
+        columns = {col: column.take(selected) for col, column in self.columns.items()}
+        records = [dict(zip(columns, values)) for values in zip(*columns.values())]
+        return records, page_count, len(rows)
+
+
+_tables = {}
+_tables_lock = threading.Lock()
+
+
+def get_record_table(dataset='fatal'):
+    """Get the record table of a dataset, rebuilt when the dataset's version changes."""
+    version = get_data_version(dataset)
+    with _tables_lock:
+        cached = _tables.get(dataset)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        with log_timing(logger, 'record_table_built', dataset=dataset, version=version) as event:
+            df = row_frame(dataset, RECORD_COLUMNS)
+            # 휴게소 정보만 있는 행(발생 일자 없음)은 사고 기록이 아니다
+            # 날짜순으로 두어 같은 값끼리는 어느 정렬에서나 날짜순이 된다
+            df = df[df['date'].notna()].sort_values('date', kind='stable').reset_index(drop=True)
+            table = RecordTable(df)
+            event['rows'] = table.rows
+        _tables[dataset] = (version, table)
+        return table
+
+
+@memory_layer('records.tables')
+def _table_entries():
+    with _tables_lock:
+        return {f'{dataset} v{version}': table for dataset, (version, table) in _tables.items()}
+
+
+def query_records(page_current=0, page_size=PAGE_SIZE, sort_by=None, filter_query=None, date_range=None,
+                  dataset='fatal'):
+    """Serve one page of raw records for a server-side paged DataTable."""
+    table = get_record_table(dataset)
+    records, page_count, matches = table.page(page_current, page_size, sort_by, filter_query, date_range)
+    log_event(logger, 'records_page', dataset=dataset, page=page_current, matches=matches,
+              sort=sort_by[0]['column_id'] if sort_by else None, filtered=bool(filter_query))
+    return records, page_count, matches
@@ -0,0 +1,104 @@
+import os
+import threading
+from utils.data_loader import SOURCE_DIRS, list_source_files
+from utils.ingest import ingest_dataset, file_fingerprint
+from utils.logger import get_logger, log_event, log_timing
+
+logger = get_logger('cargo.data.reload')
+
+# 원본 폴더를 확인하는 주기(초); 0이면 감시하지 않는다
+RELOAD_INTERVAL = float(os.environ.get('CARGO_RELOAD_INTERVAL', '5'))
+
+
+def folder_snapshot(file_paths):
+    """Map each existing file to its (size, mtime) fingerprint."""
+    snapshot = {}
+    for path in file_paths:
+        try:
+            fingerprint = file_fingerprint(path)
+        except OSError:
+            continue
+        snapshot[path] = (fingerprint['size'], fingerprint['mtime_ns'])
+    return snapshot
+
+
+class SourceWatcher:
+    """Poll source folders and rebuild only the dataset whose files changed.
+
+    Each watch is a key, a function listing its files and a `reload()`
+    callback. A change is reloaded once the files stop changing for one
+    interval, so a workbook that is still being copied is not read half-written.
+    Reloads run on the watcher thread; requests keep being served from the
+    current version until the callback swaps the new one in.
+    """
+
+    def __init__(self, interval=RELOAD_INTERVAL):
+        self.interval = interval
+        self._watches = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def watch(self, key, list_files, reload):
+        with self._lock:
+            self._watches[key] = {
+                'list_files': list_files,
+                'reload': reload,
+                'snapshot': folder_snapshot(list_files()),
+                'pending': None,
+            }
+
+    def start(self):
+        """Start polling in a daemon thread (once); does nothing when the interval is 0."""
+        with self._lock:
+            if self.interval <= 0 or (self._thread is not None and self._thread.is_alive()):
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='source-watcher', daemon=True)
+            self._thread.start()
+        log_event(logger, 'watcher_started', interval=self.interval, watches=sorted(self._watches))
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.poll()
+
+    def poll(self):
+        """Check every watch once and reload those whose files changed and have settled."""
+        with self._lock:
+            watches = list(self._watches.items())
+        for key, watch in watches:
+            snapshot = folder_snapshot(watch['list_files']())
+            if snapshot == watch['snapshot']:
+                watch['pending'] = None
+                continue
+            if snapshot != watch['pending']:
+                # 처음 본 변경: 파일 복사가 끝나도록 한 주기 더 기다린다
+                watch['pending'] = snapshot
+                continue
+            changed = sorted(os.path.basename(path) for path in set(snapshot) ^ set(watch['snapshot'])
+                             | {path for path in snapshot if watch['snapshot'].get(path) != snapshot[path]})
+            try:
+                with log_timing(logger, 'source_reloaded', watch=key, files=changed):
+                    watch['reload']()
+            except Exception:
+                # 실패는 log_timing이 source_reloaded_failed로 남긴다; 다음 주기에 다시 시도한다
+                continue
+            watch['snapshot'], watch['pending'] = snapshot, None
+
+
+def watch_datasets(watcher, data_types=tuple(SOURCE_DIRS)):
+    """Watch the ingested source folders; a change re-ingests that dataset only.
+
+    Ingestion notifies the partition listeners, which rebuild the affected
+    query datasets and swap them in under a new version.
+    """
+    for data_type in data_types:
+        watcher.watch(data_type, lambda data_type=data_type: list_source_files(data_type),
+                      lambda data_type=data_type: ingest_dataset(data_type))
+    return watcher
+
+
+source_watcher = SourceWatcher()
@@ -0,0 +1,208 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from plotly.io.json import to_json_plotly
+from utils.cache import data_cache
+from utils.ingest import source_digest
+from utils.logger import get_logger, log_event
+
+logger = get_logger('cargo.app.result_cache')
+
+# 워커가 함께 쓰는 콜백 결과 파일 (빈 값이나 0이면 끔), 최대 크기(MB)와 결과 유효 시간(초)
+RESULT_CACHE_PATH = os.environ.get('CARGO_RESULT_CACHE', os.path.join(data_cache.cache_dir, 'results.sqlite'))
+RESULT_CACHE_MB = float(os.environ.get('CARGO_RESULT_CACHE_MB', '256'))
+RESULT_CACHE_TTL = float(os.environ.get('CARGO_RESULT_CACHE_TTL', str(24 * 3600)))
+
+# 마지막 사용 시각은 이 간격(초)보다 오래됐을 때만 고쳐 쓴다: 적중할 때마다 쓰기 잠금을 잡지 않는다
+TOUCH_INTERVAL = 60
+# 한도를 넘으면 한도의 이 비율 아래가 될 때까지 오래 쓰지 않은 결과부터 지운다
+EVICT_TO = 0.9
+# 키나 저장 형식이 바뀌면 올린다
+CACHE_FORMAT = 2
+
+# 결과를 만드는 코드(src 아래 모든 .py)와 고정 참조 자료; 원본 데이터는 source_digest로 따로 본다
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REFERENCE_DIRS = (os.path.join('data', 'regions'), os.path.join('data', 'routes'))
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+
+def normalize_date(value):
+    """'YYYY-MM-DD' part of a date picker value (which may carry a time), or None."""
+    return str(value)[:10] if value else None
+
+
+def code_files(root=SRC_DIR):
+    """The files whose contents key the cached results, as sorted paths relative to `root`."""
+    files = []
+    for folder, dirs, names in os.walk(root):
+        dirs[:] = [d for d in dirs if d not in ('__pycache__', 'data') and not d.startswith('.')]
+        files += [os.path.relpath(os.path.join(folder, name), root) for name in names if name.endswith('.py')]
+    for folder in REFERENCE_DIRS:
+        for current, dirs, names in os.walk(os.path.join(root, folder)):
+            files += [os.path.relpath(os.path.join(current, name), root) for name in names]
+    return sorted(files)
+
+
+def code_digest(root=SRC_DIR):
+    """Digest of every .py file under `root` and of the reference files in REFERENCE_DIRS.
+
+    A deploy that changes any of them (query layer, derived measures, figure
+    components, ...) retires the results computed before it.
+    """
+    digest = hashlib.sha1()
+    for path in code_files(root):
+        digest.update(path.replace(os.sep, '/').encode('utf-8') + b'\0')
+        with open(os.path.join(root, path), 'rb') as f:
+            digest.update(hashlib.sha1(f.read()).digest())
+    return digest.hexdigest()[:16]
+
+
+_code_digest = None
+
+
+def _current_code_digest():
+    # 프로세스마다 한 번만 계산한다 (코드는 실행 중에 바뀌지 않는다)
+    global _code_digest
+    if _code_digest is None:
+        _code_digest = code_digest()
+    return _code_digest
+
+
+class ResultCache:
+    """Callback results shared by every worker process through one SQLite file.
+
+    A result is stored as JSON under a digest of the callback name, its
+    normalized inputs, the source digests of the datasets it reads and a
+    digest of the app's code under src/, so any worker - or the same app after
+    a restart - serves it until the data or code changes. Entries expire after `ttl`
+    seconds, and the least recently used go once the file holds more than
+    `max_mb`. Cache errors never fail a callback; it is computed instead.
+    """
+
+    def __init__(self, path=RESULT_CACHE_PATH, max_mb=RESULT_CACHE_MB, ttl=RESULT_CACHE_TTL):
+        self.path = path if path not in ('', '0') else None
+        self.max_bytes = int(max_mb * 2 ** 20)
+        self.ttl = ttl
+        self._local = threading.local()
+
+    @property
+    def enabled(self):
+        return self.path is not None
+
+    def _connect(self):
+        # 연결은 스레드마다 두고, fork로 만든 워커에서는 새로 연다
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        # WAL: 한 워커가 쓰는 동안에도 다른 워커는 읽는다
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, callback TEXT NOT NULL, '
+                     'created REAL NOT NULL, accessed REAL NOT NULL, size INTEGER NOT NULL, value BLOB NOT NULL)')
+        conn.execute('CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)')
+        self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def make_key(self, name, inputs, datasets):
+        versions = [(dataset, source_digest(dataset)) for dataset in sorted(set(datasets))]
+        payload = json.dumps([CACHE_FORMAT, name, _current_code_digest(), inputs, versions],
+                             sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    def cached(self, name, inputs, datasets, compute):
+        """Return `compute()`'s result, from the shared cache when any worker already computed it.
+
+        `inputs` is the JSON-serializable, normalized form of everything the
+        result depends on besides data (equivalent requests must give equal
+        inputs); `datasets` are the source datasets it reads. A hit returns
+        the result as decoded JSON (components and figures as dicts), which
+        Dash sends exactly like the original. Exceptions from `compute`,
+        including PreventUpdate, propagate and nothing is stored.
+        """
+        if not self.enabled:
+            return compute()
+        try:
+            key = self.make_key(name, inputs, datasets)
+        except (TypeError, ValueError, OSError) as e:
+            log_event(logger, 'result_cache_error', level=logging.WARNING, callback=name, operation='key',
+                      error=str(e))
+            return compute()
+        hit = self.get(key)
+        if hit is not None:
+            log_event(logger, 'result_cache_hit', level=logging.DEBUG, callback=name)
+            return hit
+        started = time.perf_counter()
+        result = compute()
+        self.put(key, name, result, ms=round(1000 * (time.perf_counter() - started), 1))
+        return result
+
+    def get(self, key):
+        now = time.time()
+        try:
+            conn = self._connect()
+            row = conn.execute('SELECT value, created, accessed FROM results WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            value, created, accessed = row
+            if now - created > self.ttl:
+                conn.execute('DELETE FROM results WHERE key = ?', (key,))
+                return None
+            if now - accessed > TOUCH_INTERVAL:
+                conn.execute('UPDATE results SET accessed = ? WHERE key = ?', (now, key))
+        except sqlite3.Error as e:
+            log_event(logger, 'result_cache_error', level=logging.WARNING, operation='get', error=str(e))
+            return None
+        return _loads(value)
+
+    def put(self, key, name, result, ms=None):
+        try:
+            value = to_json_plotly(result).encode('utf-8')
+            now = time.time()
+            conn = self._connect()
+            conn.execute('INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)',
+                         (key, name, now, now, len(value), value))
+            self._evict(conn, now)
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            log_event(logger, 'result_cache_error', level=logging.WARNING, callback=name, operation='put',
+                      error=str(e))
+            return
+        log_event(logger, 'result_cached', callback=name, bytes=len(value), ms=ms)
+
+    def _evict(self, conn, now):
+        expired = conn.execute('DELETE FROM results WHERE created < ?', (now - self.ttl,)).rowcount
+        total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM results').fetchone()[0]
+        evicted = []
+        if total > self.max_bytes:
+            for key, size in conn.execute('SELECT key, size FROM results ORDER BY accessed'):
+                if total <= self.max_bytes * EVICT_TO:
+                    break
+                evicted.append((key,))
+                total -= size
+            conn.executemany('DELETE FROM results WHERE key = ?', evicted)
+        if expired or evicted:
+            log_event(logger, 'result_cache_evicted', expired=expired, evicted=len(evicted), bytes=total)
+
+    def stats(self):
+        """Number of stored results and their total bytes."""
+        if not self.enabled:
+            return {'entries': 0, 'bytes': 0}
+        entries, size = self._connect().execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results').fetchone()
+        return {'entries': entries, 'bytes': size}
+
+    def clear(self):
+        if self.enabled:
+            self._connect().execute('DELETE FROM results')
+
+
+result_cache = ResultCache()
@@ -0,0 +1,218 @@
+import hashlib
+import json
+import os
+import re
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+from utils.cache import load_derived
+from utils.hotspots import KM_PER_DEG_LAT, KM_PER_DEG_LON
+from utils.ingest import ingest_dataset, read_dataset, partition_store
+from utils.logger import get_logger, log_event, log_timing
+
+logger = get_logger('cargo.data.routes')
+
+ROUTES_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                           'data', 'routes', 'expressway_routes.json')
+
+# 구간 길이(km)와 노선 중심선에서 사고를 노선에 붙일 최대 거리(km)
+SEGMENT_KM = 10
+SNAP_KM = 1.0
+
+SEGMENT_COLUMNS = ['route', 'segment', 'start_km', 'end_km', 'accidents', 'fatalities', 'rest_areas']
+GAP_COLUMNS = ['route', 'from_rest_area', 'to_rest_area', 'start_km', 'end_km', 'gap_km',
+               'accidents', 'fatalities', 'fatalities_per_km']
+REST_AREA_COLUMNS = ['route', 'rest_area', 'name', 'km', 'located_by']
+
+# 도로명주소의 고속도로 건물번호는 기점에서의 거리표(km)를 따른다: '경부고속도로 193'
+KM_POST = re.compile(r'고속도로\s*(\d+)')
+
+
+@lru_cache(maxsize=4)
+def load_routes(path=ROUTES_PATH):
+    """Load route waypoints (name, lat, lon, km) keyed by route name."""
+    with open(path, encoding='utf-8') as f:
+        routes = json.load(f)['routes']
+    return {route: pd.DataFrame(points).sort_values('km', ignore_index=True)
+            for route, points in routes.items()}
+
+
+def routes_fingerprint(path=ROUTES_PATH):
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def project_onto_route(lat, lon, waypoints):
+    """Snap points onto a route polyline.
+
+    Returns the calibrated distance marker (km, interpolated between the
+    waypoint markers) of the nearest point on the polyline and the
+    distance (km) from each point to it.
+    """
+    px = np.asarray(lon, dtype='float64')[:, None] * KM_PER_DEG_LON
+    py = np.asarray(lat, dtype='float64')[:, None] * KM_PER_DEG_LAT
+    wx = waypoints['lon'].to_numpy(dtype='float64') * KM_PER_DEG_LON
+    wy = waypoints['lat'].to_numpy(dtype='float64') * KM_PER_DEG_LAT
+    marker = waypoints['km'].to_numpy(dtype='float64')
+    ax, ay, dx, dy = wx[:-1], wy[:-1], np.diff(wx), np.diff(wy)
+
+    t = np.clip(((px - ax) * dx + (py - ay) * dy) / (dx * dx + dy * dy), 0, 1)
+    dist = np.hypot(px - (ax + t * dx), py - (ay + t * dy))
+    nearest = dist.argmin(axis=1)
+    rows = np.arange(len(nearest))
+    km = marker[nearest] + t[rows, nearest] * np.diff(marker)[nearest]
+    return km, dist[rows, nearest]
+
+
+def snap_accidents(df, routes):
+    """Assign accidents within SNAP_KM of a route centreline to that route and marker."""
+    df = df[df['lat'].notna() & df['lon'].notna()]
+    lat, lon = df['lat'].to_numpy(dtype='float64'), df['lon'].to_numpy(dtype='float64')
+    best_route = np.full(len(df), -1)
+    best_km = np.full(len(df), np.nan)
+    best_offset = np.full(len(df), np.inf)
+    for i, waypoints in enumerate(routes.values()):
+        km, offset = project_onto_route(lat, lon, waypoints)
+        closer = offset < best_offset
+        best_route[closer], best_km[closer], best_offset[closer] = i, km[closer], offset[closer]
+    snapped = best_offset <= SNAP_KM
+    names = np.array(list(routes), dtype=object)
+    return pd.DataFrame({
+        'route': names[best_route[snapped]],
+        'km': best_km[snapped],
+        'fatalities': pd.to_numeric(df['fatal_count'], errors='coerce').fillna(0).to_numpy()[snapped],
+    })
+
+
+def locate_rest_areas(df, routes):
+    """Place the expressway rest areas on their route.
+
+    The distance marker comes from the address km post when it has one;
+    otherwise the rest area is placed at the route waypoint named in its
+    name or address. Rest areas that cannot be placed are logged and left out.
+    """
+    rest = df[(df['유형'] == '고속도로') & df['노선'].isin(list(routes))]
+    rows = []
+    for name, route, address in zip(rest['휴게소명'], rest['노선'], rest['주소'].fillna('')):
+        waypoints = routes[route]
+        stem = name.split('(')[0].strip()
+        post = KM_POST.search(address)
+        if post and f'{route}고속도로' in address:
+            rows.append((route, stem, name, float(post.group(1)), 'km_post'))
+            continue
+        markers = dict(zip(waypoints['name'], waypoints['km']))
+        token = next((t for t in [stem] + address.split() if t in markers), None)
+        if token is None:
+            log_event(logger, 'rest_area_unplaced', route=route, rest_area=name, address=address)
+            continue
+        rows.append((route, stem, name, float(markers[token]), 'waypoint'))
+    return pd.DataFrame(rows, columns=REST_AREA_COLUMNS)
+
+
+def build_segments(accidents, rest_areas, routes):
+    """Count accidents, fatalities and rest areas per fixed-length route segment."""
+    frames = []
+    for route, waypoints in routes.items():
+        length = float(waypoints['km'].iloc[-1])
+        count = int(np.ceil(length / SEGMENT_KM))
+        on_route = accidents[accidents['route'] == route]
+        index = np.clip((on_route['km'] // SEGMENT_KM).astype('int64'), 0, count - 1)
+        stops = rest_areas.loc[rest_areas['route'] == route, 'km']
+        start = np.arange(count) * SEGMENT_KM
+        frames.append(pd.DataFrame({
+            'route': route,
+            'segment': np.arange(count),
+            'start_km': start.astype('float64'),
+            'end_km': np.minimum(start + SEGMENT_KM, length),
+            'accidents': np.bincount(index, minlength=count),
+            'fatalities': np.bincount(index, weights=on_route['fatalities'], minlength=count),
+            'rest_areas': np.bincount(np.clip((stops // SEGMENT_KM).astype('int64'), 0, count - 1),
+                                      minlength=count),
+        }))
+    return pd.concat(frames, ignore_index=True)[SEGMENT_COLUMNS]
+
+
+def build_gaps(accidents, rest_areas, routes):
+    """Summarize each stretch between consecutive rest areas (and the route ends).
+
+    Both directions of one rest area count as a single stop at their mean marker.
+    """
+    rows = []
+    for route, waypoints in routes.items():
+        stops = (rest_areas[rest_areas['route'] == route]
+                 .groupby('rest_area', as_index=False)['km'].mean()
+                 .sort_values('km'))
+        ends = waypoints.iloc[[0, -1]]
+        names = [f"{ends['name'].iloc[0]} (기점)"] + stops['rest_area'].tolist() + [f"{ends['name'].iloc[1]} (종점)"]
+        marks = [float(ends['km'].iloc[0])] + stops['km'].tolist() + [float(ends['km'].iloc[1])]
+        km = accidents.loc[accidents['route'] == route, 'km'].to_numpy()
+        fatalities = accidents.loc[accidents['route'] == route, 'fatalities'].to_numpy()
+        for i in range(len(marks) - 1):
+            last = i == len(marks) - 2
+            inside = (km >= marks[i]) & ((km < marks[i + 1]) | (last & (km == marks[i + 1])))
+            gap = marks[i + 1] - marks[i]
+            rows.append({
+                'route': route,
+                'from_rest_area': names[i],
+                'to_rest_area': names[i + 1],
+                'start_km': marks[i],
+                'end_km': marks[i + 1],
+                'gap_km': gap,
+                'accidents': int(inside.sum()),
+                'fatalities': float(fatalities[inside].sum()),
+                'fatalities_per_km': float(fatalities[inside].sum()) / gap if gap > 0 else 0.0,
+            })
+    return pd.DataFrame(rows, columns=GAP_COLUMNS)
+
+
+def build_route_index(df, routes=None):
+    """Build the route-segment index from the fatal dataset (accidents plus rest-area rows)."""
+    routes = routes if routes is not None else load_routes()
+    accidents = snap_accidents(df, routes)
+    rest_areas = (locate_rest_areas(df, routes) if '휴게소명' in df.columns
+                  else pd.DataFrame(columns=REST_AREA_COLUMNS))
+    return {
+        'segments': build_segments(accidents, rest_areas, routes),
+        'gaps': build_gaps(accidents, rest_areas, routes),
+        'rest_areas': rest_areas,
+    }
+
+
+def source_key():
+    """Identify the fatal sources, route geometry and parameters the index was built from."""
+    manifest = partition_store.read_manifest('fatal')
+    return {
+        'files': {file: entry['sha1'] for file, entry in sorted(manifest.items())},
+        'routes': routes_fingerprint(),
+        'segment_km': SEGMENT_KM,
+        'snap_km': SNAP_KM,
+    }
+
+
+def _build_tables():
+    with log_timing(logger, 'route_index_built', segment_km=SEGMENT_KM, snap_km=SNAP_KM) as event:
+        tables = build_route_index(read_dataset('fatal'))
+        event['segments'] = len(tables['segments'])
+        event['snapped_accidents'] = int(tables['segments']['accidents'].sum())
+    return tables
+
+
+def refresh_route_index():
+    """Rebuild and persist the route-segment index if its inputs changed; returns its tables."""
+    ingest_dataset('fatal')
+    return load_derived('routes', source_key(), _build_tables)
+
+
+def load_route_segments():
+    return refresh_route_index()['segments']
+
+
+def load_rest_area_gaps():
+    return refresh_route_index()['gaps']
+
+
+if __name__ == '__main__':
+    # 오프라인 실행: python -m utils.routes (src 폴더에서)
+    index = refresh_route_index()
+    log_event(logger, 'route_index_ready', segments=len(index['segments']), gaps=len(index['gaps']))
+    print(index['gaps'].sort_values('gap_km', ascending=False).head(15).to_string())
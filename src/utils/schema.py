@@ -0,0 +1,297 @@
+import os
+import re
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+from utils.gazetteer import canonical_region_names
+
+# 표준 long 포맷 컬럼
+# segment는 차종별 표처럼 행과 열 두 축으로 나뉜 표에서 행 축(차종)을 담는다
+CANONICAL_COLUMNS = ['dataset', 'dimension', 'dimension_value', 'segment', 'measure', 'value', 'date']
+CATEGORICAL_COLUMNS = ['dataset', 'dimension', 'dimension_value', 'segment', 'measure']
+
+TOTAL_DIMENSION = 'total'
+TOTAL_VALUE = '전체'
+
+# 원본 표의 합계 행/열은 다른 행에서 계산할 수 있으므로 저장하지 않는다
+TOTAL_LABELS = ('합계', '계', '총합계')
+
+# 원본 컬럼 → 표준 차원
+DIMENSION_REGISTRY = {
+    'cargo': {
+        '시도': 'region',
+        '지자체': 'municipality',
+        '도로형태': 'road_form',
+        '사고유형': 'accident_type',
+        '연령대': 'driver_age',
+        '기상상태': 'weather',
+        '위반유형': 'violation',
+    },
+    'fatal': {
+        '발생지시도': 'region',
+        '발생지시군구': 'municipality',
+        '사고유형_대분류': 'accident_type',
+        '사고유형_중분류': 'accident_subtype',
+        '도로형태': 'road_form',
+        '법규위반': 'violation',
+        '주야': 'day_night',
+        '요일': 'weekday',
+    },
+    'vehicle': {
+        '도로종류별': 'road_kind',
+        '도로형태별': 'road_form',
+        '시간대별': 'time_band',
+        '요일별': 'weekday',
+        '월별': 'month',
+        '차종': 'vehicle_type',
+    },
+    'rest_area': {
+        '노선': 'route',
+    },
+}
+
+# 원본 컬럼 → 표준 측정값 (치사율처럼 합산할 수 없는 비율은 저장하지 않는다)
+MEASURE_REGISTRY = {
+    'cargo': {
+        '발생건수': 'accident_count',
+        '대형사고': 'major_accident_count',
+        '여객(건)': 'passenger_business_count',
+        '화물(건)': 'freight_business_count',
+        '사망자수': 'fatal_count',
+    },
+    'fatal': {
+        '사망자수': 'fatal_count',
+        '사상자수': 'casualty_count',
+        '중상자수': 'serious_injury_count',
+        '경상자수': 'minor_injury_count',
+        '부상신고자수': 'reported_injury_count',
+    },
+    'vehicle': {
+        '사고건수': 'accident_count',
+        '사망자수': 'fatal_count',
+        '부상자수': 'injury_count',
+        '사고건수(건)': 'accident_count',
+        '사망자수(명)': 'fatal_count',
+        '부상자수(명)': 'injury_count',
+    },
+    'rest_area': {
+        '주차(면)': 'parking_spaces',
+        '총면적(m2)': 'area_m2',
+    },
+}
+
+
+def extract_year(filename):
+    match = re.search(r'(20[0-9]{2})', filename)
+    return int(match.group(1)) if match else None
+
+
+def encode_long(df):
+    """Order the canonical columns and dictionary-encode the label columns."""
+    df = df.reindex(columns=CANONICAL_COLUMNS)
+    for col in CATEGORICAL_COLUMNS:
+        if not isinstance(df[col].dtype, pd.CategoricalDtype) or df[col].cat.categories.dtype != object:
+            df[col] = pd.Categorical(df[col].astype(object).map(str, na_action='ignore'))
+    df['value'] = pd.to_numeric(df['value'], errors='coerce').astype('float64')
+    df['date'] = pd.to_datetime(df['date']).astype('datetime64[ns]')
+    return df.dropna(subset=['value']).reset_index(drop=True)
+
+
+def concat_long(frames):
+    """Concatenate canonical long tables and encode the result.
+
+    Empty frames are left out and the label columns are cast to object first,
+    so no all-NA column (e.g. `segment` of tables without a row axis) decides
+    the result dtype.
+    """
+    frames = [frame.reindex(columns=CANONICAL_COLUMNS).astype({col: object for col in CATEGORICAL_COLUMNS})
+              for frame in frames if not frame.empty]
+    if not frames:
+        return encode_long(pd.DataFrame(columns=CANONICAL_COLUMNS))
+    return encode_long(pd.concat(frames, ignore_index=True))
+
+
+def _melt_measures(frame, dataset, measures, id_vars):
+    long = frame.melt(id_vars=id_vars, value_vars=list(measures),
+                      var_name='measure', value_name='value')
+    long['measure'] = long['measure'].map(measures)
+    long['dataset'] = dataset
+    return long
+
+
+def normalize_cargo_table(raw, file):
+    """Normalize a one-dimension '화물차' breakdown table.
+
+    The 연도별 table becomes the 'total' series; other tables use their
+    most specific non-empty dimension column for each row.
+    """
+    dims = [col for col in DIMENSION_REGISTRY['cargo'] if col in raw.columns]
+    measures = {col: m for col, m in MEASURE_REGISTRY['cargo'].items() if col in raw.columns}
+    frame = raw[list(measures)].copy()
+    year = extract_year(file)
+
+    if '연도' in raw.columns:
+        frame['dimension'] = TOTAL_DIMENSION
+        frame['dimension_value'] = raw['연도'].where(~raw['연도'].astype(str).isin(TOTAL_LABELS))
+        frame['date'] = pd.to_datetime(pd.to_numeric(frame['dimension_value'], errors='coerce')
+                                       .astype('Int64').astype(str) + '-01-01', errors='coerce')
+        frame['dimension_value'] = frame['dimension_value'].where(frame['dimension_value'].isna(), TOTAL_VALUE)
+    else:
+        present = raw[dims].notna().to_numpy()
+        # 각 행에서 값이 있는 마지막(가장 세분화된) 차원 컬럼
+        last = len(dims) - 1 - present[:, ::-1].argmax(axis=1)
+        frame['dimension'] = np.array([DIMENSION_REGISTRY['cargo'][col] for col in dims])[last]
+        frame['dimension_value'] = raw[dims].to_numpy()[np.arange(len(raw)), last]
+        frame.loc[~present.any(axis=1), 'dimension_value'] = None
+        frame['date'] = pd.Timestamp(f'{year}-01-01') if year else pd.NaT
+
+    frame = frame[frame['dimension_value'].notna()
+                  & ~frame['dimension_value'].astype(str).isin(TOTAL_LABELS)]
+    frame['dimension_value'] = frame['dimension_value'].astype(str)
+    return _melt_measures(frame, 'cargo', measures, ['dimension', 'dimension_value', 'date'])
+
+
+def normalize_fatal_records(raw, dates):
+    """Aggregate fatal accident records per day for each dimension and the total.
+
+    Zero-valued cells are dropped since they add nothing to sums.
+    """
+    measures = {col: m for col, m in MEASURE_REGISTRY['fatal'].items() if col in raw.columns}
+    values = raw[list(measures)].apply(pd.to_numeric, errors='coerce').rename(columns=measures)
+    values['accident_count'] = 1
+    values['date'] = dates.values
+    measure_names = list(measures.values()) + ['accident_count']
+
+    parts = [values.groupby('date', sort=False)[measure_names].sum().reset_index()
+             .assign(dimension=TOTAL_DIMENSION, dimension_value=TOTAL_VALUE)]
+    for col, dimension in DIMENSION_REGISTRY['fatal'].items():
+        if col not in raw.columns:
+            continue
+        part = (values.assign(dimension_value=raw[col].fillna('미상').astype(str).values)
+                .groupby(['date', 'dimension_value'], sort=False)[measure_names].sum().reset_index())
+        parts.append(part.assign(dimension=dimension))
+    frame = pd.concat(parts, ignore_index=True)
+
+    long = _melt_measures(frame, 'fatal', {m: m for m in measure_names},
+                          ['dimension', 'dimension_value', 'date'])
+    return long[long['value'] != 0]
+
+
+def normalize_rest_areas(raw):
+    """Normalize the rest-area table into route counts and capacities."""
+    raw = raw[raw['유형'] != '유형']
+    measures = {col: m for col, m in MEASURE_REGISTRY['rest_area'].items() if col in raw.columns}
+    frame = raw[list(measures)].apply(
+        lambda col: pd.to_numeric(col.astype(str).str.replace(',', ''), errors='coerce'))
+    frame['rest_area_count'] = 1
+    frame['dimension'] = 'route'
+    frame['dimension_value'] = raw['노선'].fillna('').str.strip().replace('', '미상')
+    frame['date'] = pd.NaT
+    measures = dict(measures, rest_area_count='rest_area_count')
+    return _melt_measures(frame, 'rest_area', measures, ['dimension', 'dimension_value', 'date'])
+
+
+def vehicle_family(file):
+    """Get the canonical dimension of a '차종별' workbook from its file name."""
+    for keyword, dimension in DIMENSION_REGISTRY['vehicle'].items():
+        if keyword in file:
+            return dimension
+    return 'vehicle_type'
+
+
+@lru_cache(maxsize=32)
+def vehicle_layout(dimension, header, first_row):
+    """Locate the value columns of a '차종별' workbook from its header.
+
+    `header` and `first_row` are the column labels and first row as string
+    tuples, so the layout is worked out once per workbook family. Returns
+    (header_rows, value positions, value labels).
+    """
+    if dimension == 'vehicle_type':
+        # 차종 x 측정값 표: 측정값 컬럼만 읽는다
+        positions = [i for i, label in enumerate(header) if label in MEASURE_REGISTRY['vehicle']]
+        return 0, tuple(positions), tuple(header[i] for i in positions)
+
+    header_rows = 0
+    labels = list(header)
+    if first_row and first_row[0] == '가해운전자 차종별':
+        # 두 줄 헤더: 첫 행에 세부 항목 이름이 있다
+        header_rows = 1
+        labels = list(first_row)
+    positions = [i for i, label in enumerate(labels) if i >= 2 and label not in TOTAL_LABELS]
+    return header_rows, tuple(positions), tuple(labels[i] for i in positions)
+
+
+def reshape_vehicle_table(raw, file):
+    """Reshape a '차종별' workbook into long rows with NumPy instead of a melt.
+
+    The numeric block is taken as one 2-D array and the vehicle type and
+    column labels become categorical codes repeated/tiled over it. The
+    vehicle-type family puts vehicle types in `dimension_value`; the other
+    families put them in `segment` and their column labels in `dimension_value`.
+    """
+    year = extract_year(file)
+    dimension = vehicle_family(file)
+    header = tuple(str(col).strip() for col in raw.columns)
+    first_row = tuple(str(v).strip() for v in raw.iloc[0]) if len(raw) else ()
+    header_rows, positions, labels = vehicle_layout(dimension, header, first_row)
+
+    body = raw.iloc[header_rows:]
+    row_labels = body.iloc[:, 0].astype(str).str.strip()
+    keep = ~row_labels.isin(TOTAL_LABELS).to_numpy()
+    values = (body.iloc[keep, list(positions)].apply(pd.to_numeric, errors='coerce')
+              .to_numpy(dtype='float64'))
+    n_rows, n_cols = values.shape
+
+    row_codes, row_categories = pd.factorize(row_labels[keep])
+    col_codes, col_categories = pd.factorize(pd.Index(labels))
+    row_axis = pd.Categorical.from_codes(np.repeat(row_codes, n_cols), row_categories)
+    col_axis = pd.Categorical.from_codes(np.tile(col_codes, n_rows), col_categories)
+
+    if dimension == 'vehicle_type':
+        measures = np.array([MEASURE_REGISTRY['vehicle'][label] for label in labels], dtype=object)
+        long = pd.DataFrame({'dimension_value': row_axis, 'segment': None,
+                             'measure': np.tile(measures, n_rows)})
+    else:
+        stats = body.iloc[keep, 1].map(MEASURE_REGISTRY['vehicle']).to_numpy(dtype=object)
+        long = pd.DataFrame({'dimension_value': col_axis, 'segment': row_axis,
+                             'measure': np.repeat(stats, n_cols)})
+    long['value'] = values.ravel()
+    long['dataset'] = 'vehicle'
+    long['dimension'] = dimension
+
+    if dimension == 'month':
+        months = np.array([int(re.search(r'(\d+)', label).group(1)) for label in labels])
+        long['date'] = pd.to_datetime(dict(year=year, month=np.tile(months, n_rows), day=1))
+    else:
+        long['date'] = pd.Timestamp(f'{year}-01-01')
+    return long[long['measure'].notna() & long['value'].notna()].reset_index(drop=True)
+
+
+def normalize_vehicle_table(raw, file):
+    """Normalize a '차종별' workbook: vehicle type x statistic rows, one dimension across columns."""
+    long = reshape_vehicle_table(raw, file)
+    if vehicle_family(file) == 'month':
+        # 월별 표는 차종 합계를 'total' 시계열로도 제공
+        total = (long.groupby(['date', 'measure'], sort=False)['value'].sum().reset_index()
+                 .assign(dataset='vehicle', dimension=TOTAL_DIMENSION, dimension_value=TOTAL_VALUE))
+        long = pd.concat([long, total], ignore_index=True)
+    return long
+
+
+def normalize_source(data_type, file_path, raw, dates=None):
+    """Normalize one parsed source file into the canonical long schema."""
+    file = os.path.basename(file_path)
+    if data_type == 'cargo':
+        long = normalize_cargo_table(raw, file)
+    elif data_type == 'vehicle':
+        long = normalize_vehicle_table(raw, file)
+    elif file.endswith('.csv'):
+        long = normalize_rest_areas(raw)
+    else:
+        long = normalize_fatal_records(raw, dates)
+    # 시도 표기('서울특별시', '서울')를 지명 사전의 짧은 이름 하나로
+    regions = long['dimension'] == 'region'
+    if regions.any():
+        long.loc[regions, 'dimension_value'] = canonical_region_names(long.loc[regions, 'dimension_value'])
+    return encode_long(long)
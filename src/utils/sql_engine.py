@@ -0,0 +1,357 @@
+import json
+import os
+import sqlite3
+import threading
+import pandas as pd
+from utils.cache import data_cache
+from utils.logger import get_logger, log_event, log_timing
+
+logger = get_logger('cargo.data.sql')
+
+# 질의 엔진: pandas(기본, 메모리 프레임) / sqlite / duckdb(설치된 경우)
+QUERY_ENGINE = os.environ.get('CARGO_QUERY_ENGINE', 'pandas').lower()
+SQL_BACKENDS = ('sqlite', 'duckdb')
+
+# sqlite에 한 번에 넣는 행 수 / 행을 읽어 내보낼 때 한 번에 가져오는 행 수
+INSERT_CHUNK = 50000
+FETCH_CHUNK = 20000
+
+SQL_TYPES = {
+    'sqlite': {'datetime': 'TEXT', 'number': 'REAL', 'text': 'TEXT'},
+    'duckdb': {'datetime': 'TIMESTAMP', 'number': 'DOUBLE', 'text': 'VARCHAR'},
+}
+# 행을 읽어 올 때 컬럼 종류별 pandas 타입
+SELECT_DTYPES = {'datetime': 'datetime64[ns]', 'number': 'float64', 'text': object}
+SQL_AGGS = {
+    'sum': 'COALESCE(SUM({col}), 0)',
+    'count': 'COUNT({col})',
+    'mean': 'AVG({col})',
+    'max': 'MAX({col})',
+    'min': 'MIN({col})',
+}
+
+
+def quote(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def column_kinds(df):
+    """Classify columns as 'datetime', 'number' or 'text' for storage and filtering."""
+    kinds = {}
+    for col in df.columns:
+        dtype = df[col].dtype
+        if pd.api.types.is_datetime64_any_dtype(dtype):
+            kinds[col] = 'datetime'
+        elif pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype):
+            kinds[col] = 'number'
+        else:
+            kinds[col] = 'text'
+    return kinds
+
+
+class SQLEngine:
+    """Embedded, file-backed SQL store for the query layer's datasets.
+
+    Each thread of a worker process gets its own pooled connection; a forked
+    worker opens fresh ones instead of sharing its parent's. A table is
+    reloaded only when the fingerprint of its sources changes, and the swap
+    happens in one transaction so readers see either the old or new rows.
+    Tables are written piece by piece, so loading one never needs the whole
+    dataset in memory.
+
+    sqlite files can be shared by several worker processes; duckdb lets only
+    one process open a file, so a second process fails to connect.
+    """
+
+    def __init__(self, backend, path=None):
+        if backend not in SQL_BACKENDS:
+            raise ValueError(f"Unsupported SQL backend: {backend}")
+        self.backend = backend
+        self.path = path or os.path.join(data_cache.cache_dir, f'query.{backend}')
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._reset(os.getpid())
+
+    def _reset(self, pid):
+        self._pid = pid
+        self._local = threading.local()
+        self._connections = []
+        self._root = None
+        self._tables = {}
+
+    def connection(self):
+        """Get this thread's connection, opening it on first use."""
+        with self._lock:
+            if self._pid != os.getpid():
+                # 포크된 워커는 부모 프로세스의 연결을 물려 쓰지 않는다
+                self._reset(os.getpid())
+            local = self._local
+        con = getattr(local, 'con', None)
+        if con is None:
+            con = self._connect()
+            local.con = con
+            with self._lock:
+                self._connections.append(con)
+        return con
+
+    def _connect(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        if self.backend == 'sqlite':
+            con = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            # WAL: 테이블을 교체하는 동안에도 다른 연결은 이전 스냅샷을 읽는다
+            con.execute('PRAGMA journal_mode=WAL')
+            con.execute('PRAGMA synchronous=NORMAL')
+            con.execute('CREATE TABLE IF NOT EXISTS _tables (name TEXT PRIMARY KEY, fingerprint TEXT, kinds TEXT)')
+            return con
+        import duckdb
+        with self._lock:
+            if self._root is None:
+                try:
+                    self._root = duckdb.connect(self.path)
+                except duckdb.IOException as e:
+                    # 다른 프로세스가 파일을 잡고 있으면 pandas로 몰래 돌리지 않고 실패시킨다
+                    raise RuntimeError(f'{self.path} is open in another process; duckdb allows one process '
+                                       'per database file, use CARGO_QUERY_ENGINE=sqlite with several '
+                                       'worker processes') from e
+                self._root.execute('CREATE TABLE IF NOT EXISTS _tables '
+                                   '(name VARCHAR PRIMARY KEY, fingerprint VARCHAR, kinds VARCHAR)')
+            # duckdb는 한 프로세스 안에서 루트 연결의 커서를 스레드마다 나눠 쓴다
+            return self._root.cursor()
+
+    def close(self):
+        with self._lock:
+            for con in self._connections:
+                con.close()
+            if self._root is not None:
+                self._root.close()
+            self._reset(os.getpid())
+
+    def ensure_table(self, name, fingerprint, load):
+        """Make sure table `name` holds the rows of `fingerprint`, loading them if not.
+
+        `load()` yields the rows as frames (for example one partition at a
+        time); returns the column kinds of the stored table.
+        """
+        cached = self._tables.get(name)
+        if cached is not None and cached[0] == fingerprint:
+            return cached[1]
+        con = self.connection()
+        row = con.execute('SELECT fingerprint, kinds FROM _tables WHERE name = ?', [name]).fetchone()
+        if row is None or row[0] != fingerprint:
+            with self._load_lock:
+                row = con.execute('SELECT fingerprint, kinds FROM _tables WHERE name = ?', [name]).fetchone()
+                if row is None or row[0] != fingerprint:
+                    with log_timing(logger, 'sql_table_loaded', backend=self.backend, dataset=name) as event:
+                        kinds, event['rows'], event['parts'] = self._write(con, name, fingerprint, load())
+                    row = (fingerprint, json.dumps(kinds))
+        kinds = json.loads(row[1])
+        self._tables[name] = (fingerprint, kinds)
+        return kinds
+
+    def _write(self, con, name, fingerprint, frames):
+        kinds, seen, rows, parts = {}, {}, 0, 0
+        con.execute('BEGIN IMMEDIATE' if self.backend == 'sqlite' else 'BEGIN TRANSACTION')
+        try:
+            con.execute(f'DROP TABLE IF EXISTS {quote(name)}')
+            for df in frames:
+                seen.update(dict.fromkeys(df.columns))
+                # 값이 하나도 없는 컬럼은 종류를 알 수 없으므로 값이 나오는 조각에서 추가한다
+                found = column_kinds(df.loc[:, df.notna().any().to_numpy()])
+                new = {col: kind for col, kind in found.items() if col not in kinds}
+                self._add_columns(con, name, new, create=not kinds)
+                kinds.update(new)
+                columns = [col for col in df.columns if col in kinds]
+                if columns and len(df):
+                    self._insert(con, name, pd.DataFrame({col: self._storable(df[col], kinds[col])
+                                                          for col in columns}))
+                rows += len(df)
+                parts += 1
+            # 어느 조각에도 값이 없던 컬럼은 문자열 컬럼으로 둔다
+            missing = {col: 'text' for col in seen if col not in kinds}
+            self._add_columns(con, name, missing, create=not kinds)
+            kinds.update(missing)
+            con.execute('INSERT OR REPLACE INTO _tables VALUES (?, ?, ?)',
+                        [name, fingerprint, json.dumps(kinds, ensure_ascii=False)])
+            con.execute('COMMIT')
+        except Exception:
+            con.execute('ROLLBACK')
+            raise
+        return kinds, rows, parts
+
+    def _add_columns(self, con, name, kinds, create):
+        columns = [f'{quote(col)} {SQL_TYPES[self.backend][kind]}' for col, kind in kinds.items()]
+        if not columns:
+            return
+        if create:
+            con.execute(f'CREATE TABLE {quote(name)} ({", ".join(columns)})')
+            return
+        for column in columns:
+            con.execute(f'ALTER TABLE {quote(name)} ADD COLUMN {column}')
+
+    def _insert(self, con, name, frame):
+        columns = ', '.join(quote(col) for col in frame.columns)
+        if self.backend == 'sqlite':
+            frame = frame.astype(object).where(frame.notna(), None)
+            insert = f'INSERT INTO {quote(name)} ({columns}) VALUES ({", ".join("?" * len(frame.columns))})'
+            for start in range(0, len(frame), INSERT_CHUNK):
+                con.executemany(insert, frame.iloc[start:start + INSERT_CHUNK].itertuples(index=False, name=None))
+            return
+        con.register('_incoming', frame)
+        try:
+            con.execute(f'INSERT INTO {quote(name)} ({columns}) SELECT * FROM _incoming')
+        finally:
+            con.unregister('_incoming')
+
+    def _storable(self, values, kind):
+        if kind == 'datetime':
+            return values.dt.strftime('%Y-%m-%d %H:%M:%S') if self.backend == 'sqlite' else values
+        if kind == 'number':
+            return pd.to_numeric(values, errors='coerce').astype('float64')
+        return values.astype(object).map(str, na_action='ignore')
+
+    def _timestamp(self, value):
+        value = pd.Timestamp(value)
+        return value.strftime('%Y-%m-%d %H:%M:%S') if self.backend == 'sqlite' else value.to_pydatetime()
+
+    def translate(self, name, kinds, filters, group_by, measures):
+        """Translate a normalized query (see utils.query.normalize_query) into SQL and parameters."""
+        where, params = self._where(kinds, filters)
+        select = [quote(col) for col in group_by]
+        for measure, agg in measures:
+            column = quote(measure) if kinds.get(measure) == 'number' else f'CAST({quote(measure)} AS DOUBLE)'
+            alias = measure if agg == 'sum' else f'{measure}_{agg}'
+            select.append(f'{SQL_AGGS[agg].format(col=column)} AS {quote(alias)}')
+        sql = f'SELECT {", ".join(select)} FROM {quote(name)}'
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+        if group_by:
+            positions = ', '.join(str(i + 1) for i in range(len(group_by)))
+            order = ', '.join(f'{quote(col)} NULLS LAST' for col in group_by)
+            sql += f' GROUP BY {positions} ORDER BY {order}'
+        return sql, params
+
+    def _where(self, kinds, filters):
+        where, params = [], []
+        for col, (op, *args) in filters:
+            column = quote(col)
+            if op == 'between':
+                start, end = args
+                if start is not None:
+                    where.append(f'{column} >= ?')
+                    params.append(self._timestamp(start))
+                if end is not None:
+                    where.append(f'{column} <= ?')
+                    params.append(self._timestamp(end))
+                continue
+            values = list(args[0] if op == 'in' else args)
+            if kinds.get(col) == 'number':
+                # 숫자 컬럼은 '2020'과 2020.0이 같은 값으로 맞도록 숫자로 비교
+                values = [float(v) for v in values if _is_number(v)]
+            elif kinds.get(col) == 'datetime':
+                values = [self._timestamp(v) for v in values]
+            if not values:
+                where.append('1 = 0')
+                continue
+            where.append(f'{column} IN ({", ".join("?" * len(values))})')
+            params.extend(values)
+        return where, params
+
+    def query(self, name, fingerprint, load, filters, group_by, measures):
+        """Run a normalized query against table `name`, loading it first when stale."""
+        kinds = self.ensure_table(name, fingerprint, load)
+        sql, params = self.translate(name, kinds, filters, group_by, measures)
+        rows = self.connection().execute(sql, params).fetchall()
+        columns = list(group_by) + [m if agg == 'sum' else f'{m}_{agg}' for m, agg in measures]
+        result = pd.DataFrame(rows, columns=columns)
+        for col in group_by:
+            if kinds.get(col) == 'datetime':
+                result[col] = pd.to_datetime(result[col])
+            elif kinds.get(col) == 'number':
+                values = pd.to_numeric(result[col])
+                if values.notna().all() and (values % 1 == 0).all():
+                    values = values.astype('int64')
+                result[col] = values
+        return result
+
+    def count(self, name, fingerprint, load):
+        """Count the rows of table `name`, loading it first when stale."""
+        self.ensure_table(name, fingerprint, load)
+        return self.connection().execute(f'SELECT COUNT(*) FROM {quote(name)}').fetchone()[0]
+
+    def select(self, name, fingerprint, load, filters, chunk_rows=FETCH_CHUNK):
+        """Get (header, chunks) for the rows of table `name` matching `filters`.
+
+        `header` is an empty frame with the table's columns and dtypes;
+        `chunks` yields the matching rows `chunk_rows` at a time from the
+        cursor, so a large selection is never held in memory at once.
+        """
+        kinds = self.ensure_table(name, fingerprint, load)
+        header = pd.DataFrame({col: pd.Series(dtype=SELECT_DTYPES[kind]) for col, kind in kinds.items()})
+        where, params = self._where(kinds, filters)
+        sql = f'SELECT {", ".join(quote(col) for col in kinds)} FROM {quote(name)}'
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+        if 'date' in kinds:
+            sql += f' ORDER BY {quote("date")} NULLS LAST'
+
+        def chunks():
+            # 내보내기는 오래 걸릴 수 있으므로 스레드 연결 대신 전용 커서로 읽는다
+            cursor = self.connection().cursor()
+            try:
+                cursor.execute(sql, params)
+                while True:
+                    rows = cursor.fetchmany(chunk_rows)
+                    if not rows:
+                        break
+                    chunk = pd.DataFrame(rows, columns=list(kinds))
+                    for col, kind in kinds.items():
+                        chunk[col] = (pd.to_datetime(chunk[col]) if kind == 'datetime'
+                                      else chunk[col].astype(SELECT_DTYPES[kind]))
+                    yield chunk
+            finally:
+                cursor.close()
+        return header, chunks()
+
+
+def _is_number(value):
+    try:
+        float(value)
+        return True
+    except (TypeError, ValueError):
+        return False
+
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def get_engine(backend):
+    """Get the process-wide engine of a SQL backend."""
+    with _engines_lock:
+        if backend not in _engines:
+            _engines[backend] = SQLEngine(backend)
+            log_event(logger, 'sql_engine_opened', backend=backend, path=_engines[backend].path)
+        return _engines[backend]
+
+
+if __name__ == '__main__':
+    # pandas와 SQL 엔진 결과·시간 비교: python -m utils.sql_engine [sqlite|duckdb] (src 폴더에서)
+    import sys
+    import time
+    from utils.query import compare_engines, clear_query_cache
+
+    backend = sys.argv[1] if len(sys.argv) > 1 else 'sqlite'
+    queries = [
+        ('fatal', {}, ['region'], ['fatal_count']),
+        ('fatal', {'date': ('2020-01-01', '2021-12-31')}, ['accident_type'], ['fatal_count']),
+        ('fatal_temporal', {}, ['weekday', 'hour'], ['fatal_count']),
+        ('canonical', {'dataset': 'fatal', 'measure': 'fatal_count', 'dimension': 'region'},
+         ['dimension_value'], ['value']),
+        ('canonical', {'dataset': 'cargo', 'dimension': 'total'}, ['date'], [('value', 'mean')]),
+        ('cargo', {'region': ['서울', '부산']}, ['year'], ['accident_count', ('fatal_rate', 'max')]),
+    ]
+    for dataset, filters, group_by, measures in queries:
+        clear_query_cache()
+        started = time.perf_counter()
+        _, _, report = compare_engines(dataset, filters, group_by, measures, engine=backend)
+        print(f'{dataset:15} {",".join(group_by):22} {report} {1000 * (time.perf_counter() - started):.0f} ms')
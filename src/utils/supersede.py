@@ -0,0 +1,125 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dash.exceptions import PreventUpdate
+from utils.logger import get_logger, log_event
+from utils.result_cache import RESULT_CACHE_PATH
+
+logger = get_logger('cargo.app.supersede')
+
+# 기억하는 (세션, 출력) 쌍의 최대 개수
+MAX_TRACKED = 10000
+# 공유 파일에서는 이 횟수만큼 등록할 때마다 한 번 오래된 쌍을 지운다
+PRUNE_EVERY = 500
+
+
+class TrackedRequest:
+    """One callback run, identified by its session, output and client sequence number."""
+
+    def __init__(self, tracker, key, seq):
+        self.tracker = tracker
+        self.key = key
+        self.seq = seq
+
+    def is_latest(self):
+        return self.key is None or self.tracker.latest(self.key) <= self.seq
+
+    def checkpoint(self, stage=None):
+        """Drop this run (no update) if a newer request for the same output has started."""
+        if not self.is_latest():
+            log_event(logger, 'request_superseded', session=self.key[0], output=self.key[1],
+                      seq=self.seq, latest=self.tracker.latest(self.key), stage=stage)
+            raise PreventUpdate
+
+
+class RequestTracker:
+    """Remember the newest request per (session, output) so older runs can stop early.
+
+    Computations cannot be interrupted mid-query, so a superseded run stops
+    at its next checkpoint, and a run that starts after a newer one is
+    dropped immediately. The newest sequence numbers are kept in a table of
+    the shared result cache file so that every worker process sees them; with
+    that file disabled (CARGO_RESULT_CACHE=0) they stay in this process and a
+    run is only superseded by newer requests served by the same worker.
+    Tracking errors never fail a callback; the run just continues.
+    """
+
+    def __init__(self, max_tracked=MAX_TRACKED, path=RESULT_CACHE_PATH):
+        self.max_tracked = max_tracked
+        self.path = path if path not in (None, '', '0') else None
+        self._latest = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._registered = 0
+
+    def _connect(self):
+        # 연결은 스레드마다 두고, fork로 만든 워커에서는 새로 연다
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('CREATE TABLE IF NOT EXISTS latest_requests (session TEXT NOT NULL, output TEXT NOT NULL, '
+                     'seq INTEGER NOT NULL, updated REAL NOT NULL, PRIMARY KEY (session, output))')
+        conn.execute('CREATE INDEX IF NOT EXISTS latest_requests_updated ON latest_requests (updated)')
+        self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def latest(self, key):
+        if self.path is None:
+            with self._lock:
+                return self._latest.get(key, -1)
+        try:
+            row = self._connect().execute('SELECT seq FROM latest_requests WHERE session = ? AND output = ?',
+                                          (str(key[0]), key[1])).fetchone()
+        except sqlite3.Error as e:
+            log_event(logger, 'request_tracker_error', level=logging.WARNING, operation='latest', error=str(e))
+            return -1
+        return -1 if row is None else row[0]
+
+    def _register(self, key, seq):
+        if self.path is None:
+            with self._lock:
+                if seq > self._latest.get(key, -1):
+                    self._latest[key] = seq
+                self._latest.move_to_end(key)
+                while len(self._latest) > self.max_tracked:
+                    self._latest.popitem(last=False)
+            return
+        with self._lock:
+            self._registered += 1
+            prune = self._registered % PRUNE_EVERY == 0
+        try:
+            conn = self._connect()
+            conn.execute('INSERT INTO latest_requests VALUES (?, ?, ?, ?) ON CONFLICT (session, output) '
+                         'DO UPDATE SET seq = MAX(seq, excluded.seq), updated = excluded.updated',
+                         (str(key[0]), key[1], seq, time.time()))
+            if prune:
+                conn.execute('DELETE FROM latest_requests WHERE rowid IN (SELECT rowid FROM latest_requests '
+                             'ORDER BY updated DESC LIMIT -1 OFFSET ?)', (self.max_tracked,))
+        except sqlite3.Error as e:
+            log_event(logger, 'request_tracker_error', level=logging.WARNING, operation='begin', error=str(e))
+
+    def begin(self, session, output, seq):
+        """Register a run; requests without a session or sequence number are never superseded."""
+        if session is None or seq is None:
+            return TrackedRequest(self, None, seq)
+        key = (session, output)
+        self._register(key, seq)
+        request = TrackedRequest(self, key, seq)
+        request.checkpoint('queued')
+        return request
+
+    def begin_query(self, query, output):
+        """Register a run for a debounced client query ({'session', 'seq', ...})."""
+        if not query:
+            raise PreventUpdate
+        return self.begin(query.get('session'), output, query.get('seq'))
+
+
+request_tracker = RequestTracker()
@@ -0,0 +1,152 @@
+import base64
+import gzip
+import os
+import numpy as np
+import plotly.graph_objects as go
+import plotly.io as pio
+from flask import request
+from utils.logger import get_logger, log_event
+
+logger = get_logger('cargo.app.transport')
+
+# 숫자 배열을 base64 typed array로 보낼지 여부와 최소 길이 (짧은 배열은 JSON이 더 작다)
+TYPED_ARRAYS = os.environ.get('CARGO_TYPED_ARRAYS', '1') != '0'
+TYPED_ARRAY_MIN_LENGTH = 16
+
+# 응답 gzip 압축 수준(0이면 끔)과 압축할 최소 크기(바이트)
+GZIP_LEVEL = int(os.environ.get('CARGO_GZIP_LEVEL', '6'))
+GZIP_MIN_BYTES = 1024
+GZIP_MIMETYPES = ('application/json', 'text/html', 'text/css', 'application/javascript', 'text/plain')
+
+# plotly.js typed array 형식의 dtype 코드
+TYPED_DTYPES = {
+    np.dtype('float64'): 'f8',
+    np.dtype('float32'): 'f4',
+    np.dtype('int32'): 'i4',
+    np.dtype('uint32'): 'u4',
+    np.dtype('int16'): 'i2',
+    np.dtype('uint16'): 'u2',
+    np.dtype('int8'): 'i1',
+    np.dtype('uint8'): 'u1',
+}
+INT_DTYPES = ('uint8', 'int8', 'uint16', 'int16', 'uint32', 'int32')
+
+# 지도 좌표는 float32로 충분하다 (1m 미만 오차) — 크기가 절반이고 gzip도 잘 된다
+COORDINATE_KEYS = ('lat', 'lon')
+
+try:
+    import orjson  # noqa: F401
+    # Dash 응답과 그림 직렬화를 orjson으로 (numpy 배열을 숫자 단위로 풀어 쓰지 않는다)
+    pio.json.config.default_engine = 'orjson'
+    JSON_ENGINE = 'orjson'
+except ImportError:
+    JSON_ENGINE = 'json'
+
+
+def _is_number_or_gap(value):
+    return value is None or (isinstance(value, (int, float, np.number)) and not isinstance(value, (bool, np.bool_)))
+
+
+def typed_array(values, coordinates=False):
+    """Encode a 1-D or 2-D numeric array as {'dtype', 'bdata', 'shape'}, or None if it should stay JSON.
+
+    Integer-valued arrays use the smallest integer type that holds them;
+    `coordinates` sends fractional values as float32 instead of float64.
+    """
+    try:
+        array = np.asarray(values)
+    except (TypeError, ValueError):
+        return None
+    if array.ndim not in (1, 2) or array.size < TYPED_ARRAY_MIN_LENGTH:
+        return None
+    if array.dtype == object and all(_is_number_or_gap(value) for value in array.flat):
+        # 선 사이를 끊는 None이 섞인 좌표 목록은 NaN(끊김)으로 보낸다
+        array = array.astype('float64')
+    if array.dtype.kind not in 'iuf':
+        return None
+    if array.dtype.kind == 'f' and np.isfinite(array).all() and (array % 1 == 0).all():
+        # 건수처럼 정수 값만 담긴 실수 배열은 정수 배열로 보낸다
+        array = array.astype('int64')
+    if array.dtype.kind in 'iu':
+        # 값 범위에 맞는 가장 작은 정수형 (int64는 typed array가 없다)
+        low, high = array.min(), array.max()
+        for dtype in INT_DTYPES:
+            info = np.iinfo(dtype)
+            if info.min <= low and high <= info.max:
+                array = array.astype(dtype)
+                break
+        else:
+            array = array.astype('float64')
+    elif coordinates:
+        array = array.astype('float32')
+    elif array.dtype not in TYPED_DTYPES:
+        array = array.astype('float64')
+    array = np.ascontiguousarray(array, dtype=array.dtype.newbyteorder('<'))
+    encoded = {'dtype': TYPED_DTYPES[array.dtype.newbyteorder('=')],
+               'bdata': base64.b64encode(array.tobytes()).decode('ascii')}
+    if array.ndim == 2:
+        encoded['shape'] = f'{array.shape[0]},{array.shape[1]}'
+    return encoded
+
+
+def _encode_arrays(node, key=None):
+    if isinstance(node, dict):
+        return {key: _encode_arrays(value, key) for key, value in node.items()}
+    if isinstance(node, (list, tuple, np.ndarray)):
+        encoded = typed_array(node, coordinates=key in COORDINATE_KEYS)
+        if encoded is not None:
+            return encoded
+        if isinstance(node, np.ndarray):
+            return node
+        return [_encode_arrays(value) if isinstance(value, dict) else value for value in node]
+    return node
+
+
+def compact_figure(fig):
+    """Convert a figure to the dict sent to the browser, with numeric trace arrays as typed arrays.
+
+    assets/typed_arrays.js decodes the arrays back into JavaScript typed arrays
+    before plotly.js draws the figure, so layout, Patch updates and hover values
+    work as with plain lists.
+    """
+    figure = fig.to_plotly_json() if isinstance(fig, go.Figure) else dict(fig)
+    if TYPED_ARRAYS:
+        figure['data'] = [_encode_arrays(trace) for trace in figure.get('data', [])]
+    return figure
+
+
+def _accepts_gzip(header):
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        if coding.strip().lower() in ('gzip', '*'):
+            q = params.strip()
+            try:
+                return not (q.startswith('q=') and float(q[2:]) == 0)
+            except ValueError:
+                return True
+    return False
+
+
+def compress_response(response):
+    """Gzip a response body when the client accepts it and the body is large enough."""
+    # 스트리밍 응답(내보내기)은 조각 단위로 흘려보내야 하므로 그대로 둔다
+    if (GZIP_LEVEL <= 0 or response.direct_passthrough or response.is_streamed or response.status_code != 200
+            or 'Content-Encoding' in response.headers or response.mimetype not in GZIP_MIMETYPES):
+        return response
+    response.vary.add('Accept-Encoding')
+    if not _accepts_gzip(request.headers.get('Accept-Encoding', '')):
+        return response
+    data = response.get_data()
+    if len(data) < GZIP_MIN_BYTES:
+        return response
+    response.set_data(gzip.compress(data, compresslevel=GZIP_LEVEL))
+    response.headers['Content-Encoding'] = 'gzip'
+    return response
+
+
+def enable_compression(server):
+    """Negotiate gzip for the Flask server behind a Dash app (layout and callback responses)."""
+    server.after_request(compress_response)
+    log_event(logger, 'compression_enabled', level=GZIP_LEVEL, json_engine=JSON_ENGINE,
+              typed_arrays=TYPED_ARRAYS)
+    return server
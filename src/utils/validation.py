@@ -0,0 +1,101 @@
+import logging
+import numpy as np
+import pandas as pd
+from utils.logger import get_logger, log_event
+
+logger = get_logger('cargo.data.validation')
+
+# 숫자여야 하고 0 이상이어야 하는 측정값 컬럼
+MEASURE_COLUMNS = {
+    'cargo': ['accident_count', 'fatal_count', 'fatal_rate'],
+    'vehicle': ['accident_count'],
+    'fatal': ['fatal_count'],
+}
+
+# 좌표 허용 범위 (마라도~휴전선, 백령도~독도를 조금 넉넉하게)
+COORDINATE_RANGES = {
+    'lat': (32.9, 38.9),
+    'lon': (124.0, 132.0),
+}
+
+QUARANTINE_COLUMNS = ['file', 'source_row', 'reason']
+REASON_SEPARATOR = ';'
+
+
+def row_checks(data_type, rows):
+    """Evaluate every check on whole columns.
+
+    Returns ({reason: boolean mask of failing rows}, {column: numeric values}).
+    Checks only cover columns the file has; missing values pass (only values
+    that are present and wrong fail), except dates, which every record needs.
+    """
+    checks, numeric = {}, {}
+    for col in MEASURE_COLUMNS.get(data_type, []):
+        if col in rows.columns:
+            values = pd.to_numeric(rows[col], errors='coerce')
+            checks[f'non_numeric:{col}'] = rows[col].notna() & values.isna()
+            checks[f'negative:{col}'] = values < 0
+            numeric[col] = values
+    for col, (low, high) in COORDINATE_RANGES.items():
+        if col in rows.columns:
+            values = pd.to_numeric(rows[col], errors='coerce')
+            checks[f'non_numeric:{col}'] = rows[col].notna() & values.isna()
+            checks[f'out_of_range:{col}'] = (values < low) | (values > high)
+            numeric[col] = values
+    if 'date' in rows.columns:
+        # 사망사고는 발생년월일시를, 통계표는 파일명이나 연도 컬럼을 읽지 못한 행
+        checks['invalid_date'] = rows['date'].isna()
+    return checks, numeric
+
+
+def validate_rows(data_type, rows, file, raw=None):
+    """Split a parsed source file into valid rows and quarantined rows.
+
+    `valid` keeps the passing rows with the checked columns converted to
+    numbers, so nothing downstream coerces them again. `quarantine` holds
+    the failing rows as read (from `raw` when given, which must share the
+    rows' index) with the file, the row's position in it and every failed
+    check in `reason`. `quality` counts the rows and the failures per check.
+    """
+    checks, numeric = row_checks(data_type, rows)
+    names = np.array(list(checks), dtype=object)
+    failures = (np.column_stack([mask.to_numpy(dtype=bool) for mask in checks.values()])
+                if checks else np.zeros((len(rows), 0), dtype=bool))
+    failed = failures.any(axis=1)
+
+    valid = rows[~failed].copy()
+    for col, values in numeric.items():
+        valid[col] = values[~failed]
+
+    source = rows if raw is None else raw.loc[rows.index]
+    quarantine = source[failed].copy()
+    # 실패한 행만 사유 문자열을 만든다
+    quarantine.insert(0, 'reason', [REASON_SEPARATOR.join(names[row]) for row in failures[failed]])
+    quarantine.insert(0, 'source_row', rows.index[failed].to_numpy())
+    quarantine.insert(0, 'file', file)
+
+    counts = failures.sum(axis=0)
+    quality = {'rows': len(rows), 'valid': len(valid), 'quarantined': int(failed.sum()),
+               'checks': {name: int(count) for name, count in zip(names, counts) if count}}
+    if quality['quarantined']:
+        log_event(logger, 'rows_quarantined', level=logging.WARNING, dataset=data_type, file=file,
+                  rows=quality['rows'], quarantined=quality['quarantined'], checks=quality['checks'])
+    return valid, quarantine.reset_index(drop=True), quality
+
+
+if __name__ == '__main__':
+    # 오프라인 실행: python -m utils.validation [cargo|vehicle|fatal] (src 폴더에서)
+    import argparse
+    from utils.ingest import load_quarantine, quality_report
+
+    parser = argparse.ArgumentParser(description='Show the ingest quality report and quarantined rows')
+    parser.add_argument('datasets', nargs='*', default=list(MEASURE_COLUMNS))
+    parser.add_argument('--rows', type=int, default=20, help='quarantined rows to show per dataset')
+    args = parser.parse_args()
+    with pd.option_context('display.width', 200, 'display.max_columns', 20):
+        for dataset in args.datasets:
+            print(f'== {dataset}')
+            print(quality_report(dataset).to_string(index=False))
+            quarantine = load_quarantine(dataset)
+            if len(quarantine):
+                print(quarantine.head(args.rows).to_string(index=False))
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# 앱과 같은 방식으로 src 폴더의 모듈을 불러온다 (utils.*, callbacks.*)
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
@@ -0,0 +1,39 @@
+import os
+import pandas as pd
+from utils import cache
+
+
+def test_clear_cached_data_drops_only_that_dataset(monkeypatch):
+    monkeypatch.setattr(cache, '_data', cache.OrderedDict())
+    frame = pd.DataFrame({'a': [1]})
+    for key in [('cargo', 1), ('cargo', 2), ('vehicle', 1), ('fatal', 3)]:
+        cache._data[key] = frame
+    cache.clear_cached_data('cargo')
+    assert list(cache._data) == [('vehicle', 1), ('fatal', 3)]
+    cache.clear_cached_data()
+    assert not cache._data
+
+
+def test_get_cached_data_keys_on_version_after_ingest(monkeypatch):
+    from utils import ingest
+    monkeypatch.setattr(cache, '_data', cache.OrderedDict())
+    versions = {'cargo': 4}
+
+    def ingest_dataset(data_type):
+        versions[data_type] += 1
+        return {2020}
+
+    monkeypatch.setattr(ingest, 'ingest_dataset', ingest_dataset)
+    monkeypatch.setattr(ingest, 'source_version', lambda data_type: versions[data_type])
+    monkeypatch.setattr(ingest, 'read_dataset', lambda data_type: pd.DataFrame({'a': [versions[data_type]]}))
+    df = cache.get_cached_data('cargo')
+    assert list(cache._data) == [('cargo', 5)]
+    assert df['a'].tolist() == [5]
+
+
+def test_save_to_cache_replaces_snapshot(tmp_path):
+    data_cache = cache.DataCache(cache_dir=str(tmp_path))
+    data_cache.save_to_cache(pd.DataFrame({'a': [1]}), 'cargo')
+    data_cache.save_to_cache(pd.DataFrame({'a': [2]}), 'cargo')
+    assert pd.read_parquet(data_cache.get_cache_path('cargo'))['a'].tolist() == [2]
+    assert [p.name for p in tmp_path.iterdir()] == [os.path.basename(data_cache.get_cache_path('cargo'))]
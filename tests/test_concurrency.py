@@ -0,0 +1,90 @@
+import threading
+import pandas as pd
+import pytest
+from utils import query
+
+TIMEOUT = 10
+
+
+def frame(value):
+    return pd.DataFrame({'date': pd.to_datetime(['2023-01-01', '2023-02-01']),
+                         'region': ['서울', '부산'], 'accident_count': [value, value]})
+
+
+def ingesting_loader(source, value, started=None, proceed=None):
+    # 원본을 수집하는 로더처럼 파티션 변경 리스너를 호출한다
+    def load():
+        if started is not None:
+            started.set()
+            proceed.wait(TIMEOUT)
+        query._refresh_on_ingest(source, {'2023'})
+        return frame(value)
+    return load
+
+
+@pytest.fixture
+def register():
+    names = []
+
+    def register(name, loader, sources):
+        query.register_dataset(name, loader, dimensions=['date', 'region'], measures=['accident_count'],
+                               sources=sources)
+        names.append(name)
+    yield register
+    # 교착되었다면 잠금이 풀리지 않으므로 기다리지 않고 정리를 건너뛴다
+    if query._lock.acquire(timeout=1):
+        try:
+            for name in names:
+                query.invalidate_dataset(name)
+                query._datasets.pop(name, None)
+        finally:
+            query._lock.release()
+
+
+def run_threads(*targets):
+    errors = []
+
+    def guarded(target):
+        try:
+            target()
+        except Exception as e:
+            errors.append(e)
+    threads = [threading.Thread(target=guarded, args=(target,), daemon=True) for target in targets]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(TIMEOUT)
+    assert not any(thread.is_alive() for thread in threads), 'deadlocked'
+    assert not errors
+
+
+def test_cold_loads_on_two_threads(register):
+    register('test_cold_a', ingesting_loader('test_src_a', 1), ['test_src_a'])
+    register('test_cold_b', ingesting_loader('test_src_b', 2), ['test_src_b'])
+    register('test_cold_ab', lambda: frame(3), ['test_src_a', 'test_src_b'])
+    query.get_frame('test_cold_ab')
+    version = query.get_data_version('test_cold_ab')
+
+    run_threads(lambda: query.get_frame('test_cold_a'), lambda: query.get_rollup('test_cold_b'))
+
+    assert query.get_frame('test_cold_a')['accident_count'].sum() == 2
+    assert query.get_rollup('test_cold_b')['accident_count'].sum() == 4
+    # 두 로더의 수집 알림이 모두 이미 올라온 파생 데이터셋을 다시 만들었다
+    assert query.get_data_version('test_cold_ab') == version + 2
+
+
+def test_ingest_refresh_while_a_request_builds(register):
+    # 요청 스레드가 프레임을 만드는 도중 다른 스레드(파이프라인, 파일 감시)의 수집이 새로 고침을 시작한다
+    started, proceed = threading.Event(), threading.Event()
+    register('test_build', ingesting_loader('test_src_build', 1, started, proceed), ['test_src_build'])
+    register('test_loaded', lambda: frame(5), ['test_src_build', 'test_src_other'])
+    query.get_frame('test_loaded')
+
+    def ingest_elsewhere():
+        started.wait(TIMEOUT)
+        threading.Timer(0.2, proceed.set).start()
+        query._refresh_on_ingest('test_src_other', {'2023'})
+
+    run_threads(lambda: query.get_frame('test_build'), ingest_elsewhere)
+    assert query.get_frame('test_build')['accident_count'].sum() == 2
+    assert query.run_query('test_loaded', measures=['accident_count'], engine='pandas').iloc[0, 0] == 10
@@ -0,0 +1,39 @@
+import pandas as pd
+from utils.data_loader import parse_cargo_frame
+
+
+def test_cargo_total_rows_are_dropped():
+    raw = pd.DataFrame({
+        '시도': ['서울특별시', '부산', '합계'],
+        '발생건수': [10, 5, 15],
+        '사망자수': [1, 0, 1],
+    })
+    df = parse_cargo_frame(raw, '2020년 시도별 화물차 교통사고.xls')
+    assert df['region'].astype(str).tolist() == ['서울', '부산']
+    assert df['accident_count'].sum() == 15
+    # 원본 행 번호(격리 표의 source_row)가 그대로 남는다
+    assert df.index.tolist() == [0, 1]
+
+
+def test_cargo_total_rows_in_other_dimensions_are_dropped():
+    raw = pd.DataFrame({
+        '사고유형': ['추돌', '전도', ' 계'],
+        '발생건수': [3, 4, 7],
+    })
+    df = parse_cargo_frame(raw, '2020년 사고유형별 화물차 교통사고.xls')
+    assert df['accident_type'].tolist() == ['추돌', '전도']
+    assert df['region'].isna().all()
+
+
+def test_concat_long_skips_empty_and_all_na_columns():
+    import warnings
+    from utils.schema import CANONICAL_COLUMNS, concat_long
+    with_segment = pd.DataFrame({'dataset': ['vehicle'], 'dimension': ['vehicle_type'], 'dimension_value': ['화물'],
+                                 'segment': ['대형'], 'measure': ['accident_count'], 'value': [3.0],
+                                 'date': pd.to_datetime(['2020-01-01'])})
+    without_segment = with_segment.assign(segment=float('nan'), value=5.0, date=pd.NaT)
+    with warnings.catch_warnings():
+        warnings.simplefilter('error', FutureWarning)
+        long = concat_long([pd.DataFrame(columns=CANONICAL_COLUMNS), with_segment, without_segment])
+    assert long['value'].tolist() == [3.0, 5.0]
+    assert long['segment'].tolist()[0] == '대형' and pd.isna(long['segment'].tolist()[1])
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+from utils.hotspots import dbscan, neighbor_pairs
+
+EPS = 1.0
+MIN_SAMPLES = 4
+
+
+def sample_points():
+    rng = np.random.default_rng(7)
+    # 두 밀집 군집 + 흩어진 점 + 격자 칸 경계 위의 점 (거리가 정확히 eps인 쌍 포함)
+    dense = np.vstack([rng.normal((2.0, 2.0), 0.3, (25, 2)), rng.normal((6.5, 3.0), 0.4, (25, 2))])
+    scattered = rng.uniform(0, 10, (30, 2))
+    boundary = np.array([[4.0, 4.0], [5.0, 4.0], [4.0, 5.0], [3.0, 4.0], [4.0, 3.0],
+                         [8.0, 8.0], [9.0, 8.0], [8.0, 9.0], [7.0, 8.0], [8.0, 7.0], [10.0, 8.0], [-1.0, 0.0]])
+    points = np.vstack([dense, scattered, boundary])
+    return points[:, 0], points[:, 1]
+
+
+def brute_force_dbscan(x, y, eps, min_samples):
+    # O(n²) 기준 구현: 핵심 지점의 연결 성분, 경계 지점이 속할 수 있는 군집 집합
+    near = (x[:, None] - x) ** 2 + (y[:, None] - y) ** 2 <= eps * eps
+    core = near.sum(axis=1) >= min_samples
+    labels = np.full(len(x), -1)
+    cluster = 0
+    for start in np.flatnonzero(core):
+        if labels[start] >= 0:
+            continue
+        stack = [start]
+        labels[start] = cluster
+        while stack:
+            p = stack.pop()
+            for q in np.flatnonzero(near[p] & core):
+                if labels[q] < 0:
+                    labels[q] = cluster
+                    stack.append(q)
+        cluster += 1
+    allowed = [{labels[q] for q in np.flatnonzero(near[p] & core)} for p in range(len(x))]
+    return core, labels, allowed
+
+
+def test_neighbor_pairs_match_brute_force():
+    x, y = sample_points()
+    i, j = neighbor_pairs(x, y, EPS)
+    found = {tuple(sorted(pair)) for pair in zip(i.tolist(), j.tolist())}
+    assert len(found) == len(i)
+    d2 = (x[:, None] - x) ** 2 + (y[:, None] - y) ** 2
+    expected = {(a, b) for a, b in zip(*np.nonzero(d2 <= EPS * EPS)) if a < b}
+    assert found == expected
+
+
+@pytest.mark.parametrize('min_samples', [3, MIN_SAMPLES, 6])
+def test_dbscan_matches_brute_force(min_samples):
+    x, y = sample_points()
+    labels = dbscan(x, y, eps=EPS, min_samples=min_samples)
+    core, expected, allowed = brute_force_dbscan(x, y, EPS, min_samples)
+    border = ~core & np.array([bool(a) for a in allowed])
+    noise = ~core & ~border
+    assert border.any() and noise.any()
+
+    # 핵심 지점은 같은 분할이어야 한다 (번호만 다를 수 있다)
+    mapping = dict(zip(labels[core].tolist(), expected[core].tolist()))
+    assert len(mapping) == len(set(mapping.values())) == expected.max() + 1
+    assert [mapping[label] for label in labels[core]] == expected[core].tolist()
+    # 경계 지점은 이웃한 핵심 지점의 군집 중 하나, 나머지는 잡음
+    for p in np.flatnonzero(border):
+        assert mapping[labels[p]] in allowed[p]
+    assert (labels[noise] == -1).all()
+    # 군집 번호는 크기 순이다
+    sizes = np.bincount(labels[labels >= 0])
+    assert (np.diff(sizes) <= 0).all()
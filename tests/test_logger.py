@@ -0,0 +1,36 @@
+import logging
+import pytest
+from utils.logger import get_logger, log_timing
+
+
+@pytest.fixture
+def records():
+    logger = get_logger('cargo.test.logger')
+    captured = []
+    handler = logging.Handler()
+    handler.emit = captured.append
+    logger.addHandler(handler)
+    logger.setLevel(logging.DEBUG)
+    yield logger, captured
+    logger.removeHandler(handler)
+
+
+def test_log_timing_emits_event_on_success(records):
+    logger, captured = records
+    with log_timing(logger, 'file_loaded', file='a.csv') as event:
+        event['rows'] = 3
+    assert [r.getMessage() for r in captured] == ['file_loaded']
+    assert captured[0].levelno == logging.INFO
+    assert captured[0].fields['rows'] == 3
+    assert 'duration_ms' in captured[0].fields
+
+
+def test_log_timing_logs_error_and_reraises(records):
+    logger, captured = records
+    with pytest.raises(FileNotFoundError):
+        with log_timing(logger, 'file_loaded', file='missing.csv'):
+            raise FileNotFoundError('missing.csv')
+    assert [r.getMessage() for r in captured] == ['file_loaded_failed']
+    assert captured[0].levelno == logging.ERROR
+    assert captured[0].fields['error'] == "FileNotFoundError('missing.csv')"
+    assert captured[0].fields['file'] == 'missing.csv'
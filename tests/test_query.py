@@ -0,0 +1,195 @@
+import numpy as np
+import pandas as pd
+import pytest
+from utils import query
+from utils.query import normalize_query, plan_query, run_query
+
+
+def sample_frame():
+    dates = pd.date_range('2023-01-01', '2023-06-30', freq='D')
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        'date': dates.repeat(2),
+        'region': np.tile(['서울', '부산'], len(dates)),
+        'accident_type': rng.choice(['추돌', '전도', '기타'], 2 * len(dates)),
+        'accident_count': rng.integers(0, 20, 2 * len(dates)).astype(float),
+        'fatal_count': rng.integers(0, 3, 2 * len(dates)).astype(float),
+    })
+    # 결측 측정값이 섞여 있어도 롤업과 원본의 건수/평균이 같아야 한다
+    df.loc[df.index % 7 == 0, 'accident_count'] = np.nan
+    df.loc[df.index % 11 == 0, 'fatal_count'] = np.nan
+    return df
+
+
+@pytest.fixture
+def dataset():
+    name = 'test_rollup'
+    query.register_dataset(name, sample_frame, dimensions=['date', 'region', 'accident_type'],
+                           measures=['accident_count', 'fatal_count'], rollup_grain='MS')
+    yield name
+    with query._lock:
+        query.invalidate_dataset(name)
+        query._datasets.pop(name)
+
+
+def raw_result(key):
+    return query._aggregate(query._apply_filters(query.get_frame(key[0]), key[1]), key[2], key[3], 'raw')
+
+
+@pytest.mark.parametrize('filters, group_by', [
+    (None, None),
+    (None, ['region']),
+    ({'date': ('2023-02-01', '2023-04-30')}, ['region', 'accident_type']),
+    ({'region': ['서울'], 'date': (None, '2023-03-31')}, ['accident_type']),
+    ({'accident_type': '전도'}, ['region']),
+])
+def test_rollup_matches_raw(dataset, filters, group_by):
+    measures = ['accident_count', ('accident_count', 'count'), ('accident_count', 'mean'),
+                ('fatal_count', 'mean'), ('fatal_count', 'count')]
+    key = normalize_query(dataset, filters, group_by, measures)
+    assert plan_query(key) == 'rollup'
+    result = run_query(dataset, filters, group_by, measures, engine='pandas')
+    expected = raw_result(key)
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+
+@pytest.mark.parametrize('filters, group_by, measures', [
+    ({'date': ('2023-02-10', '2023-04-30')}, ['region'], None),
+    (None, ['date'], None),
+    (None, ['region'], [('accident_count', 'max')]),
+    ({'weekday': 'Mon'}, None, None),
+])
+def test_unsupported_queries_read_raw_rows(dataset, filters, group_by, measures):
+    assert plan_query(normalize_query(dataset, filters, group_by, measures)) == 'raw'
+
+
+def test_mean_ignores_missing_values(dataset):
+    frame = sample_frame()
+    result = run_query(dataset, measures=[('accident_count', 'mean')], engine='pandas')
+    assert result['accident_count_mean'].iloc[0] == pytest.approx(frame['accident_count'].mean())
+
+
+def test_unsupported_aggregation_is_rejected(dataset):
+    with pytest.raises(ValueError):
+        normalize_query(dataset, measures=[('accident_count', 'median')])
+
+
+@pytest.fixture
+def sql_engine(tmp_path, monkeypatch):
+    from utils.sql_engine import SQLEngine
+    engine = SQLEngine('sqlite', path=str(tmp_path / 'query.sqlite'))
+    monkeypatch.setattr(query, 'get_engine', lambda backend: engine)
+    yield engine
+    engine.close()
+
+
+def test_sql_table_is_loaded_piece_by_piece(sql_engine):
+    # 조각마다 컬럼이 다르고, 첫 조각의 region은 값이 하나도 없다
+    first = pd.DataFrame({'date': pd.to_datetime(['2023-01-01', '2023-01-02']), 'region': [None, None],
+                          'accident_count': [1.0, 2.0]})
+    second = pd.DataFrame({'date': pd.to_datetime(['2024-01-01']), 'region': ['서울'],
+                           'accident_count': [4.0], 'road_type': ['고속국도']})
+    load = lambda: iter([first, second])
+    kinds = sql_engine.ensure_table('pieces', 'v1', load)
+    assert kinds == {'date': 'datetime', 'accident_count': 'number', 'region': 'text', 'road_type': 'text'}
+    result = sql_engine.query('pieces', 'v1', load, [], ['region'], [('accident_count', 'sum')])
+    assert result.to_dict('list') == {'region': ['서울', None], 'accident_count': [4.0, 3.0]}
+    header, chunks = sql_engine.select('pieces', 'v1', load, [], chunk_rows=2)
+    assert list(header.columns) == list(kinds)
+    assert [len(chunk) for chunk in chunks] == [2, 1]
+
+
+def test_sql_rollup_matches_pandas(dataset, sql_engine, monkeypatch):
+    expected = query._build_rollup(query._datasets[dataset], query.get_frame(dataset))
+    with query._lock:
+        query.invalidate_dataset(dataset)
+    monkeypatch.setattr(query, 'QUERY_ENGINE', 'sqlite')
+    cube = query.get_rollup(dataset)
+    keys = ['date', 'region', 'accident_type']
+    pd.testing.assert_frame_equal(cube.sort_values(keys).reset_index(drop=True)[expected.columns],
+                                  expected.sort_values(keys).reset_index(drop=True), check_dtype=False)
+
+
+@pytest.mark.parametrize('group_by, measures', [
+    (['date'], ['accident_count', ('accident_count', 'mean'), ('fatal_count', 'max')]),
+    (['region'], [('accident_count', 'count'), ('fatal_count', 'mean')]),
+])
+def test_sql_period_comparison_matches_pandas(dataset, sql_engine, group_by, measures):
+    # 3개월 앞으로 옮기면 1월 30·31일이 모두 4월 30일이 된다
+    period = ('2023-04-01', '2023-06-30')
+    expected = query.run_period_comparison(dataset, period, group_by=group_by, measures=measures, engine='pandas')
+    result = query.run_period_comparison(dataset, period, group_by=group_by, measures=measures, engine='sqlite')
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+
+@pytest.mark.parametrize('period, baseline, expected, offset', [
+    (('2023-04-01', '2023-06-30'), 'previous', ('2023-01-01', '2023-03-31'), pd.DateOffset(months=3)),
+    (('2024-02-01', '2024-02-29'), 'previous', ('2024-01-01', '2024-01-31'), pd.DateOffset(months=1)),
+    (('2023-04-10', '2023-04-19'), 'previous', ('2023-03-31', '2023-04-09'), pd.Timedelta(days=10)),
+    (('2023-03-15', '2023-04-30'), 'previous', ('2023-01-27', '2023-03-14'), pd.Timedelta(days=47)),
+    (('2024-02-29', '2024-03-10'), 'year', ('2023-02-28', '2023-03-10'), pd.DateOffset(years=1)),
+])
+def test_comparison_periods(period, baseline, expected, offset):
+    current, previous, shift = query.comparison_periods(period, baseline)
+    assert current == tuple(pd.Timestamp(value) for value in period)
+    assert previous == tuple(pd.Timestamp(value) for value in expected)
+    assert type(shift) is type(offset) and shift == offset
+
+
+def test_unknown_comparison_baseline_is_rejected():
+    with pytest.raises(ValueError):
+        query.comparison_periods(('2023-01-01', '2023-01-31'), 'quarter')
+
+
+@pytest.fixture
+def daily_dataset():
+    # 2022~2023년 매일 서울 1건: 기간 합계가 곧 일수다
+    name = 'test_daily'
+    dates = pd.date_range('2022-01-01', '2023-12-31', freq='D')
+    loader = lambda: pd.DataFrame({'date': dates, 'region': '서울', 'accident_count': 1.0})
+    query.register_dataset(name, loader, dimensions=['date', 'region'], measures=['accident_count'],
+                           rollup_grain='MS')
+    yield name
+    with query._lock:
+        query.invalidate_dataset(name)
+        query._datasets.pop(name)
+
+
+def compared(result):
+    return {label: part.drop(columns='period').reset_index(drop=True) for label, part in result.groupby('period')}
+
+
+@pytest.mark.parametrize('engine', ['pandas', 'sqlite'])
+def test_month_aligned_previous_period_shifts_by_months(daily_dataset, sql_engine, engine):
+    result = compared(query.run_period_comparison(daily_dataset, ('2023-04-01', '2023-06-30'), group_by=['date'],
+                                                  engine=engine))
+    baseline = result['baseline'].set_index(pd.to_datetime(result['baseline']['date']))['accident_count']
+    # 1~3월이 날짜 그대로 4~6월로 옮겨진다: 1월·3월 30·31일은 4월·6월 30일에 모이고 5월 29~31일은 비어 있다
+    assert baseline.sum() == 31 + 28 + 31
+    assert baseline[pd.Timestamp('2023-04-29')] == 1
+    assert baseline[pd.Timestamp('2023-04-30')] == 2
+    assert baseline[pd.Timestamp('2023-06-30')] == 2
+    assert not baseline.index.isin(pd.date_range('2023-05-29', '2023-05-31')).any()
+    assert result['current']['accident_count'].sum() == 30 + 31 + 30
+
+
+@pytest.mark.parametrize('engine', ['pandas', 'sqlite'])
+def test_day_offset_previous_period_lines_up_by_day(daily_dataset, sql_engine, engine):
+    result = compared(query.run_period_comparison(daily_dataset, ('2023-03-10', '2023-03-19'), group_by=['date'],
+                                                  engine=engine))
+    days = pd.date_range('2023-03-10', '2023-03-19', freq='D')
+    for label in ('current', 'baseline'):
+        assert list(pd.to_datetime(result[label]['date'])) == list(days)
+        assert (result[label]['accident_count'] == 1).all()
+
+
+@pytest.mark.parametrize('engine', ['pandas', 'sqlite'])
+@pytest.mark.parametrize('period, current, baseline', [
+    (('2023-03-01', '2023-03-31'), 31, 31),
+    # 1년보다 긴 기간: 2022년 7~12월은 현재와 기준 기간 양쪽에 모두 들어간다
+    (('2022-07-01', '2023-12-31'), 184 + 365, 365),
+])
+def test_year_baseline_totals(daily_dataset, sql_engine, engine, period, current, baseline):
+    result = compared(query.run_period_comparison(daily_dataset, period, baseline='year', engine=engine))
+    assert result['current']['accident_count'].iloc[0] == current
+    assert result['baseline']['accident_count'].iloc[0] == baseline
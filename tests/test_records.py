@@ -0,0 +1,35 @@
+import pytest
+from utils.records import parse_filter
+
+
+@pytest.mark.parametrize('query, terms', [
+    (None, []),
+    ('', []),
+    ('{region} = 서울', [('region', 'eq', '서울', True)]),
+    ('{region} s= 서울', [('region', 'eq', '서울', True)]),
+    ('{region} ieq 서울', [('region', 'eq', '서울', False)]),
+    ('{fatal_count} >= 2', [('fatal_count', 'ge', '2', True)]),
+    ('{fatal_count} > 2 && {hour} < 6', [('fatal_count', 'gt', '2', True), ('hour', 'lt', '6', True)]),
+    ('{hour} ne 3', [('hour', 'ne', '3', True)]),
+    ('{hour} != 3', [('hour', 'ne', '3', True)]),
+    ('{accident_type} icontains "차대 사람"', [('accident_type', 'contains', '차대 사람', False)]),
+    ("{region} scontains '부'", [('region', 'contains', '부', True)]),
+    ('{date} datestartswith 2020-01', [('date', 'datestartswith', '2020-01', True)]),
+])
+def test_supported_expressions(query, terms):
+    assert parse_filter(query) == terms
+
+
+@pytest.mark.parametrize('query', [
+    '{region} = 서울 || {region} = 부산',
+    '{fatal_count} > 1 and {hour} = 3',
+    '{region} = {road_type}',
+    '({region} = 서울)',
+    '!({region} = 서울)',
+    'region = 서울',
+    '{region} is blank',
+    '{region} like 서%',
+])
+def test_rejected_expressions(query):
+    with pytest.raises(ValueError):
+        parse_filter(query)
@@ -0,0 +1,21 @@
+import pandas as pd
+import pytest
+from callbacks import report_callbacks
+
+SECTIONS = ['summary', 'metrics', 'trends', 'regional', 'accident_types', 'recommendations']
+
+
+def empty_dimension(dataset, dimension, measure, filters=None, by_date=False):
+    columns = (['date'] if by_date else []) + ([] if by_date and dimension == 'total' else [dimension])
+    return pd.DataFrame(columns=columns + [measure])
+
+
+@pytest.mark.parametrize('start_date, end_date', [('2021-01-01', '2021-12-31'), ('2020-03-01', '2020-05-01')])
+def test_report_for_range_without_data(monkeypatch, start_date, end_date):
+    monkeypatch.setattr(report_callbacks, 'query_dimension', empty_dimension)
+    monkeypatch.setattr(report_callbacks, 'query_derived',
+                        lambda dataset, measure: pd.DataFrame({'date': pd.to_datetime([]), 'yoy_pct': []}))
+    summary, metrics, *_, date_display = report_callbacks.create_report('monthly', start_date, end_date, SECTIONS)
+    assert '해당 기간 데이터 없음' in str(summary)
+    assert '해당 기간 데이터 없음' in str(metrics)
+    assert date_display == f'보고서 기간: {start_date} ~ {end_date}'
@@ -0,0 +1,52 @@
+import os
+from utils import result_cache
+from utils.result_cache import ResultCache, code_digest
+
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+
+def test_code_digest_covers_the_whole_tree(tmp_path):
+    root = str(tmp_path)
+    write(os.path.join(root, 'callbacks', 'report_callbacks.py'), 'A = 1\n')
+    write(os.path.join(root, 'utils', 'query.py'), 'B = 1\n')
+    write(os.path.join(root, 'data', 'regions', 'sido.geojson'), '{}')
+    write(os.path.join(root, 'data', 'cargo', 'source.csv'), 'a,b\n')
+    before = code_digest(root)
+
+    # 콜백 모듈이 아닌 파일(질의 계층)이 바뀌어도 이전 결과를 쓰지 않는다
+    write(os.path.join(root, 'utils', 'query.py'), 'B = 2\n')
+    after_query = code_digest(root)
+    write(os.path.join(root, 'data', 'regions', 'sido.geojson'), '{"type": "FeatureCollection"}')
+    after_regions = code_digest(root)
+    assert len({before, after_query, after_regions}) == 3
+
+    # 원본 데이터는 source_digest가 맡는다
+    write(os.path.join(root, 'data', 'cargo', 'source.csv'), 'a,b\n1,2\n')
+    assert code_digest(root) == after_regions
+
+
+def test_key_changes_with_code(tmp_path, monkeypatch):
+    cache = ResultCache(path=str(tmp_path / 'results.sqlite'))
+    monkeypatch.setattr(result_cache, '_code_digest', 'one')
+    key = cache.make_key('report', {'start': '2020-01-01'}, [])
+    assert cache.make_key('report', {'start': '2020-01-01'}, []) == key
+    monkeypatch.setattr(result_cache, '_code_digest', 'two')
+    assert cache.make_key('report', {'start': '2020-01-01'}, []) != key
+
+
+def test_cached_computes_once(tmp_path):
+    cache = ResultCache(path=str(tmp_path / 'results.sqlite'))
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {'figure': {'data': [{'y': [1, 2, 3]}]}}
+    first = cache.cached('analysis-graphs', {'type': 'cargo'}, [], compute)
+    second = cache.cached('analysis-graphs', {'type': 'cargo'}, [], compute)
+    assert first == second == {'figure': {'data': [{'y': [1, 2, 3]}]}}
+    assert len(calls) == 1
+    assert cache.stats()['entries'] == 1
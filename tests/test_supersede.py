@@ -0,0 +1,29 @@
+import pytest
+from dash.exceptions import PreventUpdate
+from utils.supersede import RequestTracker
+
+
+def test_workers_share_the_newest_request(tmp_path):
+    # 같은 파일을 쓰는 두 추적기: 서로 다른 워커 프로세스처럼 동작한다
+    path = str(tmp_path / 'results.sqlite')
+    first, second = RequestTracker(path=path), RequestTracker(path=path)
+    running = first.begin('session', 'analysis-graphs', 1)
+    newer = second.begin('session', 'analysis-graphs', 2)
+    with pytest.raises(PreventUpdate):
+        running.checkpoint('query')
+    newer.checkpoint('query')
+    # 늦게 도착한 이전 요청은 바로 버린다
+    with pytest.raises(PreventUpdate):
+        first.begin('session', 'analysis-graphs', 1)
+    assert second.latest(('session', 'analysis-graphs')) == 2
+    first.begin('session', 'hotspot-map', 1).checkpoint('query')
+    first.begin('other', 'analysis-graphs', 1).checkpoint('query')
+
+
+def test_disabled_file_tracks_in_process():
+    tracker = RequestTracker(path='0')
+    running = tracker.begin('session', 'analysis-graphs', 1)
+    tracker.begin('session', 'analysis-graphs', 2)
+    with pytest.raises(PreventUpdate):
+        running.checkpoint('query')
+    assert RequestTracker(path='0').latest(('session', 'analysis-graphs')) == -1
@@ -0,0 +1,45 @@
+import json
+import os
+import subprocess
+import sys
+import numpy as np
+import plotly.graph_objects as go
+from plotly.io.json import to_json_plotly
+from utils.transport import compact_figure
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+
+
+def sample_figure():
+    return go.Figure(go.Scatter(x=np.arange(40), y=np.linspace(0, 1, 40), name='사고 건수'))
+
+
+def test_json_fallback_without_orjson():
+    # orjson이 없는 환경: 표준 json 엔진으로 같은 내용을 보낸다
+    script = '''
+import json, sys
+sys.modules['orjson'] = None
+import numpy as np
+import plotly.graph_objects as go
+import plotly.io as pio
+from plotly.io.json import to_json_plotly
+from utils import transport
+from utils.result_cache import _loads
+fig = go.Figure(go.Scatter(x=np.arange(40), y=np.linspace(0, 1, 40), name='사고 건수'))
+payload = to_json_plotly(transport.compact_figure(fig))
+print(json.dumps({'engine': transport.JSON_ENGINE, 'plotly_engine': pio.json.config.default_engine,
+                  'loads': _loads.__module__, 'figure': _loads(payload)}))
+'''
+    env = dict(os.environ, PYTHONPATH=SRC, CARGO_RESULT_CACHE='0')
+    output = subprocess.run([sys.executable, '-c', script], cwd=SRC, env=env, capture_output=True, text=True,
+                            check=True).stdout.strip().splitlines()[-1]
+    result = json.loads(output)
+    assert result['engine'] == 'json'
+    assert result['plotly_engine'] != 'orjson'
+    assert result['loads'] == 'json'
+    assert result['figure'] == json.loads(to_json_plotly(compact_figure(sample_figure()), engine='json'))
+
+
+def test_orjson_and_json_payloads_match():
+    figure = compact_figure(sample_figure())
+    assert json.loads(to_json_plotly(figure, engine='orjson')) == json.loads(to_json_plotly(figure, engine='json'))
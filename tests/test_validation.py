@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+from utils.validation import validate_rows, QUARANTINE_COLUMNS
+
+
+def fatal_rows():
+    return pd.DataFrame({
+        'date': pd.to_datetime(['2021-01-01', '2021-01-02', None, '2021-01-04', '2021-01-05', '2021-01-06']),
+        'fatal_count': ['1', '2', '1', 'x', '-1', None],
+        'lat': [37.5, 35.1, 36.0, 37.0, 39.5, 36.5],
+        'lon': [127.0, 129.0, 127.5, 127.0, 127.0, 'abc'],
+    }, index=[10, 11, 12, 13, 14, 15])
+
+
+def test_valid_rows_are_converted_to_numbers():
+    valid, quarantine, quality = validate_rows('fatal', fatal_rows(), 'fatal.csv')
+    assert valid.index.tolist() == [10, 11]
+    assert valid['fatal_count'].tolist() == [1, 2]
+    assert pd.api.types.is_numeric_dtype(valid['fatal_count'])
+    assert pd.api.types.is_numeric_dtype(valid['lon'])
+
+
+def test_failing_rows_are_quarantined_with_every_reason():
+    _, quarantine, quality = validate_rows('fatal', fatal_rows(), 'fatal.csv')
+    assert list(quarantine.columns[:len(QUARANTINE_COLUMNS)]) == QUARANTINE_COLUMNS
+    reasons = dict(zip(quarantine['source_row'], quarantine['reason']))
+    assert reasons == {
+        12: 'invalid_date',
+        13: 'non_numeric:fatal_count',
+        14: 'negative:fatal_count;out_of_range:lat',
+        15: 'non_numeric:lon',
+    }
+    assert (quarantine['file'] == 'fatal.csv').all()
+    # 격리 행은 읽은 값 그대로 남는다
+    assert quarantine.loc[quarantine['source_row'] == 13, 'fatal_count'].item() == 'x'
+    assert quality == {'rows': 6, 'valid': 2, 'quarantined': 4,
+                       'checks': {'non_numeric:fatal_count': 1, 'negative:fatal_count': 1,
+                                  'non_numeric:lon': 1, 'out_of_range:lat': 1, 'invalid_date': 1}}
+
+
+def test_missing_measures_pass():
+    rows = pd.DataFrame({'date': pd.to_datetime(['2021-01-01']), 'fatal_count': [np.nan]})
+    valid, quarantine, quality = validate_rows('fatal', rows, 'fatal.csv')
+    assert len(valid) == 1 and quarantine.empty and quality['checks'] == {}
+
+
+def test_quarantine_keeps_raw_values():
+    rows = pd.DataFrame({'accident_count': [5, -2]}, index=[3, 4])
+    raw = pd.DataFrame({'발생건수': ['5', '-2'], '시도': ['서울', '부산']}, index=[3, 4])
+    _, quarantine, _ = validate_rows('cargo', rows, 'cargo.xls', raw=raw)
+    assert quarantine[['source_row', 'reason', '발생건수', '시도']].values.tolist() == \
+        [[4, 'negative:accident_count', '-2', '부산']]
+
+
+def test_files_without_checked_columns_pass():
+    rows = pd.DataFrame({'region': ['서울', '부산']})
+    valid, quarantine, quality = validate_rows('vehicle', rows, 'vehicle.xlsx')
+    assert len(valid) == 2 and quarantine.empty
+    assert quality == {'rows': 2, 'valid': 2, 'quarantined': 0, 'checks': {}}